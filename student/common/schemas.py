@@ -37,7 +37,27 @@ class Day2Plan:
     force_rag_only: bool = False
     return_draft_when_enough: bool = True
     max_context: int = 1200
-    embedding_model: str = "text-embedding-3-small"
+    embedding_model: str = "text-embedding-3-small"  # "local-hash-<dim>" = 오프라인 로컬 임베딩
+    nprobe: Optional[int] = None     # IVF 탐색 클러스터 수 (None = 인덱스 manifest 값)
+    ef_search: Optional[int] = None  # HNSW 탐색 폭 (None = 인덱스 manifest 값)
+    index_mmap: bool = False  # 인덱스 파일 메모리 매핑 로딩 (빠른 시작, 프로세스 간 페이지 공유)
+    index_warmup: bool = False  # 로딩 직후 hot 리스트 페이지 선반영
+    hybrid: bool = False      # BM25 + 벡터 후보를 RRF 로 융합 (인덱스에 bm25/ 가 있을 때)
+    hybrid_candidates: int = 50  # 융합 전 각 검색기에서 가져올 후보 수
+    rrf_k: int = 60           # RRF 상수
+    filters: dict = field(default_factory=dict)  # meta 필터 식 (예: {"path": {"$prefix": "data/raw/"}})
+    mmr: bool = False         # MMR 다양화 (겹치는 청크 대신 서로 다른 근거 선택)
+    mmr_candidates: int = 20  # MMR 후보 수
+    mmr_lambda: float = 0.7   # 1.0 = 관련도만, 0.0 = 다양성만
+    dup_threshold: float = 0.95  # 이 코사인 이상인 후보는 거의-중복으로 제외
+    merge_adjacent: bool = False  # 같은 문서의 연속 청크를 겹침 제거 후 병합
+    micro_batch: bool = False  # 동시 질의를 모아 임베딩/검색을 한 번에 처리
+    batch_window_ms: float = 5.0  # 배치 수집 시간창
+    batch_max: int = 32       # 배치당 최대 질의 수
+    score_floor: float = 0.0  # >0 이면 이 점수 이상 hit 만 반환 (범위 검색, 상한 top_k)
+    early_gate: bool = False  # 청크 조회 전 점수로 게이트 → insufficient 면 청크 텍스트를 읽지 않음
+    route_top: int = 2        # 연합 인덱스에서 질의를 보낼 컬렉션 수 (0 = 전체)
+    shared_index: str = ""    # 공유 메모리 세그먼트 이름 (shared.py 로 발행된 인덱스를 복사 없이 mmap 사용)
 
 # (선택) RAG Context 아이템도 dataclass를 쓸 경우 예시
 @dataclass
@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+"""
+Day2 마이크로 배칭
+- 짧은 시간창(window_ms) 안에 들어온 질의들을 모아
+  1) 임베딩 요청 1회 (Embeddings.encode 에 질의 목록 전달)
+  2) 같은 검색 조건끼리 FAISS 다중 질의 검색 1회 (FaissStore.search_ids_batch)
+  후 각 호출자에게 결과를 돌려줌
+- 호출자 스레드는 Future 로 대기 → 동시 요청이 많을수록 왕복/스캔 횟수 절감
+"""
+
+from __future__ import annotations
+import time, queue, threading
+from concurrent.futures import Future
+from typing import Dict, Any, List, Tuple, Optional
+
+import numpy as np
+
+from .session import Day2Session
+
+
+class _Request:
+    __slots__ = ("query", "spec", "future")
+
+    def __init__(self, query: str, spec: Optional[Tuple], future: Future):
+        self.query = query
+        self.spec = spec
+        self.future = future
+
+
+class MicroBatcher:
+    """
+    submit(query, spec) → Future[(store, qv, hit)]
+    - spec: (top_k, nprobe, ef_search) 이면 벡터 검색까지 배치 수행 → hit = (scores, ids)
+            None 이면 임베딩만 배치 (하이브리드/MMR 등은 호출자가 qv 로 직접 검색) → hit = None
+    """
+
+    def __init__(self, session: Day2Session, window_ms: float = 5.0, max_batch: int = 32):
+        self.session = session
+        self.window = window_ms / 1000.0
+        self.max_batch = max_batch
+        self._q: "queue.Queue[_Request]" = queue.Queue()
+        self._thread = threading.Thread(target=self._loop, name="day2-microbatch", daemon=True)
+        self._thread.start()
+        self.batches = 0
+        self.requests = 0
+
+    def submit(self, query: str, spec: Optional[Tuple] = None) -> Future:
+        fut: Future = Future()
+        self._q.put(_Request(query, spec, fut))
+        return fut
+
+    def _loop(self):
+        while True:
+            batch = [self._q.get()]
+            deadline = time.monotonic() + self.window
+            while len(batch) < self.max_batch:
+                remain = deadline - time.monotonic()
+                if remain <= 0:
+                    break
+                try:
+                    batch.append(self._q.get(timeout=remain))
+                except queue.Empty:
+                    break
+            self._run(batch)
+
+    def _run(self, batch: List[_Request]):
+        try:
+            store, emb = self.session.current()
+            Q = np.asarray(emb.encode([r.query for r in batch]), dtype="float32")
+            hits: List[Any] = [None] * len(batch)
+            groups: Dict[Tuple, List[int]] = {}
+            for i, r in enumerate(batch):
+                if r.spec is not None:
+                    groups.setdefault(r.spec, []).append(i)
+            for (top_k, nprobe, ef_search), idxs in groups.items():
+                res = store.search_ids_batch(Q[idxs], top_k, nprobe=nprobe, ef_search=ef_search)
+                for i, h in zip(idxs, res):
+                    hits[i] = h
+        except Exception as e:
+            for r in batch:
+                r.future.set_exception(e)
+            return
+        self.batches += 1
+        self.requests += len(batch)
+        for i, r in enumerate(batch):
+            r.future.set_result((store, Q[i], hits[i]))
+
+
+_BATCHERS: Dict[Day2Session, MicroBatcher] = {}
+_BATCHERS_LOCK = threading.Lock()
+
+
+def get_batcher(session: Day2Session, window_ms: float = 5.0, max_batch: int = 32) -> MicroBatcher:
+    """세션당 하나의 배처 (최초 호출 시 설정값 사용)"""
+    b = _BATCHERS.get(session)
+    if b is None:
+        with _BATCHERS_LOCK:
+            b = _BATCHERS.get(session)
+            if b is None:
+                b = _BATCHERS[session] = MicroBatcher(session, window_ms, max_batch)
+    return b
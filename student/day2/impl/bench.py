@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+"""
+Day2 검색 벤치마크: 인덱스/저장 구성별 recall@k · 지연 시간 · 빌드 시간 · 크기
+- 코퍼스(build_corpus) 와 임베딩은 한 번만 계산 → 구성별로 FaissStore 빌드/저장/재로딩 후 측정
+- 정답: 전체 벡터에 대한 정확(brute-force) 내적 top-k
+- 기본 임베더는 오프라인 로컬 백엔드(local-hash-<dim>) → 네트워크 없이 커밋 간 비교 가능
+  (--model 로 API 모델 지정 가능)
+- 출력: JSON (stdout 또는 --out)
+
+예) python -m student.day2.impl.bench --paths data/raw --k 10 --out bench.json
+"""
+
+from __future__ import annotations
+import os, gc, json, time, shutil, tempfile, argparse, subprocess
+from typing import List, Dict, Any
+
+import numpy as np
+
+from .ingest import build_corpus, chunking_info, CHUNKERS
+from .store import FaissStore, STORAGE_TYPES, exact_topk  # exact_topk: 정답 계산 (chunkbench 도 사용)
+from .embeddings import Embeddings
+from .local_embed import LOCAL_PREFIX
+
+BENCH_INDEX_TYPES = ("flat", "ivf", "hnsw")
+
+
+def _rss_bytes() -> int:
+    """현재 프로세스 상주 메모리 (리눅스 /proc, 그 외는 0)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def _dir_bytes(path: str) -> int:
+    return sum(os.path.getsize(os.path.join(d, f)) for d, _, fs in os.walk(path) for f in fs)
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"],
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _percentiles(lat_s: List[float]) -> Dict[str, float]:
+    ms = np.asarray(lat_s) * 1000.0
+    return {f"p{p}_ms": round(float(np.percentile(ms, p)), 4) for p in (50, 95, 99)}
+
+
+def bench_config(vecs: np.ndarray, corpus: List[Dict[str, Any]], Q: np.ndarray, gt: np.ndarray,
+                 k: int, index_type: str, storage: str, workdir: str, **search_opts) -> Dict[str, Any]:
+    """한 구성 빌드 → 저장 → 재로딩 → 질의별 검색 지연/재현율 측정"""
+    d = os.path.join(workdir, f"{index_type}-{storage}")
+    index_path, docs_path = os.path.join(d, "faiss.index"), os.path.join(d, "docs.jsonl")
+    t0 = time.perf_counter()
+    store = FaissStore(vecs.shape[1], index_path, docs_path, index_type=index_type,
+                       storage=storage, lexical=False)
+    store.add(vecs, corpus)
+    store.save()
+    build_s = time.perf_counter() - t0
+    del store
+    gc.collect()
+
+    rss0 = _rss_bytes()
+    t0 = time.perf_counter()
+    loaded = FaissStore.load(index_path, docs_path)
+    load_s = time.perf_counter() - t0
+    rss = _rss_bytes() - rss0
+
+    lat, hits = [], 0
+    for qi in range(Q.shape[0]):
+        t = time.perf_counter()
+        _, ids = loaded.search_ids(Q[qi], k, **search_opts)
+        lat.append(time.perf_counter() - t)
+        hits += len(set(ids.tolist()) & set(gt[qi].tolist()))
+    out = {
+        "index_type": index_type, "storage": storage,
+        f"recall@{k}": round(hits / float(Q.shape[0] * k), 4),
+        **_percentiles(lat),
+        "build_s": round(build_s, 3), "load_s": round(load_s, 3),
+        "disk_bytes": _dir_bytes(d), "rss_delta_bytes": rss,
+    }
+    del loaded
+    gc.collect()
+    shutil.rmtree(d, ignore_errors=True)
+    return out
+
+
+def run_bench(paths: List[str], k: int = 10, n_queries: int = 200, queries: List[str] | None = None,
+              model: str | None = None, dim: int = 384,
+              index_types=BENCH_INDEX_TYPES, storages=STORAGE_TYPES, seed: int = 0, chunker: str = "fixed",
+              **search_opts) -> Dict[str, Any]:
+    corpus = build_corpus(paths, chunker=chunker)
+    if not corpus:
+        raise ValueError("build_corpus 결과가 비어 있습니다. 유효한 입력 경로를 확인하세요.")
+    emb = Embeddings(model=model or f"{LOCAL_PREFIX}-{dim}")
+
+    t0 = time.perf_counter()
+    vecs = np.ascontiguousarray(emb.encode([c["text"] for c in corpus]), dtype="float32")
+    embed_s = time.perf_counter() - t0
+
+    if not queries:
+        # 질의 세트가 없으면 청크 앞부분을 질의로 사용 (정답은 어차피 정확 검색 기준)
+        rng = np.random.default_rng(seed)
+        pick = rng.choice(len(corpus), min(n_queries, len(corpus)), replace=False)
+        queries = [corpus[int(i)]["text"][:200] for i in pick]
+    Q = np.ascontiguousarray(emb.encode(queries), dtype="float32")
+    k = min(k, len(corpus))
+    gt = exact_topk(Q, vecs, k)
+
+    results = []
+    workdir = tempfile.mkdtemp(prefix="day2_bench_")
+    try:
+        for it in index_types:
+            for st in storages:
+                try:
+                    results.append(bench_config(vecs, corpus, Q, gt, k, it, st, workdir, **search_opts))
+                except Exception as e:  # 구성 하나의 실패(예: 학습 데이터 부족)로 전체를 멈추지 않음
+                    results.append({"index_type": it, "storage": st, "error": f"{type(e).__name__}: {e}"})
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return {
+        "commit": _git_commit(),
+        "embedding_model": emb.model,
+        "dim": int(vecs.shape[1]),
+        "chunks": len(corpus),
+        "chunking": chunking_info(chunker),
+        "embed_s": round(embed_s, 3),
+        "queries": int(Q.shape[0]),
+        "k": k,
+        "search_opts": search_opts,
+        "results": results,
+    }
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Day2 인덱스 구성별 recall/지연/크기 벤치마크 (JSON 출력)")
+    ap.add_argument("--paths", nargs="+", default=["data/raw"])
+    ap.add_argument("--k", type=int, default=10)
+    ap.add_argument("--n_queries", type=int, default=200)
+    ap.add_argument("--queries", default=None, help="질의 파일 (한 줄에 하나). 없으면 청크에서 추출")
+    ap.add_argument("--model", default=None, help="API 임베딩 모델 (기본: 오프라인 로컬 임베더)")
+    ap.add_argument("--dim", type=int, default=384, help="로컬 임베더 차원")
+    ap.add_argument("--index_types", nargs="+", default=list(BENCH_INDEX_TYPES), choices=BENCH_INDEX_TYPES)
+    ap.add_argument("--storages", nargs="+", default=list(STORAGE_TYPES), choices=STORAGE_TYPES)
+    ap.add_argument("--chunker", default="fixed", choices=CHUNKERS)
+    ap.add_argument("--nprobe", type=int, default=None)
+    ap.add_argument("--ef_search", type=int, default=None)
+    ap.add_argument("--out", default=None)
+    args = ap.parse_args()
+
+    qs = None
+    if args.queries:
+        with open(args.queries, "r", encoding="utf-8") as f:
+            qs = [line.strip() for line in f if line.strip()]
+    report = run_bench(args.paths, k=args.k, n_queries=args.n_queries, queries=qs, model=args.model,
+                       dim=args.dim, index_types=args.index_types, storages=args.storages,
+                       chunker=args.chunker, nprobe=args.nprobe, ef_search=args.ef_search)
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text)
+    print(text)
@@ -0,0 +1,238 @@
+# -*- coding: utf-8 -*-
+"""
+BM25 역색인 (lexical 검색)
+- 조문 번호/식별자/고유명사처럼 임베딩이 놓치는 정확 일치 보완용
+- 한국어 토큰화: 조문 패턴(제3조의2) 보존 + 조사 제거 + 한글 2-gram (형태소 분석기 없이 부분 일치)
+- 저장 레이아웃(<index_dir>/bm25/, 모두 np.load(mmap_mode="r") 가능):
+    vocab.json   term → term id
+    offsets.npy  (V+1,) uint64   postings[offsets[t]:offsets[t+1]] 가 term t 의 포스팅
+    docids.npy   (P,)   int32    문서(=행) id, term 별 오름차순
+    tfs.npy      (P,)   uint16   term frequency
+    idf.npy      (V,)   float32
+    doclen.npy   (N,)   uint32   문서 길이(토큰 수)
+    stats.json   {"n_docs", "avgdl", "k1", "b"}
+- BM25Writer: 포스팅을 디스크 런으로 흘려 쓰는 빌더 (FaissStore.save, 메모리 상한 고정)
+- update_bm25: 증분 갱신. 기존 포스팅 배열 + 새 행만 토큰화해 다시 기록 (기존 청크 텍스트를 다시 읽지 않음)
+"""
+
+from __future__ import annotations
+import os, re, json, shutil, tempfile
+from array import array
+from collections import Counter
+from typing import List, Dict, Iterable, Tuple
+
+import numpy as np
+
+from .postings import PostingSpill, SPILL_POSTINGS, swap_dir
+
+BM25_DIR = "bm25"
+
+_LAW_RE = re.compile(r"제\s?\d+\s?(?:조|항|호)(?:\s?의\s?\d+)?")
+_TOKEN_RE = re.compile(r"[가-힣]+|[A-Za-z][A-Za-z0-9_\-]*|\d+(?:[.\-/]\d+)*")
+# 길이가 긴 조사부터 제거 (예: "에서" 를 "서" 보다 먼저)
+_JOSA = sorted(
+    ["은", "는", "이", "가", "을", "를", "의", "에", "에서", "에게", "으로", "로", "과", "와",
+     "도", "만", "까지", "부터", "보다", "이나", "나", "이며", "며", "께서", "한테", "처럼", "으로서", "로서"],
+    key=len, reverse=True,
+)
+
+
+def _strip_josa(w: str) -> str:
+    for j in _JOSA:
+        if len(w) > len(j) + 1 and w.endswith(j):
+            return w[: -len(j)]
+    return w
+
+
+def tokenize(text: str) -> List[str]:
+    """한국어/영문/숫자 혼합 토큰화 (소문자, 조사 제거, 한글 2-gram 추가)"""
+    text = text or ""
+    toks: List[str] = [re.sub(r"\s+", "", m) for m in _LAW_RE.findall(text)]
+    for m in _TOKEN_RE.findall(text):
+        if "가" <= m[0] <= "힣":
+            w = _strip_josa(m)
+            toks.append(w)
+            if len(w) > 2:
+                toks.extend(w[i:i + 2] for i in range(len(w) - 1))
+        else:
+            toks.append(m.lower())
+    return toks
+
+
+class BM25Index:
+    def __init__(self, vocab: Dict[str, int], offsets: np.ndarray, docids: np.ndarray, tfs: np.ndarray,
+                 idf: np.ndarray, doclen: np.ndarray, k1: float = 1.2, b: float = 0.75):
+        self.vocab = vocab
+        self.offsets = offsets
+        self.docids = docids
+        self.tfs = tfs
+        self.idf = idf
+        self.doclen = doclen
+        self.k1 = k1
+        self.b = b
+        self.n_docs = int(doclen.shape[0])
+        self.avgdl = float(doclen.mean()) if self.n_docs else 0.0
+
+    # ---------- Build ----------
+    @classmethod
+    def build(cls, texts: Iterable[str], skip: Iterable[int] = (), k1: float = 1.2, b: float = 0.75) -> "BM25Index":
+        """
+        메모리 색인 (BM25Writer 를 임시 디렉토리에 돌려 읽어 들임). texts 순서 = 행 id,
+        skip 에 속한 행(tombstone)은 포스팅에서 제외 (길이 0). 디스크 색인은 BM25Writer 로 직접 기록
+        """
+        skip = set(int(i) for i in skip)
+        with tempfile.TemporaryDirectory() as d:
+            w = BM25Writer(d, k1, b)
+            for row, text in enumerate(texts):
+                w.add(text, skip=row in skip)
+            return w.finish(mmap=False)
+
+    # ---------- Persist ----------
+    @staticmethod
+    def exists(index_dir: str) -> bool:
+        return os.path.exists(os.path.join(index_dir, BM25_DIR, "stats.json"))
+
+    @classmethod
+    def load(cls, index_dir: str, mmap: bool = True, subdir: str = BM25_DIR) -> "BM25Index":
+        d = os.path.join(index_dir, subdir)
+        mode = "r" if mmap else None
+        with open(os.path.join(d, "vocab.json"), "r", encoding="utf-8") as f:
+            vocab = json.load(f)
+        with open(os.path.join(d, "stats.json"), "r", encoding="utf-8") as f:
+            stats = json.load(f)
+        arrs = {n: np.load(os.path.join(d, f"{n}.npy"), mmap_mode=mode)
+                for n in ("offsets", "docids", "tfs", "idf", "doclen")}
+        return cls(vocab, k1=stats.get("k1", 1.2), b=stats.get("b", 0.75), **arrs)
+
+    # ---------- Search ----------
+    def search(self, query: str, top_k: int = 10, exclude: np.ndarray | None = None,
+               allow: np.ndarray | None = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        (scores, ids) 내림차순. 질의 토큰의 포스팅만 읽어 누적 (O(포스팅 길이 합))
+        - exclude: 제외할 id 배열 (tombstone) / allow: (N,) bool 허용 마스크 (메타데이터 필터)
+        """
+        tids = sorted({self.vocab[t] for t in tokenize(query) if t in self.vocab})
+        if not tids or self.n_docs == 0:
+            return np.zeros(0, dtype="float32"), np.zeros(0, dtype="int64")
+        ids_parts, score_parts = [], []
+        avgdl = max(self.avgdl, 1e-9)
+        for tid in tids:
+            s, e = int(self.offsets[tid]), int(self.offsets[tid + 1])
+            ids = np.asarray(self.docids[s:e])
+            tf = np.asarray(self.tfs[s:e], dtype="float32")
+            norm = self.k1 * (1.0 - self.b + self.b * np.asarray(self.doclen[ids], dtype="float32") / avgdl)
+            ids_parts.append(ids)
+            score_parts.append(self.idf[tid] * tf * (self.k1 + 1.0) / (tf + norm))
+        ids = np.concatenate(ids_parts)
+        uniq, inv = np.unique(ids, return_inverse=True)
+        scores = np.bincount(inv, weights=np.concatenate(score_parts)).astype("float32")
+        if exclude is not None and exclude.size:
+            keep = ~np.isin(uniq, exclude)
+            uniq, scores = uniq[keep], scores[keep]
+        if allow is not None:
+            keep = allow[uniq]
+            uniq, scores = uniq[keep], scores[keep]
+        k = min(top_k, uniq.size)
+        if k == 0:
+            return np.zeros(0, dtype="float32"), np.zeros(0, dtype="int64")
+        part = np.argpartition(-scores, k - 1)[:k]
+        order = part[np.argsort(-scores[part])]
+        return scores[order], uniq[order].astype("int64")
+
+
+def _idf(df: np.ndarray, n_live: int) -> np.ndarray:
+    df = np.asarray(df, dtype="float64")
+    n_live = max(n_live, 1)
+    return np.log(1.0 + (n_live - df + 0.5) / (df + 0.5)).astype("float32")
+
+
+def _write_rest(d: str, vocab: Dict[str, int], offsets: np.ndarray, idf: np.ndarray, doclen: np.ndarray,
+                k1: float, b: float):
+    """docids/tfs 이외 파일 기록. stats.json 을 마지막에 → exists() 가 참이면 나머지 파일은 완성된 상태"""
+    with open(os.path.join(d, "vocab.json"), "w", encoding="utf-8") as f:
+        json.dump(vocab, f, ensure_ascii=False)
+    for name, arr in (("offsets", offsets), ("idf", idf), ("doclen", doclen)):
+        np.save(os.path.join(d, f"{name}.npy"), arr)
+    n_docs = int(doclen.shape[0])
+    with open(os.path.join(d, "stats.json"), "w", encoding="utf-8") as f:
+        json.dump({"n_docs": n_docs, "avgdl": float(doclen.mean()) if n_docs else 0.0, "k1": k1, "b": b}, f)
+
+
+class BM25Writer:
+    """
+    BM25 색인 빌더: 문서를 행 순서대로 add → finish() 가 <index_dir>/bm25/ 기록 (BM25Index.build 도 이것을 사용)
+    - 포스팅은 PostingSpill 로 디스크 런에 흘려 씀 → 메모리는 어휘(vocab) + 문서 길이(4B/행) + 버퍼
+    """
+
+    def __init__(self, index_dir: str, k1: float = 1.2, b: float = 0.75, max_postings: int = SPILL_POSTINGS,
+                 subdir: str = BM25_DIR):
+        self.index_dir = index_dir
+        self.subdir = subdir
+        self.d = os.path.join(index_dir, subdir)
+        os.makedirs(self.d, exist_ok=True)
+        self.k1, self.b = k1, b
+        self.vocab: Dict[str, int] = {}
+        self.doclen = array("I")
+        self.skipped = 0
+        self.spill = PostingSpill(os.path.join(self.d, "spill"), max_postings, with_values=True)
+
+    def add(self, text: str, skip: bool = False):
+        """다음 행 추가. skip=True 이면 tombstone 행 (포스팅 없음, 길이 0)"""
+        row = len(self.doclen)
+        if skip:
+            self.doclen.append(0)
+            self.skipped += 1
+            return
+        counts = Counter(tokenize(text))
+        self.doclen.append(sum(counts.values()))
+        for term, tf in counts.items():
+            self.spill.add(self.vocab.setdefault(term, len(self.vocab)), row, min(tf, 65535))
+
+    def finish(self, mmap: bool = True) -> BM25Index:
+        offsets, df = self.spill.finish(len(self.vocab), os.path.join(self.d, "docids.npy"), "int32",
+                                        os.path.join(self.d, "tfs.npy"), "uint16")
+        doclen = np.frombuffer(self.doclen, dtype="uint32")
+        _write_rest(self.d, self.vocab, offsets.astype("uint64"), _idf(df, doclen.size - self.skipped),
+                    doclen, self.k1, self.b)
+        return BM25Index.load(self.index_dir, mmap=mmap, subdir=self.subdir)
+
+
+def update_bm25(index_dir: str, old: BM25Index, texts: Iterable[str], dead: np.ndarray,
+                max_postings: int = SPILL_POSTINGS) -> BM25Index:
+    """
+    증분 갱신: 기존 포스팅(블록 단위로 스필에 옮김) + 새 행 texts(행 번호 = 기존 문서 수부터)로 bm25/ 다시 기록
+    - dead(tombstone) 행은 포스팅에서 빼고 길이 0 → idf/avgdl 은 살아있는 문서 기준
+    - 새 디렉토리에 기록 후 교체 (old 는 기존 파일을 mmap 으로 읽는 중)
+    """
+    tmp = BM25_DIR + ".new"
+    shutil.rmtree(os.path.join(index_dir, tmp), ignore_errors=True)
+    w = BM25Writer(index_dir, old.k1, old.b, max_postings, subdir=tmp)
+    w.vocab = dict(old.vocab)
+    dead = np.asarray(dead, dtype="int64")
+    offsets = np.asarray(old.offsets, dtype="int64")
+    total = int(offsets[-1]) if offsets.size else 0
+    for s in range(0, total, w.spill.max_postings):
+        e = min(total, s + w.spill.max_postings)
+        terms = np.searchsorted(offsets, np.arange(s, e), side="right") - 1
+        rows = np.asarray(old.docids[s:e], dtype="int64")
+        keep = ~np.isin(rows, dead)
+        w.spill.add_many(terms[keep], rows[keep], np.asarray(old.tfs[s:e], dtype="int64")[keep])
+    doclen = np.array(old.doclen, dtype="uint32")
+    doclen[dead[dead < doclen.size]] = 0
+    w.doclen.frombytes(doclen.tobytes())
+    w.skipped = int(dead.size)
+    for text in texts:
+        w.add(text)
+    new = w.finish()
+    swap_dir(w.d, os.path.join(index_dir, BM25_DIR))
+    return new
+
+
+def rrf_fuse(rankings: List[np.ndarray], k: int = 60, top_k: int | None = None) -> List[Tuple[int, float]]:
+    """Reciprocal Rank Fusion: score(d) = Σ 1/(k + rank)  (rank 는 1부터)"""
+    fused: Dict[int, float] = {}
+    for ids in rankings:
+        for rank, i in enumerate(ids.tolist(), start=1):
+            fused[i] = fused.get(i, 0.0) + 1.0 / (k + rank)
+    out = sorted(fused.items(), key=lambda x: -x[1])
+    return out[:top_k] if top_k else out
@@ -1,18 +1,42 @@
 # -*- coding: utf-8 -*-
 """
 Day2 인덱싱 엔트리포인트
-- 목표: 코퍼스 생성 → 임베딩 → FAISS 저장 + docs.jsonl 저장
+- 목표: 코퍼스 생성 → 임베딩 → FAISS 저장 + 청크 저장소(chunks.dat/idx) + docs.jsonl 저장
 """
 
-import os, argparse, numpy as np
-from typing import List
+import os, json, shutil, logging, argparse, numpy as np
+from typing import List, Dict, Any
 
-from student.day2.impl.ingest import build_corpus, save_docs_jsonl
+from student.day2.impl.ingest import build_corpus, dedup_corpus, chunking_info, CHUNKERS
 from student.day2.impl.embeddings import Embeddings
-from student.day2.impl.store import FaissStore  # 제공됨
+from student.day2.impl.embcache import EMB_CACHE_PATH
+from student.day2.impl.store import FaissStore, INDEX_TYPES, STORAGE_TYPES, COARSE_DIMS  # 제공됨
+from student.day2.impl.incremental import (
+    update_index, compact_index, sources_from_items, write_sources, write_dedup,
+)
+from student.day2.impl.versions import (
+    KEEP_VERSIONS, new_version_dir, pending_version_dir, clone_current, publish, rollback, is_versioned,
+    resolve_index_dir,
+)
+from student.day2.impl.pipeline import build_streaming, has_checkpoint, CHECKPOINT_DIR
+from student.day2.impl.federation import (
+    group_by_collection, collection_dir, write_collections, write_centroids, is_federated, read_collections,
+)
+from student.day2.impl.manifest import read_manifest
 
+log = logging.getLogger(__name__)
 
-def build_index(paths: List[str], index_dir: str, model: str | None = None, batch_size: int = 128):
+# 빌드 통계 중 CLI 가 출력하는 매니페스트 항목
+REPORT_KEYS = ("count", "compression", "embedding_usage", "dedup")
+
+
+def build_index(paths: List[str], index_dir: str, model: str | None = None, batch_size: int = 128,
+                index_type: str = "auto", nlist: int | None = None, hnsw_m: int = 32,
+                storage: str = "flat", pq_m: int | None = None, rerank_factor: int = 4,
+                chunk_block_size: int = 1, chunk_compress: bool = False,
+                versioned: bool = True, keep_versions: int = KEEP_VERSIONS, lexical: bool = True,
+                centroids: int = 0, dimensions: int | None = None, coarse_dim: int | None = None,
+                streaming: bool = False, resume: bool = False, chunker: str = "fixed", dedup: bool = False):
     """
     절차:
       1) corpus = build_corpus(paths)
@@ -23,13 +47,52 @@ def build_index(paths: List[str], index_dir: str, model: str | None = None, batc
       4) index_path = os.path.join(index_dir, "faiss.index")
          docs_path  = os.path.join(index_dir, "docs.jsonl")
       5) store = FaissStore(dim=vecs.shape[1], index_path=index_path, docs_path=docs_path)
-         store.add(vecs, corpus); store.save()
-      6) save_docs_jsonl(corpus, docs_path)
+         store.add(vecs, corpus); store.save()  # docs.jsonl/청크 저장소는 save()에서 한 번만 기록
+    - index_type: "auto"(벡터 수 기준 선택) | "flat" | "ivf" | "hnsw"
+    - storage: "flat"(float32) | "fp16" | "sq8" | "pq"  (압축 모드는 원본 벡터로 재채점)
+    - versioned: index_dir/versions/<버전> 에 빌드 후 CURRENT 원자적 교체 (keep_versions 개 보존)
+    - lexical: BM25 역색인(bm25/)도 함께 생성 (Day2Plan.hybrid 검색용)
+    - centroids: >0 이면 라우팅용 중심 centroids.npy 도 기록 (연합 인덱스의 하위 인덱스)
+    - dimensions: 임베딩 축소 차원 (매니페스트에 기록 → 질의 측 Embeddings 가 자동으로 맞춤)
+    - coarse_dim: 2단계 검색. FAISS 는 앞쪽 coarse_dim 차원으로 후보 검색, 전체 차원으로 재채점
+    - streaming: 메모리 상한이 고정된 스트리밍 파이프라인으로 빌드 (pipeline.build_streaming)
+    - resume: 중단된 스트리밍 빌드를 체크포인트에서 재개 (버전 레이아웃이면 미발행 staging 재사용)
+    - chunker: "fixed"(글자 창) | "structured"(문단/문장 경계 + 토큰 예산). 매니페스트에 기록 → 증분 갱신도 동일 방식
+    - dedup: 완전/근접 중복 청크(반복 머리말/꼬리말/상용구)를 대표 1개로 합침 (ingest.dedup_corpus)
+             증분 갱신은 중복 제거를 하지 않음 → 상용구가 많이 바뀌면 전체 재빌드
     """
+    if dedup and streaming:
+        raise ValueError("dedup 은 일반 빌드에서만 지원합니다 (합쳐진 청크의 소유 파일을 빌드 후 기록해야 함).")
+    if versioned:
+        pending = pending_version_dir(index_dir, CHECKPOINT_DIR) if streaming and resume else None
+        version, staging = pending or new_version_dir(index_dir)
+        try:
+            build_index(paths, staging, model, batch_size, index_type=index_type, nlist=nlist,
+                        hnsw_m=hnsw_m, storage=storage, pq_m=pq_m, rerank_factor=rerank_factor,
+                        chunk_block_size=chunk_block_size, chunk_compress=chunk_compress,
+                        versioned=False, lexical=lexical, centroids=centroids,
+                        dimensions=dimensions, coarse_dim=coarse_dim,
+                        streaming=streaming, resume=pending is not None, chunker=chunker, dedup=dedup)
+        except Exception:
+            if not (streaming and has_checkpoint(staging)):  # 체크포인트가 있으면 재개용으로 남김
+                shutil.rmtree(staging, ignore_errors=True)
+            raise
+        return publish(index_dir, version, keep=keep_versions)
+
+    if streaming:
+        return build_streaming(paths, index_dir, model, batch_size, lexical=lexical, centroids=centroids,
+                               dimensions=dimensions, resume=resume, index_type=index_type, nlist=nlist,
+                               hnsw_m=hnsw_m, storage=storage, pq_m=pq_m, rerank_factor=rerank_factor,
+                               chunk_block_size=chunk_block_size, chunk_compress=chunk_compress,
+                               coarse_dim=coarse_dim, chunker=chunker)
+
     # 1) 코퍼스 생성
-    corpus = build_corpus(paths)  # [{"id":..., "text":..., "meta":{...}}, ...]
+    corpus = build_corpus(paths, chunker=chunker)  # [{"id":..., "text":..., "meta":{...}}, ...]
     if not corpus:
         raise ValueError("build_corpus 결과가 비어 있습니다. 유효한 입력 경로를 확인하세요.")
+    chunks, rows, dedup_stats = corpus, None, None
+    if dedup:
+        corpus, rows, dedup_stats = dedup_corpus(chunks)  # rows: 청크별 대표 행 (sources.json 소유 기록)
 
     # 2) 텍스트 추출
     texts = [item.get("text", "") for item in corpus]
@@ -37,7 +100,7 @@ def build_index(paths: List[str], index_dir: str, model: str | None = None, batc
         raise ValueError("코퍼스에서 텍스트를 찾지 못했습니다.")
 
     # 3) 임베딩 계산
-    emb = Embeddings(model=model, batch_size=batch_size)
+    emb = Embeddings(model=model, batch_size=batch_size, dimensions=dimensions, cache_path=EMB_CACHE_PATH)
     vecs = emb.encode(texts)  # (N, D) numpy.ndarray (L2 정규화 가정)
     if not isinstance(vecs, np.ndarray) or vecs.ndim != 2:
         raise ValueError("임베딩 결과가 2차원 numpy 배열이 아닙니다.")
@@ -54,22 +117,155 @@ def build_index(paths: List[str], index_dir: str, model: str | None = None, batc
     docs_path = os.path.join(index_dir, "docs.jsonl")
 
     # 5) 인덱스 저장
-    store = FaissStore(dim=vecs.shape[1], index_path=index_path, docs_path=docs_path)
+    store = FaissStore(dim=vecs.shape[1], index_path=index_path, docs_path=docs_path,
+                       index_type=index_type, nlist=nlist, hnsw_m=hnsw_m,
+                       storage=storage, pq_m=pq_m, rerank_factor=rerank_factor,
+                       chunk_block_size=chunk_block_size, chunk_compress=chunk_compress,
+                       lexical=lexical, coarse_dim=coarse_dim)
     store.add(vecs, corpus)
-    store.save()
+    store.build_info = {
+        "embedding_model": emb.model,
+        "embedding_dimensions": emb.dimensions,
+        "normalized": True,
+        "chunking": chunking_info(chunker),
+    }
+    if not emb.backend.local:
+        # API 호출 수/캐시 적중률을 매니페스트에 기록 (출력은 CLI)
+        store.build_info["embedding_usage"] = emb.usage()
+        log.info("embedding usage: %s", store.build_info["embedding_usage"])
+    if dedup_stats is not None:
+        removed = dedup_stats["chunks_in"] - dedup_stats["chunks_kept"]
+        dedup_stats["vector_bytes_saved"] = int(removed * vecs.shape[1] * 4)  # float32 원본 기준
+        store.build_info["dedup"] = dedup_stats
+    if store.reranks:
+        # 압축 모드: 메모리 절감률/재현율 변화를 매니페스트에 기록 (출력은 CLI)
+        store.build_info["compression"] = store.compression_report()
+        log.info("compression: %s", store.build_info["compression"])
+    store.save()  # faiss.index + chunks.dat/idx + docs.jsonl + manifest.json (+ vectors.npy)
+    if dedup_stats is not None:
+        # 인덱스 파일의 벡터당 크기 기준 추정 (압축 저장이면 코드 크기). 통계 자체는 매니페스트 dedup
+        per_vec = os.path.getsize(index_path) / max(store.index.ntotal, 1)
+        removed = dedup_stats["chunks_in"] - dedup_stats["chunks_kept"]
+        log.info("dedup: %s, index_bytes_saved_est=%d", dedup_stats, int(removed * per_vec))
+    if centroids > 0:
+        write_centroids(index_dir, vecs, centroids)
+
+    # 6) 증분 갱신용 파일/청크 지문 저장 (중복 제거: 합쳐진 청크의 파일도 대표 행의 소유자로 기록)
+    sources = sources_from_items(chunks, rows=rows)
+    write_sources(index_dir, sources)
+    write_dedup(index_dir, sources, store.docs)
+    return index_dir
+
+
+def build_report(index_dir: str) -> Dict[str, Any]:
+    """빌드 결과 요약: 매니페스트의 통계 항목(REPORT_KEYS)만 추림 (CLI 출력용, 버전 레이아웃이면 CURRENT)"""
+    man = read_manifest(resolve_index_dir(index_dir)) or {}
+    return {k: man[k] for k in REPORT_KEYS if k in man}
+
+
+def build_federated(paths: List[str], index_dir: str, centroids: int = 8, **kwargs):
+    """
+    컬렉션(data/raw/<이름>/)별 하위 인덱스를 각각 빌드하고 collections.json 기록
+    - kwargs 는 build_index 옵션 그대로 (index_type/storage/... 는 컬렉션마다 auto 선택 가능)
+    """
+    groups = group_by_collection(paths)
+    if not groups:
+        raise ValueError("컬렉션으로 묶을 입력 파일이 없습니다. 유효한 입력 경로를 확인하세요.")
+    for name, files in groups.items():
+        build_index(files, collection_dir(index_dir, name), centroids=centroids, **kwargs)
+        log.info("[%s] %d files", name, len(files))
+    # 이전 빌드에만 있던 컬렉션은 목록에서 빠짐 (디렉토리는 남겨 두어 진행 중 질의 보호)
+    write_collections(index_dir, list(groups), centroids)
+    return index_dir
+
 
-    # 6) 문서 메타 저장(jsonl)
-    save_docs_jsonl(corpus, docs_path)
+def _in_new_version(root: str, fn, keep_versions: int = KEEP_VERSIONS):
+    """버전 레이아웃이면 현재 버전 복사본에서 fn(dir) 실행 후 발행, 아니면 root 에서 그대로 실행"""
+    if not is_versioned(root):
+        return fn(root)
+    version, staging = clone_current(root)
+    try:
+        result = fn(staging)
+    except Exception:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    publish(root, version, keep=keep_versions)
+    return result
 
 
 if __name__ == "__main__":
     ap = argparse.ArgumentParser()
-    ap.add_argument("--paths", nargs="+", required=True)
+    ap.add_argument("--paths", nargs="+", default=[])
     ap.add_argument("--index_dir", default="indices/day2")
     ap.add_argument("--model", default=None)
     ap.add_argument("--batch_size", type=int, default=128)
+    ap.add_argument("--index_type", default="auto", choices=INDEX_TYPES)
+    ap.add_argument("--nlist", type=int, default=None, help="IVF 클러스터 수 (기본: 4*sqrt(N))")
+    ap.add_argument("--hnsw_m", type=int, default=32, help="HNSW 이웃 수 M")
+    ap.add_argument("--storage", default="flat", choices=STORAGE_TYPES)
+    ap.add_argument("--pq_m", type=int, default=None, help="PQ 서브벡터 수 (dim 의 약수)")
+    ap.add_argument("--rerank_factor", type=int, default=4, help="압축 모드 후보 과다 조회 배수")
+    ap.add_argument("--chunk_block_size", type=int, default=1, help="청크 저장소 블록당 레코드 수")
+    ap.add_argument("--chunk_compress", action="store_true", help="청크 저장소 블록 zlib 압축")
+    ap.add_argument("--incremental", action="store_true", help="기존 인덱스를 변경분만 갱신 (해시 기준)")
+    ap.add_argument("--compact", action="store_true", help="tombstone 제거 후 인덱스 재구성")
+    ap.add_argument("--no_lexical", action="store_true", help="BM25 역색인 생성 생략")
+    ap.add_argument("--keep_versions", type=int, default=KEEP_VERSIONS, help="보존할 인덱스 버전 수")
+    ap.add_argument("--no_versioning", action="store_true", help="index_dir 에 직접 덮어쓰기 (구버전 레이아웃)")
+    ap.add_argument("--dimensions", type=int, default=None, help="임베딩 축소 차원 (text-embedding-3 의 dimensions)")
+    ap.add_argument("--coarse_dim", type=int, default=None,
+                    help=f"2단계 검색용 FAISS 인덱스 차원 (예: {COARSE_DIMS}), 재채점은 전체 차원")
+    ap.add_argument("--chunker", default="fixed", choices=CHUNKERS, help="청크 분할 방식")
+    ap.add_argument("--dedup", action="store_true", help="완전/근접 중복 청크 제거 (SimHash)")
+    ap.add_argument("--streaming", action="store_true", help="스트리밍 파이프라인 빌드 (메모리 상한 고정, 체크포인트)")
+    ap.add_argument("--resume", action="store_true", help="중단된 스트리밍 빌드를 체크포인트에서 재개")
+    ap.add_argument("--federated", action="store_true", help="data/raw/<컬렉션>/ 별 하위 인덱스 + 라우팅 중심 생성")
+    ap.add_argument("--centroids", type=int, default=8, help="컬렉션당 라우팅 중심 수 (--federated)")
+    ap.add_argument("--rollback", nargs="?", const="", default=None, help="CURRENT 를 이전(또는 지정) 버전으로 되돌림")
     args = ap.parse_args()
 
     os.makedirs(args.index_dir, exist_ok=True)
-    build_index(args.paths, args.index_dir, args.model, args.batch_size)
+    has_index = is_versioned(args.index_dir) or os.path.exists(os.path.join(args.index_dir, "faiss.index"))
+    if args.rollback is not None:
+        print(rollback(args.index_dir, args.rollback or None))
+    elif args.compact:
+        res = _in_new_version(args.index_dir, compact_index, args.keep_versions)
+        print(json.dumps(res, ensure_ascii=False))
+    elif args.incremental and is_federated(args.index_dir):
+        # 연합 인덱스: 기존 컬렉션별로 변경분 갱신 (새 컬렉션은 --federated 재빌드 필요)
+        known, res = set(read_collections(args.index_dir)), {}
+        for name, files in group_by_collection(args.paths).items():
+            if name not in known:
+                res[name] = "unknown collection (rebuild with --federated)"
+                continue
+            res[name] = _in_new_version(collection_dir(args.index_dir, name),
+                                        lambda d, f=files: update_index(f, d, args.model, args.batch_size),
+                                        args.keep_versions)
+        print(json.dumps(res, ensure_ascii=False))
+    elif args.incremental and has_index:
+        res = _in_new_version(args.index_dir, lambda d: update_index(args.paths, d, args.model, args.batch_size),
+                              args.keep_versions)
+        print(json.dumps(res, ensure_ascii=False))
+    elif args.federated:
+        build_federated(args.paths, args.index_dir, centroids=args.centroids, model=args.model,
+                        batch_size=args.batch_size, index_type=args.index_type, nlist=args.nlist,
+                        hnsw_m=args.hnsw_m, storage=args.storage, pq_m=args.pq_m,
+                        rerank_factor=args.rerank_factor, chunk_block_size=args.chunk_block_size,
+                        chunk_compress=args.chunk_compress, versioned=not args.no_versioning,
+                        keep_versions=args.keep_versions, lexical=not args.no_lexical,
+                        dimensions=args.dimensions, coarse_dim=args.coarse_dim,
+                        streaming=args.streaming or args.resume, resume=args.resume, chunker=args.chunker,
+                        dedup=args.dedup)
+        print(json.dumps({name: build_report(collection_dir(args.index_dir, name))
+                          for name in read_collections(args.index_dir)}, ensure_ascii=False))
+    else:
+        out = build_index(args.paths, args.index_dir, args.model, args.batch_size,
+                          index_type=args.index_type, nlist=args.nlist, hnsw_m=args.hnsw_m,
+                          storage=args.storage, pq_m=args.pq_m, rerank_factor=args.rerank_factor,
+                          chunk_block_size=args.chunk_block_size, chunk_compress=args.chunk_compress,
+                          versioned=not args.no_versioning, keep_versions=args.keep_versions,
+                          lexical=not args.no_lexical, dimensions=args.dimensions, coarse_dim=args.coarse_dim,
+                          streaming=args.streaming or args.resume, resume=args.resume, chunker=args.chunker,
+                          dedup=args.dedup)
+        print(json.dumps(build_report(out), ensure_ascii=False))
  
\ No newline at end of file
@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+"""
+청크 방식 비교 벤치마크: fixed(글자 창 + 겹침) vs structured(문단/문장 경계 + 토큰 예산)
+- 문서는 한 번만 로드 → 방식별로 청크 수, 임베딩 글자/토큰 수, 겹침 비율, 청크 시간, 검색 품질 측정
+- 검색 품질: 문서에서 뽑은 문장을 질의로 사용. 정답 = 그 문장의 가운데 절반을 포함하는 청크
+  (청크 경계와 무관한 정답이라 방식 간 비교 가능). 정확 내적 검색 top-k 의 hit@k / MRR
+- 기본 임베더는 오프라인 로컬 백엔드 → 네트워크 없이 재현 가능 (--model 로 API 모델 지정)
+
+예) python -m student.day2.impl.chunkbench --paths data/raw --k 5 --out chunkbench.json
+"""
+
+from __future__ import annotations
+import re, json, time, argparse
+from typing import List, Dict, Any
+
+import numpy as np
+
+from .ingest import load_documents, chunk_document, chunking_info, count_tokens, split_sentences, CHUNKERS
+from .embeddings import Embeddings
+from .local_embed import LOCAL_PREFIX
+from .bench import exact_topk, _git_commit
+
+_WS = re.compile(r"\s+")
+
+
+def _norm(s: str) -> str:
+    return _WS.sub(" ", s).strip()
+
+
+def sample_queries(docs: List[Dict[str, Any]], n: int, seed: int = 0,
+                   min_len: int = 40, max_len: int = 300) -> List[Dict[str, str]]:
+    """문서 문장 중 길이 조건을 만족하는 것을 무작위 추출 → [{"path", "text", "core"}]"""
+    cands = []
+    for d in docs:
+        for s in split_sentences(d["text"]):
+            s = _norm(s)
+            if min_len <= len(s) <= max_len:
+                cands.append((d["path"], s))
+    rng = np.random.default_rng(seed)
+    pick = rng.choice(len(cands), min(n, len(cands)), replace=False) if cands else []
+    out = []
+    for i in pick:
+        path, s = cands[int(i)]
+        out.append({"path": path, "text": s, "core": s[len(s) // 4: 3 * len(s) // 4]})
+    return out
+
+
+def bench_chunker(docs: List[Dict[str, Any]], chunker: str, emb: Embeddings,
+                  queries: List[Dict[str, str]], Q: np.ndarray, k: int) -> Dict[str, Any]:
+    t0 = time.perf_counter()
+    chunks = [(d["path"], ch) for d in docs for ch in chunk_document(d["text"], chunker)]
+    chunk_s = time.perf_counter() - t0
+    if not chunks:
+        return {"chunker": chunker, "chunks": 0}
+    texts = [ch for _, ch in chunks]
+    doc_chars = sum(len(d["text"]) for d in docs)
+    emb_chars = sum(len(t) for t in texts)
+    tokens = np.asarray([count_tokens(t) for t in texts])
+
+    t0 = time.perf_counter()
+    V = np.ascontiguousarray(emb.encode(texts), dtype="float32")
+    embed_s = time.perf_counter() - t0
+
+    kk = min(k, len(texts))
+    top = exact_topk(Q, V, kk) if len(queries) else np.zeros((0, kk), dtype="int64")
+    norm = [(p, _norm(t)) for p, t in chunks]
+    hits, rr = 0, 0.0
+    for qi, q in enumerate(queries):
+        for rank, cid in enumerate(top[qi].tolist()):
+            p, t = norm[cid]
+            if p == q["path"] and q["core"] in t:
+                hits += 1
+                rr += 1.0 / (rank + 1)
+                break
+    nq = max(len(queries), 1)
+    return {
+        "chunker": chunker,
+        "chunking": chunking_info(chunker),
+        "chunks": len(texts),
+        "embedded_chars": int(emb_chars),
+        "embedded_tokens": int(tokens.sum()),
+        "overlap_ratio": round(emb_chars / max(doc_chars, 1) - 1.0, 4),  # 원문 대비 중복 임베딩 비율
+        "tokens_p50": int(np.percentile(tokens, 50)),
+        "tokens_max": int(tokens.max()),
+        "chunk_s": round(chunk_s, 3),
+        "embed_s": round(embed_s, 3),
+        f"hit@{kk}": round(hits / nq, 4),
+        "mrr": round(rr / nq, 4),
+    }
+
+
+def run_chunkbench(paths: List[str], chunkers=CHUNKERS, k: int = 5, n_queries: int = 200,
+                   model: str | None = None, dim: int = 384, seed: int = 0) -> Dict[str, Any]:
+    docs = [d for d in load_documents(paths) if d["text"]]
+    if not docs:
+        raise ValueError("로드된 문서가 없습니다. 유효한 입력 경로를 확인하세요.")
+    emb = Embeddings(model=model or f"{LOCAL_PREFIX}-{dim}")
+    queries = sample_queries(docs, n_queries, seed)
+    Q = np.ascontiguousarray(emb.encode([q["text"] for q in queries]), dtype="float32") if queries else None
+    results = [bench_chunker(docs, c, emb, queries, Q, k) for c in chunkers]
+    base = results[0]
+    for r in results[1:]:
+        if base.get("chunks") and r.get("chunks"):
+            r["vs_" + base["chunker"]] = {
+                "chunks": round(r["chunks"] / base["chunks"] - 1.0, 4),
+                "embedded_tokens": round(r["embedded_tokens"] / base["embedded_tokens"] - 1.0, 4),
+            }
+    return {
+        "commit": _git_commit(),
+        "embedding_model": emb.model,
+        "documents": len(docs),
+        "document_chars": int(sum(len(d["text"]) for d in docs)),
+        "queries": len(queries),
+        "results": results,
+    }
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Day2 청크 방식 비교 (청크 수/임베딩 양/검색 품질, JSON 출력)")
+    ap.add_argument("--paths", nargs="+", default=["data/raw"])
+    ap.add_argument("--chunkers", nargs="+", default=list(CHUNKERS), choices=CHUNKERS)
+    ap.add_argument("--k", type=int, default=5)
+    ap.add_argument("--n_queries", type=int, default=200)
+    ap.add_argument("--model", default=None, help="API 임베딩 모델 (기본: 오프라인 로컬 임베더)")
+    ap.add_argument("--dim", type=int, default=384, help="로컬 임베더 차원")
+    ap.add_argument("--out", default=None)
+    args = ap.parse_args()
+
+    report = run_chunkbench(args.paths, args.chunkers, k=args.k, n_queries=args.n_queries,
+                            model=args.model, dim=args.dim)
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text)
+    print(text)
@@ -0,0 +1,224 @@
+# -*- coding: utf-8 -*-
+"""
+랜덤 액세스 청크 저장소 (chunks.dat + chunks.idx)
+- docs.jsonl 전체를 파이썬 리스트로 올리지 않고, 검색 결과 k개만 id로 O(k) 조회
+- chunks.idx: 헤더 + 고정폭(uint64) 오프셋 테이블 → 블록 i 의 위치 = offsets[i]..offsets[i+1]
+- chunks.dat: 블록 연속 저장. 블록 = 레코드(JSON) block_size 개를 "\n" 으로 이은 것 (선택: zlib 압축)
+- 두 파일 모두 np.memmap 으로 열어 시작 비용/상주 메모리가 코퍼스 크기와 무관
+- 증분 갱신: 새 레코드는 뒤에 이어 쓰고(ChunkStoreWriter.reopen), 바뀐 레코드는 chunks.upd.jsonl 에 추가
+  (줄마다 [행, 레코드], 뒤의 줄이 우선) → 조회 시 덮어 읽음. 전체 재작성(write_chunkstore) 때 합쳐짐
+"""
+
+from __future__ import annotations
+import os, json, zlib, struct, threading
+from collections import OrderedDict
+from typing import List, Dict, Any, Iterable
+
+import numpy as np
+
+DATA_NAME = "chunks.dat"
+INDEX_NAME = "chunks.idx"
+UPDATES_NAME = "chunks.upd.jsonl"
+_MAGIC = b"D2CS"
+_VERSION = 1
+_HEADER = struct.Struct("<4sIIIQ")  # magic, version, block_size, compressed, count
+_HEADER_PAD = 32                    # 오프셋 테이블 8바이트 정렬용 헤더 크기
+
+
+def chunkstore_paths(index_dir: str):
+    return os.path.join(index_dir, DATA_NAME), os.path.join(index_dir, INDEX_NAME)
+
+
+def chunkstore_exists(index_dir: str) -> bool:
+    return all(os.path.exists(p) for p in chunkstore_paths(index_dir))
+
+
+def _updates_path(index_dir: str) -> str:
+    return os.path.join(index_dir, UPDATES_NAME)
+
+
+class ChunkStoreWriter:
+    """
+    순차 append 전용 writer
+    - block_size=1, compress=False: 레코드마다 오프셋 1개 (가장 빠른 조회)
+    - block_size>1, compress=True: 블록 단위 zlib 압축 (디스크/페이지 캐시 절감)
+    - 데이터/오프셋 모두 .tmp 파일에 바로 이어 씀 (메모리는 미완성 블록뿐) → close() 가 헤더 기록 후 교체
+    """
+
+    def __init__(self, index_dir: str, block_size: int = 1, compress: bool = False, level: int = 6,
+                 state: Dict[str, Any] | None = None):
+        os.makedirs(index_dir, exist_ok=True)
+        self.data_path, self.index_path = chunkstore_paths(index_dir)
+        self.block_size = max(1, int(block_size))
+        self.compress = bool(compress)
+        self.level = level
+        self._pending: List[bytes] = []
+        if state is None:
+            self.count, self.blocks, self._end = 0, 0, 0
+            self._data = open(self.data_path + ".tmp", "wb")
+            self._index = open(self.index_path + ".tmp", "wb")
+            self._index.write(b"\0" * _HEADER_PAD + struct.pack("<Q", 0))  # 헤더 자리 + 첫 오프셋
+        else:
+            # checkpoint() 상태 {"count", "blocks"} 에서 이어 쓰기: 기록 완료된 블록 뒤는 잘라냄
+            self.count, self.blocks = int(state["count"]), int(state["blocks"])
+            self._index = open(self.index_path + ".tmp", "r+b")
+            self._index.seek(_HEADER_PAD + 8 * self.blocks)
+            self._end = struct.unpack("<Q", self._index.read(8))[0]
+            self._index.truncate(_HEADER_PAD + 8 * (self.blocks + 1))
+            self._index.seek(0, os.SEEK_END)
+            self._data = open(self.data_path + ".tmp", "r+b")
+            self._data.truncate(self._end)
+            self._data.seek(self._end)
+
+    @classmethod
+    def reopen(cls, index_dir: str) -> "ChunkStoreWriter":
+        """기존 저장소 뒤에 이어 쓰기 (증분 갱신). 덜 찬 마지막 블록은 다시 씀, close() 가 파일 교체"""
+        store = ChunkStore(index_dir, cache_size=1)
+        block_size, compress = store.block_size, store.compressed
+        full = store.count - store.count % block_size
+        tail = [store.get(i) for i in range(full, store.count)]
+        del store
+        for path in chunkstore_paths(index_dir):
+            os.replace(path, path + ".tmp")
+        w = cls(index_dir, block_size, compress, state={"count": full, "blocks": full // block_size})
+        w.extend(tail)
+        return w
+
+    def append(self, item: Dict[str, Any]):
+        self._pending.append(json.dumps(item, ensure_ascii=False).encode("utf-8"))
+        self.count += 1
+        if len(self._pending) >= self.block_size:
+            self._flush_block()
+
+    def extend(self, items: Iterable[Dict[str, Any]]):
+        for it in items:
+            self.append(it)
+
+    def _flush_block(self):
+        if not self._pending:
+            return
+        raw = b"\n".join(self._pending)
+        if self.compress:
+            raw = zlib.compress(raw, self.level)
+        self._data.write(raw)
+        self._end += len(raw)
+        self._index.write(struct.pack("<Q", self._end))
+        self.blocks += 1
+        self._pending = []
+
+    def checkpoint(self) -> Dict[str, Any] | None:
+        """이어 쓰기용 상태 {"count", "blocks"} (고정 크기). 블록 경계에서만 가능 (미완성 블록이 있으면 None)"""
+        if self._pending:
+            return None
+        self._data.flush()
+        self._index.flush()
+        return {"count": self.count, "blocks": self.blocks}
+
+    def close(self):
+        self._flush_block()
+        self._data.close()
+        self._index.seek(0)
+        self._index.write(_HEADER.pack(_MAGIC, _VERSION, self.block_size, int(self.compress), self.count))
+        self._index.close()
+        # 데이터 → 인덱스 순으로 교체 (인덱스가 항상 완성된 데이터 파일을 가리키도록)
+        os.replace(self.data_path + ".tmp", self.data_path)
+        os.replace(self.index_path + ".tmp", self.index_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def write_chunkstore(index_dir: str, items: Iterable[Dict[str, Any]],
+                     block_size: int = 1, compress: bool = False) -> int:
+    with ChunkStoreWriter(index_dir, block_size=block_size, compress=compress) as w:
+        w.extend(items)
+    if os.path.exists(_updates_path(index_dir)):
+        os.remove(_updates_path(index_dir))  # 바뀐 레코드가 본 저장소에 합쳐짐
+    return w.count
+
+
+def write_chunk_updates(index_dir: str, updates: Dict[int, Dict[str, Any]]):
+    """바뀐 레코드(행 → 레코드)를 chunks.upd.jsonl 뒤에 추가 (본 저장소는 그대로)"""
+    if not updates:
+        return
+    with open(_updates_path(index_dir), "a", encoding="utf-8") as f:
+        for row, item in sorted(updates.items()):
+            f.write(json.dumps([int(row), item], ensure_ascii=False) + "\n")
+
+
+class ChunkStore:
+    """
+    읽기 전용 청크 저장소 (리스트처럼 store[i], len(store) 지원)
+    - 최근 조회한 블록은 LRU 캐시에 보관 (스레드 안전)
+    """
+
+    def __init__(self, index_dir: str, cache_size: int = 1024):
+        self.data_path, self.index_path = chunkstore_paths(index_dir)
+        with open(self.index_path, "rb") as f:
+            magic, version, block_size, compressed, count = _HEADER.unpack(f.read(_HEADER.size))
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError(f"청크 저장소 형식이 올바르지 않습니다: {self.index_path}")
+        self.block_size = block_size
+        self.compressed = bool(compressed)
+        self.count = count
+        self._offsets = np.memmap(self.index_path, dtype="<u8", mode="r", offset=_HEADER_PAD)
+        size = os.path.getsize(self.data_path)
+        self._data = np.memmap(self.data_path, dtype="u1", mode="r") if size else np.zeros(0, "u1")
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[int, List[bytes]]" = OrderedDict()
+        self._lock = threading.Lock()
+        # 증분 갱신으로 바뀐 레코드: 행 → 원본 줄 (바뀐 레코드 수만큼만 메모리 사용)
+        self._updates: Dict[int, bytes] = {}
+        upd = _updates_path(index_dir)
+        if os.path.exists(upd):
+            with open(upd, "rb") as f:
+                for line in f:
+                    self._updates[int(line[1:line.index(b",")])] = line
+
+    @property
+    def updated_count(self) -> int:
+        """chunks.upd.jsonl 로 덮어 읽는 레코드 수"""
+        return len(self._updates)
+
+    def __len__(self) -> int:
+        return self.count
+
+    def _block(self, b: int) -> List[bytes]:
+        with self._lock:
+            hit = self._cache.get(b)
+            if hit is not None:
+                self._cache.move_to_end(b)
+                return hit
+        start, end = int(self._offsets[b]), int(self._offsets[b + 1])
+        raw = self._data[start:end].tobytes()
+        if self.compressed:
+            raw = zlib.decompress(raw)
+        recs = raw.split(b"\n") if self.block_size > 1 else [raw]
+        with self._lock:
+            self._cache[b] = recs
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return recs
+
+    def get(self, i: int) -> Dict[str, Any]:
+        i = int(i)
+        if i < 0:
+            i += self.count
+        if not 0 <= i < self.count:
+            raise IndexError(i)
+        upd = self._updates.get(i)
+        if upd is not None:
+            return json.loads(upd)[1]
+        return json.loads(self._block(i // self.block_size)[i % self.block_size])
+
+    __getitem__ = get
+
+    def get_many(self, ids: Iterable[int]) -> List[Dict[str, Any]]:
+        return [self.get(i) for i in ids]
+
+    def __iter__(self):
+        for i in range(self.count):
+            yield self.get(i)
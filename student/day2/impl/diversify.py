@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""
+검색 후처리: 결과 다양화
+- MMR(Maximal Marginal Relevance): 관련도는 높고 이미 고른 청크와는 덜 비슷한 후보를 순서대로 선택
+  (코사인 dup_threshold 이상인 거의-중복 후보는 아예 제외)
+- 인접 청크 병합: 같은 meta.path 의 연속 청크(chunk i, i+1)를 겹침(overlap)을 제거하고 하나로 합침
+  (겹침 길이는 매니페스트의 chunk_overlap, 모르면 MIN_OVERLAP 자 이상 일치할 때만 → 우연한 짧은 일치는 보존)
+→ 작은 top_k 로도 서로 다른 근거를 돌려주고 _draft_answer 의 max_context 예산 낭비를 줄임
+"""
+
+from __future__ import annotations
+from typing import List, Dict, Any
+
+import numpy as np
+
+MIN_OVERLAP = 20  # 겹침 길이를 모를 때(structured 청크 등) 제거할 최소 일치 길이 (문장 끝 "다." 같은 우연한 일치 방지)
+
+
+def mmr_select(query_vec: np.ndarray, cand_vecs: np.ndarray, cand_scores: np.ndarray, k: int,
+               lam: float = 0.7, dup_threshold: float = 0.95) -> np.ndarray:
+    """
+    후보 (m, d) 중 k 개의 위치(index) 반환 (선택 순서)
+    - score = lam * 관련도 - (1 - lam) * max(이미 선택된 것과의 코사인)
+    """
+    m = cand_vecs.shape[0]
+    if m == 0 or k <= 0:
+        return np.zeros(0, dtype="int64")
+    rel = np.asarray(cand_scores, dtype="float32")
+    sim = cand_vecs @ cand_vecs.T  # 후보 수(수십 개) 규모라 전체 계산
+    max_sim = np.full(m, -np.inf, dtype="float32")
+    alive = np.ones(m, dtype=bool)
+    chosen: List[int] = []
+    while len(chosen) < k and alive.any():
+        penalty = np.where(np.isfinite(max_sim), max_sim, 0.0)
+        mmr = np.where(alive, lam * rel - (1.0 - lam) * penalty, -np.inf)
+        j = int(np.argmax(mmr))
+        chosen.append(j)
+        alive[j] = False
+        max_sim = np.maximum(max_sim, sim[j])
+        alive &= sim[j] < dup_threshold  # 거의 같은 청크 제거
+    return np.asarray(chosen, dtype="int64")
+
+
+def _overlap_len(a: str, b: str, max_check: int, overlap: int | None = None, min_len: int = MIN_OVERLAP) -> int:
+    """
+    a 의 접미사 == b 의 접두사 인 겹침 길이
+    - overlap: 청크 분할의 겹침 글자 수(고정 창). 그 길이가 정확히 일치할 때만 제거
+    - None: min_len 이상인 최대 일치 길이 (없으면 0)
+    """
+    if overlap is not None:
+        n = min(overlap, len(b))
+        return n if n > 0 and a.endswith(b[:n]) else 0
+    for n in range(min(len(a), len(b), max_check), min_len - 1, -1):
+        if a.endswith(b[:n]):
+            return n
+    return 0
+
+
+def merge_adjacent(contexts: List[Dict[str, Any]], max_overlap: int = 400,
+                   overlap: int | None = None) -> List[Dict[str, Any]]:
+    """
+    같은 path 의 연속 청크를 병합. 병합 결과의 순서/점수는 구성 청크 중 최고 순위를 따름
+    - meta["chunks"] 에 병합된 청크 번호 목록 기록
+    - overlap: 인덱스의 청크 겹침 글자 수 (chunk_overlap_of(매니페스트)), None 이면 MIN_OVERLAP 이상 일치만 제거
+    """
+    groups: Dict[str, List[int]] = {}
+    for pos, c in enumerate(contexts):
+        path = c.get("meta", {}).get("path")
+        if path is not None and isinstance(c.get("meta", {}).get("chunk"), int):
+            groups.setdefault(path, []).append(pos)
+
+    absorbed = set()
+    merged: Dict[int, Dict[str, Any]] = {}
+    for positions in groups.values():
+        positions.sort(key=lambda p: contexts[p]["meta"]["chunk"])
+        run = [positions[0]]
+        for p in positions[1:] + [None]:
+            if p is not None and contexts[p]["meta"]["chunk"] == contexts[run[-1]]["meta"]["chunk"] + 1:
+                run.append(p)
+                continue
+            if len(run) > 1:
+                text = contexts[run[0]]["chunk"]
+                for q in run[1:]:
+                    nxt = contexts[q]["chunk"]
+                    text += nxt[_overlap_len(text, nxt, max_overlap, overlap):]
+                head = min(run)  # 가장 높은 순위 위치에 병합 결과 배치
+                first = contexts[run[0]]
+                merged[head] = {
+                    **first,
+                    "chunk": text,
+                    "score": max(float(contexts[q]["score"]) for q in run),
+                    "meta": {**first.get("meta", {}),
+                             "chunks": [contexts[q]["meta"]["chunk"] for q in run]},
+                }
+                absorbed.update(q for q in run if q != head)
+            run = [p] if p is not None else []
+    return [merged.get(pos, c) for pos, c in enumerate(contexts) if pos not in absorbed]
+
+
+def chunk_overlap_of(manifest: Dict[str, Any] | None) -> int | None:
+    """매니페스트 → 연속 청크의 겹침 글자 수 (고정 창 청크만 알 수 있음, 그 외 None)"""
+    chunking = (manifest or {}).get("chunking") or {}
+    if chunking.get("chunker", "fixed") != "fixed" or "chunk_overlap" not in chunking:
+        return None
+    return int(chunking["chunk_overlap"])
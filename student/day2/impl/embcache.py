@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+"""
+내용 주소 기반 임베딩 캐시 (디스크, sqlite3)
+- 키: sha1(model \\0 dims \\0 정규화 텍스트)  (정규화: NFC + 공백 압축)
+- 값: float16(기본) 또는 float32 벡터 바이트 → 1536차원 기준 3KB/6KB
+- 배치 단위 조회/삽입(get_many/put_many), 용량 상한 초과 시 LRU(last_used) 순 삭제, 적중률 통계
+- 여러 프로세스에서 같은 파일을 써도 됨 (WAL, 쓰기는 sqlite 잠금으로 직렬화)
+"""
+
+from __future__ import annotations
+import os, time, sqlite3, hashlib, threading, unicodedata
+from typing import Dict, List, Tuple, Iterable
+
+import numpy as np
+
+EMB_CACHE_PATH = os.getenv("DAY2_EMB_CACHE", os.path.join(".cache", "day2_embeddings.sqlite"))
+EMB_CACHE_MAX_BYTES = int(os.getenv("DAY2_EMB_CACHE_MAX_BYTES", 2 * 1024 ** 3))
+_SQL_VARS = 900  # sqlite 바인딩 변수 한도(999) 이하로 IN 절 분할
+_RESYNC_EVERY = 256  # put_many N 회마다 누적 바이트를 실제 합계로 보정 (다른 프로세스의 삽입 반영)
+
+
+def normalize_text(text: str) -> str:
+    return " ".join(unicodedata.normalize("NFC", text or "").split())
+
+
+def cache_key(model: str, dims: int | None, text: str) -> bytes:
+    return hashlib.sha1(f"{model}\0{dims or ''}\0{normalize_text(text)}".encode("utf-8")).digest()
+
+
+class EmbeddingCache:
+    def __init__(self, path: str = EMB_CACHE_PATH, max_bytes: int = EMB_CACHE_MAX_BYTES, dtype: str = "float16"):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.dtype = np.dtype(dtype)
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS emb (key BLOB PRIMARY KEY, dtype TEXT, vec BLOB, last_used REAL)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS emb_lru ON emb(last_used)")
+        self._lock = threading.Lock()
+        # 저장 바이트 누적값 (열 때 1회 합산, 삽입/삭제 시 갱신) → put 마다 전체 테이블을 합산하지 않음
+        self._bytes = self._total_bytes()
+        self._puts = 0
+        self.hits = 0
+        self.misses = 0
+
+    # ---------- 조회/삽입 ----------
+    def get_many(self, keys: Iterable[bytes]) -> Dict[bytes, np.ndarray]:
+        """키 목록 → {키: float32 벡터} (없는 키는 빠짐). 적중 항목의 last_used 갱신"""
+        keys = list(dict.fromkeys(keys))
+        found: Dict[bytes, np.ndarray] = {}
+        now = time.time()
+        with self._lock:
+            for s in range(0, len(keys), _SQL_VARS):
+                part = keys[s:s + _SQL_VARS]
+                q = f"SELECT key, dtype, vec FROM emb WHERE key IN ({','.join('?' * len(part))})"
+                for k, dt, blob in self._conn.execute(q, part):
+                    v = np.frombuffer(blob, dtype=dt).astype("float32")
+                    found[bytes(k)] = v / (np.linalg.norm(v) + 1e-12)  # float16 반올림 후 재정규화
+            if found:
+                self._conn.executemany("UPDATE emb SET last_used=? WHERE key=?", [(now, k) for k in found])
+        self.hits += len(found)
+        self.misses += len(keys) - len(found)
+        return found
+
+    def put_many(self, items: List[Tuple[bytes, np.ndarray]]):
+        if not items:
+            return
+        now = time.time()
+        rows = [(k, self.dtype.str, np.asarray(v, dtype=self.dtype).tobytes(), now) for k, v in items]
+        with self._lock:
+            self._conn.execute("BEGIN")
+            self._conn.executemany("INSERT OR REPLACE INTO emb VALUES (?, ?, ?, ?)", rows)
+            self._conn.execute("COMMIT")
+            self._bytes += sum(len(r[2]) for r in rows)  # REPLACE 된 행은 과대 계산 → 삭제 전 재합산
+            self._puts += 1
+            if self._puts % _RESYNC_EVERY == 0:
+                self._bytes = self._total_bytes()
+            if self._bytes > self.max_bytes:
+                self._evict()
+
+    def _total_bytes(self) -> int:
+        return self._conn.execute("SELECT COALESCE(SUM(LENGTH(vec)), 0) FROM emb").fetchone()[0]
+
+    def _evict(self):
+        """용량 상한 초과분을 오래 안 쓴 항목부터 삭제 (상한의 90% 까지)"""
+        total = self._bytes = self._total_bytes()
+        if total <= self.max_bytes:
+            return
+        excess = total - int(self.max_bytes * 0.9)
+        drop, freed = [], 0
+        for k, n in self._conn.execute("SELECT key, LENGTH(vec) FROM emb ORDER BY last_used"):
+            drop.append((k,))
+            freed += n
+            if freed >= excess:
+                break
+        self._conn.executemany("DELETE FROM emb WHERE key=?", drop)
+        self._bytes -= freed
+
+    # ---------- 통계 ----------
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            n, size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(LENGTH(vec)), 0) FROM emb").fetchone()
+        total = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+                "entries": n, "bytes": size}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -2,62 +2,249 @@
 """
 OpenAI 임베딩 래퍼
 - 요구사항: 배치 인코딩, 재시도(backoff), L2 정규화
+- 요청 1회에 여러 입력을 보냄: 토큰 수 기준으로 요청 한도까지 묶고(packing), 입력당 한도 초과분은 잘라냄
+- 실패한 배치는 재시도 후 반으로 나눠 다시 시도 (빌드 전체를 중단하지 않음), 결과는 입력 순서 유지
+- 디스크 캐시(embcache, 선택): 이미 임베딩한 텍스트는 API 를 호출하지 않음 (캐시 미스만 요청)
+  빌드/증분 갱신만 EMB_CACHE_PATH 를 넘겨 사용, 질의 경로는 기본값(캐시 없음)
+- 동시 요청: 여러 배치를 스레드 풀로 동시에 보냄. RPM/TPM 토큰 버킷으로 속도 제한,
+  429 는 Retry-After 만큼 전체 대기 + 동시성 절반으로 축소 (성공이 이어지면 다시 증가)
+- 백엔드 교체 가능: model 이 "local-hash-<dim>" 이면 오프라인 로컬 백엔드(local_embed), 그 외는 OpenAI
+- dimensions: 축소 차원 (text-embedding-3 계열은 API 의 dimensions 인자, 그 외는 앞부분 절단 + 재정규화)
 """
 
-import os, time
-from typing import List
+import os, time, random, threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any
 import numpy as np
 # from httpx import ReadTimeout  # 선택: 재시도 구분용
-# from openai import OpenAI
+
+from .embcache import EmbeddingCache, cache_key
+from .ratelimit import RateLimiter, AdaptiveConcurrency, retry_after_seconds
+from .manifest import KNOWN_DIMS
+from .local_embed import HashEmbeddings, local_dim
+from .tokens import get_encoder, estimate_tokens
+
+# 임베딩 API 한도 (입력당 토큰 / 요청당 토큰 합 / 요청당 입력 수)
+MAX_INPUT_TOKENS = 8191
+MAX_REQUEST_TOKENS = 300_000
+MAX_REQUEST_INPUTS = 2048
+# 계정 한도 (환경변수로 조정)
+EMB_RPM = float(os.getenv("DAY2_EMB_RPM", 3000))
+EMB_TPM = float(os.getenv("DAY2_EMB_TPM", 1_000_000))
+MAX_THROTTLES = 8  # 배치 하나가 429 를 이만큼 연속으로 받으면 포기
+
+
+class OpenAIBackend:
+    """
+    백엔드 인터페이스: model, dim, local, embed(texts) → (n, D) float32 L2 정규화
+    - OpenAI 임베딩 API (openai 패키지는 이 백엔드를 쓸 때만 필요)
+    """
+
+    local = False
+
+    def __init__(self, model: str, dimensions: int | None = None):
+        from openai import OpenAI
+        self.model = model
+        # API 축소 차원은 text-embedding-3 계열만 지원
+        self.dimensions = dimensions if dimensions and model.startswith("text-embedding-3") else None
+        self.dim = self.dimensions or KNOWN_DIMS.get(model, 1536)
+        # 재시도/backoff 는 Embeddings 가 속도 제한과 함께 직접 수행 → SDK 자체 재시도는 끔 (중복 재시도 방지)
+        self.client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"), max_retries=0)
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        extra = {"dimensions": self.dimensions} if self.dimensions else {}
+        resp = self.client.embeddings.create(model=self.model, input=texts, **extra)
+        data = sorted(resp.data, key=lambda d: d.index)  # 응답 index 기준 정렬
+        vecs = np.asarray([d.embedding for d in data], dtype="float32")
+        vecs /= np.linalg.norm(vecs, axis=1, keepdims=True) + 1e-12
+        return vecs
+
+
+def make_backend(model: str, dimensions: int | None = None):
+    """모델 이름 → 임베딩 백엔드"""
+    dim = local_dim(model)
+    if dim is not None:
+        return HashEmbeddings(dim=dim, model=model)
+    return OpenAIBackend(model, dimensions)
 
 
 class Embeddings:
-    def __init__(self, model: str | None = None, batch_size: int = 128, max_retries: int = 4):
+    def __init__(self, model: str | None = None, batch_size: int = 128, max_retries: int = 4,
+                 max_request_tokens: int = MAX_REQUEST_TOKENS, cache_path: str | None = None,
+                 max_concurrency: int = 4, rpm: float = EMB_RPM, tpm: float = EMB_TPM,
+                 dimensions: int | None = None):
         """
         - self.model 기본값: "text-embedding-3-small" 권장
         - self.batch_size, self.max_retries 저장
         - OpenAI 클라이언트 생성 (키는 환경변수 OPENAI_API_KEY)
+        - max_request_tokens: 요청 1회에 담을 토큰 합 상한
+        - cache_path: 임베딩 디스크 캐시 경로 (기본 None = 캐시 사용 안 함, 빌드는 embcache.EMB_CACHE_PATH)
+        - max_concurrency: 동시에 보낼 요청 수 상한 / rpm, tpm: 분당 요청·토큰 한도
+        - 로컬 백엔드는 캐시/속도 제한/토큰 묶음 없이 바로 계산
+        - dimensions: 출력 차원 축소 (None = 모델 기본 차원). 인덱스 매니페스트의 embedding_dimensions 와 일치해야 함
         """
-        # ----------------------------------------------------------------------------
-        # TODO[DAY2-E-01] 구현 지침
-        #  - self.model = model or "text-embedding-3-small"
-        #  - self.batch_size = batch_size; self.max_retries = max_retries
-        #  - key = os.getenv("OPENAI_API_KEY"); self.client = OpenAI(api_key=key)
-        # ----------------------------------------------------------------------------
-        raise NotImplementedError("TODO[DAY2-E-01]: Embeddings.__init__ 구성")
+        self.model = model or "text-embedding-3-small"
+        self.batch_size = min(batch_size, MAX_REQUEST_INPUTS)
+        self.max_retries = max_retries
+        self.max_request_tokens = max_request_tokens
+        self.backend = make_backend(self.model, dimensions)
+        self.dimensions = dimensions or None
+        # 백엔드가 축소 차원을 직접 내지 못하면 앞부분 절단 (Matryoshka)
+        self._truncate = self.dimensions if self.dimensions and self.dimensions < self.backend.dim else None
+        self.client = getattr(self.backend, "client", None)
+        # 로컬 백엔드는 토큰 수가 필요 없음 (BPE 다운로드 회피)
+        self._enc = get_encoder(self.model) if not self.backend.local else None
+        self.requests = 0  # 실제 API 호출 수 (통계, 동시 요청 스레드가 갱신 → _stat_lock)
+        self._stat_lock = threading.Lock()
+        self.cache = EmbeddingCache(cache_path) if cache_path and not self.backend.local else None
+        self.max_concurrency = max(1, max_concurrency)
+        self.limiter = RateLimiter(rpm, tpm)
+        self.concurrency = AdaptiveConcurrency(self.max_concurrency)
+
+    def usage(self) -> Dict[str, Any]:
+        """API 호출 수 + 캐시 적중 통계 (빌드 보고용, 매니페스트 embedding_usage)"""
+        return {"api_requests": self.requests, "embedding_cache": self.cache.stats() if self.cache else None}
+
+    @property
+    def dim(self) -> int:
+        return self.dimensions or self.backend.dim
+
+    def _fit(self, vecs: np.ndarray) -> np.ndarray:
+        """백엔드가 축소 차원을 직접 지원하지 않으면 앞부분 절단 + 재정규화 (Matryoshka)"""
+        if self._truncate is None or vecs.shape[1] == self._truncate:
+            return vecs
+        vecs = np.ascontiguousarray(vecs[:, :self._truncate])
+        vecs /= np.linalg.norm(vecs, axis=1, keepdims=True) + 1e-12
+        return vecs
+
+    # ---------- 토큰 ----------
+    def count_tokens(self, text: str) -> int:
+        if self._enc is not None:
+            return len(self._enc.encode(text, disallowed_special=()))
+        return estimate_tokens(text)
+
+    def _prepare(self, text: str, max_tokens: int = MAX_INPUT_TOKENS):
+        """입력당 토큰 한도를 넘는 텍스트를 토큰 경계에서 자름 → (텍스트, 토큰 수). 빈 문자열은 API 가 거부 → 공백 1칸"""
+        text = text if text and text.strip() else " "
+        if self._enc is not None:
+            toks = self._enc.encode(text, disallowed_special=())
+            if len(toks) > max_tokens:
+                return self._enc.decode(toks[:max_tokens]), max_tokens
+            return text, len(toks)
+        n = self.count_tokens(text)
+        while n > max_tokens:
+            text = text[: int(len(text) * max_tokens / n) - 1]
+            n = self.count_tokens(text)
+        return text, n
+
+    def truncate(self, text: str, max_tokens: int = MAX_INPUT_TOKENS) -> str:
+        return self._prepare(text, max_tokens)[0]
+
+    def _pack(self, tokens: List[int]) -> List[List[int]]:
+        """입력 위치 목록을 (개수 ≤ batch_size, 토큰 합 ≤ max_request_tokens) 배치로 순서대로 묶음"""
+        batches, cur, cur_tok = [], [], 0
+        for i, n in enumerate(tokens):
+            if cur and (len(cur) >= self.batch_size or cur_tok + n > self.max_request_tokens):
+                batches.append(cur)
+                cur, cur_tok = [], 0
+            cur.append(i)
+            cur_tok += n
+        if cur:
+            batches.append(cur)
+        return batches
+
+    # ---------- API 호출 ----------
+    def _embed_batch(self, texts: List[str]) -> np.ndarray:
+        """요청 1회로 여러 입력 임베딩 → (n, D) float32, L2 정규화 (응답 index 기준 정렬)"""
+        vecs = self._fit(self.backend.embed(texts))
+        with self._stat_lock:
+            self.requests += 1
+        return vecs
 
     def _embed_once(self, text: str) -> np.ndarray:
         """
         단일 텍스트 임베딩 호출 → np.ndarray(float32) + L2 정규화
         - 예외 발생 시 상위 encode에서 재시도하도록 예외를 그대로 올려보냄
         """
-        # ----------------------------------------------------------------------------
-        # TODO[DAY2-E-02] 구현 지침
-        #  - resp = self.client.embeddings.create(model=self.model, input=text)
-        #  - vec = np.array(resp.data[0].embedding, dtype="float32")
-        #  - norm = np.linalg.norm(vec) + 1e-12; vec = vec / norm
-        #  - return vec
-        # ----------------------------------------------------------------------------
-        raise NotImplementedError("TODO[DAY2-E-02]: 단일 임베딩 호출")
+        return self._embed_batch([self.truncate(text)])[0]
+
+    def _embed_retry(self, texts: List[str], tokens: List[int]) -> np.ndarray:
+        """
+        재시도(backoff) 후에도 실패하면 반으로 나눠 각각 재시도 (입력 1개까지 실패하면 예외)
+        - 400(잘못된 요청: 토큰 한도 추정 오차 등)은 같은 배치 재시도가 무의미 → 바로 분할
+        - 429 는 분할하지 않고 Retry-After(없으면 지수 backoff) 만큼 전체 대기 후 재시도
+        """
+        attempt = throttles = 0
+        while True:
+            self.limiter.acquire(sum(tokens))
+            try:
+                with self.concurrency:
+                    vecs = self._embed_batch(texts)
+                self.concurrency.success()
+                return vecs
+            except Exception as e:
+                status = getattr(e, "status_code", None)
+                if status == 429:
+                    throttles += 1
+                    if throttles > MAX_THROTTLES:
+                        raise
+                    self.concurrency.throttle()
+                    self.limiter.pause(retry_after_seconds(e) or 0.5 * (2 ** min(throttles, 6)))
+                    continue
+                attempt += 1
+                if status == 400 or attempt >= self.max_retries:
+                    if len(texts) == 1:
+                        raise
+                    break
+                time.sleep(0.5 * (2 ** (attempt - 1)) * (0.5 + random.random()))  # 지터
+        mid = len(texts) // 2
+        return np.vstack([self._embed_retry(texts[:mid], tokens[:mid]),
+                          self._embed_retry(texts[mid:], tokens[mid:])])
 
     def encode(self, texts: List[str]) -> np.ndarray:
         """
         배치 인코딩 + 재시도(backoff). 최종 shape = (N, D)
         - 비어 있으면 (0, D) 반환. D는 1536 등 모델 차원 (미정이면 1536 가정 가능)
         """
-        # ----------------------------------------------------------------------------
-        # TODO[DAY2-E-03] 구현 지침
-        #  - if not texts: return np.zeros((0, 1536), dtype="float32")
-        #  - out = []
-        #  - for start in range(0, len(texts), self.batch_size):
-        #       batch = texts[start:start+self.batch_size]
-        #       for each in batch:
-        #          for attempt in range(self.max_retries):
-        #             try:
-        #                out.append(self._embed_once(each)); break
-        #             except Exception as e:
-        #                time.sleep(0.5 * (2 ** attempt))
-        #                if attempt == self.max_retries - 1: raise
-        #  - return np.vstack(out)
-        # ----------------------------------------------------------------------------
-        raise NotImplementedError("TODO[DAY2-E-03]: 배치 임베딩 인코딩")
+        if not texts:
+            return np.zeros((0, self.dim), dtype="float32")
+        if self.backend.local:
+            return self._fit(self.backend.embed(list(texts)))
+        if self.cache is None:
+            return self._encode_api(texts)
+        keys = [cache_key(self.model, self.dim, t) for t in texts]
+        found = self.cache.get_many(keys)
+        # 캐시 미스 중 같은 키(정규화 후 동일 텍스트)는 한 번만 요청
+        miss_keys = list(dict.fromkeys(k for k in keys if k not in found))
+        if miss_keys:
+            first = {}
+            for t, k in zip(texts, keys):
+                first.setdefault(k, t)
+            vecs = self._encode_api([first[k] for k in miss_keys])
+            new = list(zip(miss_keys, vecs))
+            self.cache.put_many(new)
+            found.update(new)
+        return np.vstack([found[k] for k in keys]).astype("float32", copy=False)
+
+    def _encode_api(self, texts: List[str]) -> np.ndarray:
+        """토큰 기준 배치 묶음 → 요청별 임베딩 → 입력 순서대로 조립"""
+        prepared = [self._prepare(t) for t in texts]
+        safe = [t for t, _ in prepared]
+        toks = [n for _, n in prepared]
+        batches = self._pack(toks)
+
+        def run(b: List[int]) -> np.ndarray:
+            return self._embed_retry([safe[i] for i in b], [toks[i] for i in b])
+
+        if len(batches) == 1 or self.max_concurrency == 1:
+            results = map(run, batches)
+        else:
+            # 완료 순서와 무관하게 map 은 배치 순서대로 결과를 돌려줌
+            with ThreadPoolExecutor(max_workers=min(self.max_concurrency, len(batches))) as pool:
+                results = list(pool.map(run, batches))
+        out = None
+        for batch, vecs in zip(batches, results):
+            if out is None:
+                out = np.empty((len(texts), vecs.shape[1]), dtype="float32")
+            out[batch] = vecs
+        return out
@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+"""
+컬렉션별 하위 인덱스 연합(federation) + 질의 라우팅
+- 빌드: data/raw/<컬렉션>/... 의 첫 단계 하위 디렉토리 = 컬렉션 (바로 아래 파일은 "default")
+    <index_dir>/collections.json              {"collections": [...], "centroids": k}
+    <index_dir>/collections/<이름>/            일반 Day2 인덱스 (각자 버전 관리)
+        .../centroids.npy                     (k, D) 구면 k-means 중심 (라우팅 요약)
+- 검색: 질의 벡터와 각 컬렉션 중심의 최대 내적 → 상위 route_top 개 컬렉션만 병렬 검색 후 병합
+  모든 하위 인덱스가 같은 임베딩 모델/차원/정규화를 쓰므로(Router 생성 시 매니페스트로 검증)
+  질의 임베딩 1회 + 코사인 점수("score")로 바로 병합 가능
+"""
+
+from __future__ import annotations
+import os, re, json, threading
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from .ingest import collect_files
+from .versions import resolve_index_dir
+from .manifest import read_manifest
+
+COLLECTIONS_NAME = "collections.json"
+COLLECTIONS_DIR = "collections"
+CENTROIDS_NAME = "centroids.npy"
+DEFAULT_COLLECTION = "default"
+
+
+def is_federated(index_dir: str) -> bool:
+    return os.path.exists(os.path.join(index_dir, COLLECTIONS_NAME))
+
+
+def collection_dir(index_dir: str, name: str) -> str:
+    return os.path.join(index_dir, COLLECTIONS_DIR, name)
+
+
+def _safe_name(name: str) -> str:
+    return re.sub(r"[^\w.\-]+", "_", name).strip("._") or DEFAULT_COLLECTION
+
+
+def group_by_collection(paths: List[str]) -> Dict[str, List[str]]:
+    """입력 경로 → {컬렉션: 파일 목록}. 디렉토리 입력의 첫 단계 하위 디렉토리 이름이 컬렉션"""
+    groups: Dict[str, List[str]] = {}
+    for p in paths:
+        for fp in collect_files([p]):
+            rel = os.path.relpath(fp, p) if os.path.isdir(p) else os.path.basename(fp)
+            parts = rel.split(os.sep)
+            name = _safe_name(parts[0]) if len(parts) > 1 else DEFAULT_COLLECTION
+            groups.setdefault(name, []).append(fp)
+    return {k: sorted(set(v)) for k, v in sorted(groups.items())}
+
+
+def spherical_kmeans(vecs: np.ndarray, k: int, iters: int = 10, sample: int = 20000, seed: int = 0) -> np.ndarray:
+    """정규화 벡터의 k 개 중심 (코사인 기준). 표본 sample 개로 계산"""
+    rng = np.random.default_rng(seed)
+    x = np.asarray(vecs, dtype="float32")
+    if x.shape[0] > sample:
+        x = x[rng.choice(x.shape[0], sample, replace=False)]
+    k = max(1, min(k, x.shape[0]))
+    c = x[rng.choice(x.shape[0], k, replace=False)].copy()
+    for _ in range(iters):
+        assign = np.argmax(x @ c.T, axis=1)
+        for j in range(k):
+            m = x[assign == j]
+            if m.shape[0]:
+                c[j] = m.sum(axis=0)
+        c /= np.maximum(np.linalg.norm(c, axis=1, keepdims=True), 1e-12)
+    return c
+
+
+def write_centroids(index_dir: str, vecs: np.ndarray, k: int):
+    np.save(os.path.join(index_dir, CENTROIDS_NAME), spherical_kmeans(vecs, k))
+
+
+def write_collections(index_dir: str, names: List[str], k: int):
+    os.makedirs(index_dir, exist_ok=True)
+    tmp = os.path.join(index_dir, COLLECTIONS_NAME + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"collections": list(names), "centroids": k}, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, os.path.join(index_dir, COLLECTIONS_NAME))
+
+
+def read_collections(index_dir: str) -> List[str]:
+    with open(os.path.join(index_dir, COLLECTIONS_NAME), "r", encoding="utf-8") as f:
+        return list(json.load(f)["collections"])
+
+
+class Router:
+    """컬렉션 중심 행렬 보관 + 질의 라우팅 (하위 인덱스 버전이 바뀌면 해당 중심만 다시 읽음)"""
+
+    def __init__(self, index_dir: str):
+        self.index_dir = index_dir
+        self.names = read_collections(index_dir)
+        self._cent: Dict[str, tuple] = {}  # 이름 → (해석된 디렉토리, 중심 행렬)
+        self.embedding = self._check_embedding()
+
+    def _check_embedding(self) -> Tuple[str | None, int | None]:
+        """
+        컬렉션 매니페스트의 (embedding_model, embedding_dimensions) 가 모두 같은지 검증 (다르면 ValueError)
+        - 질의 벡터 하나로 모든 컬렉션을 검색하고 점수를 병합하므로 필수 (매니페스트가 없는 구버전 컬렉션은 건너뜀)
+        """
+        seen: Dict[Tuple, List[str]] = {}
+        for n in self.names:
+            man = read_manifest(resolve_index_dir(collection_dir(self.index_dir, n)))
+            if man is not None:
+                seen.setdefault((man.get("embedding_model"), man.get("embedding_dimensions")), []).append(n)
+        if len(seen) > 1:
+            detail = ", ".join(f"{m}/{d or 'default'}: {names}" for (m, d), names in seen.items())
+            raise ValueError(f"연합 인덱스의 컬렉션마다 임베딩 모델/차원이 다릅니다 ({detail}). 같은 모델로 재빌드하세요.")
+        return next(iter(seen), (None, None))
+
+    def centroids(self, name: str) -> np.ndarray:
+        resolved = resolve_index_dir(collection_dir(self.index_dir, name))
+        cached = self._cent.get(name)
+        if cached is None or cached[0] != resolved:
+            path = os.path.join(resolved, CENTROIDS_NAME)
+            c = np.load(path) if os.path.exists(path) else None
+            cached = self._cent[name] = (resolved, c)
+        return cached[1]
+
+    def route(self, qv: np.ndarray, top: int) -> List[str]:
+        """질의와 가장 가까운 top 개 컬렉션 (0 이하 = 전체). 중심이 없는 컬렉션은 항상 포함"""
+        if top <= 0 or top >= len(self.names):
+            return list(self.names)
+        qv = np.asarray(qv, dtype="float32")
+        scored, always = [], []
+        for n in self.names:
+            c = self.centroids(n)
+            if c is None or c.size == 0:
+                always.append(n)
+            else:
+                scored.append((float(np.max(c @ qv)), n))
+        scored.sort(key=lambda x: -x[0])
+        return always + [n for _, n in scored[:max(top - len(always), 0)]]
+
+
+_ROUTERS: Dict[str, Tuple[int, Router]] = {}  # 연합 루트 → (collections.json mtime, 라우터). 루트당 1개
+_ROUTERS_LOCK = threading.Lock()
+
+
+def get_router(index_dir: str) -> Router:
+    """collections.json 이 다시 쓰이면(재빌드) 새 라우터로 교체 (이전 라우터는 버림)"""
+    root = os.path.abspath(index_dir)
+    mtime = os.stat(os.path.join(root, COLLECTIONS_NAME)).st_mtime_ns
+    cached = _ROUTERS.get(root)
+    if cached is None or cached[0] != mtime:
+        with _ROUTERS_LOCK:
+            cached = _ROUTERS.get(root)
+            if cached is None or cached[0] != mtime:
+                cached = _ROUTERS[root] = (mtime, Router(index_dir))
+    return cached[1]
@@ -0,0 +1,287 @@
+# -*- coding: utf-8 -*-
+"""
+증분 인덱스 갱신 (콘텐츠 해시 기준 add / update / delete)
+- 파일 지문(sha1)이 같으면 추출/청크/임베딩 모두 생략
+- 바뀐 파일은 다시 청크 → 청크 텍스트 해시가 기존과 같으면 기존 벡터(행) 재사용, 새 청크만 임베딩
+- 사라진 파일/청크는 tombstone 처리 → 누적 비율이 임계값을 넘으면 compact 로 재구성
+- 저장은 변경분만: 새 행은 청크 저장소 뒤에 추가, 바뀐 레코드만 따로 기록, 메타/BM25 색인은 기존 배열에 병합
+  (FaissStore.save_update — 기존 청크를 다시 읽거나 토큰화하지 않음)
+- 상태 파일: <index_dir>/sources.json  {path: {"sha1":..., "rows":[...], "hashes":[...]}}
+  rows[i] = 파일의 i 번째 청크 벡터가 있는 행. 중복 제거 빌드는 한 행을 여러 파일/청크가 공유
+  → 행은 마지막 소유 청크가 사라질 때만 tombstone, 대표 레코드의 파일이 빠지면 남은 소유자로 레코드 이전
+  대표 레코드 meta 의 dup_count / alias_paths(다른 소유 파일) 도 갱신마다 맞춤
+- <index_dir>/dedup.json  {대표 행: {"ids": 합쳐진 청크 id, "paths": 다른 파일 경로}} (공유 행이 있을 때만)
+"""
+
+from __future__ import annotations
+import os, json, hashlib
+from collections import Counter
+from typing import List, Dict, Any, Tuple
+
+import numpy as np
+
+from student.day2.impl.ingest import (
+    collect_files, load_document, chunk_document, chunking_info, file_sha1,
+)
+from student.day2.impl.embeddings import Embeddings
+from student.day2.impl.embcache import EMB_CACHE_PATH
+from student.day2.impl.store import FaissStore
+
+SOURCES_NAME = "sources.json"
+DEDUP_NAME = "dedup.json"
+COMPACT_RATIO = 0.2  # tombstone 비율이 이 값을 넘으면 자동 compact
+
+
+def text_sha1(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def _paths(index_dir: str):
+    return (
+        os.path.join(index_dir, "faiss.index"),
+        os.path.join(index_dir, "docs.jsonl"),
+        os.path.join(index_dir, SOURCES_NAME),
+    )
+
+
+def read_sources(index_dir: str) -> Dict[str, Dict[str, Any]]:
+    path = _paths(index_dir)[2]
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _write_json(path: str, obj):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(obj, f, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+def write_sources(index_dir: str, sources: Dict[str, Dict[str, Any]]):
+    _write_json(_paths(index_dir)[2], sources)
+
+
+def chunk_id(path: str, i: int) -> str:
+    return f"{path}::chunk_{i:04d}"
+
+
+def row_owners(sources: Dict[str, Dict[str, Any]]) -> Dict[int, List[Tuple[str, int]]]:
+    """행 → 그 행을 가리키는 (파일, 청크 번호) 목록"""
+    owners: Dict[int, List[Tuple[str, int]]] = {}
+    for path, ent in sources.items():
+        for i, row in enumerate(ent.get("rows", [])):
+            owners.setdefault(int(row), []).append((path, i))
+    return owners
+
+
+def alias_paths(owners: List[Tuple[str, int]], path: str | None) -> List[str]:
+    """공유 행의 소유자 중 대표 레코드 파일(path) 외의 파일 경로 (meta["alias_paths"])"""
+    return sorted({p for p, _ in owners if p != path})
+
+
+def write_dedup(index_dir: str, sources: Dict[str, Dict[str, Any]], docs):
+    """공유 행마다 대표 레코드 외의 청크 id / 파일 경로를 dedup.json 에 기록 (공유 행이 없으면 파일 제거)"""
+    out = {}
+    for row, owners in sorted(row_owners(sources).items()):
+        if len(owners) < 2:
+            continue
+        rec = docs[row]
+        out[str(row)] = {"ids": [chunk_id(p, i) for p, i in owners if chunk_id(p, i) != rec.get("id")],
+                         "paths": alias_paths(owners, rec.get("meta", {}).get("path"))}
+    path = os.path.join(index_dir, DEDUP_NAME)
+    if out:
+        _write_json(path, out)
+    elif os.path.exists(path):
+        os.remove(path)
+
+
+def read_dedup(index_dir: str) -> Dict[str, Dict[str, List[str]]]:
+    path = os.path.join(index_dir, DEDUP_NAME)
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def sources_from_items(items, skip=(), with_file_hash: bool = True, start: int = 0,
+                       sources: Dict[str, Dict[str, Any]] | None = None,
+                       rows: List[int] | None = None) -> Dict[str, Dict[str, Any]]:
+    """
+    청크 레코드 → sources 상태
+    - with_file_hash=False: 파일 해시 미상(None) → 다음 갱신 때 청크 단위로 비교
+    - start/sources: 배치 단위로 이어서 누적 (스트리밍 빌드, 첫 레코드의 행 번호 = start)
+    - rows: 청크별 벡터 행 (중복 제거 빌드: 합쳐진 청크는 대표 행). None 이면 행 순서 그대로
+    """
+    sources = {} if sources is None else sources
+    for k, doc in enumerate(items):
+        row = rows[k] if rows is not None else start + k
+        if row in skip:
+            continue
+        path = doc.get("meta", {}).get("path", "")
+        ent = sources.get(path)
+        if ent is None:
+            sha = file_sha1(path) if with_file_hash and os.path.exists(path) else None
+            ent = sources[path] = {"sha1": sha, "rows": [], "hashes": []}
+        ent["rows"].append(row)
+        ent["hashes"].append(text_sha1(doc["text"]))
+    return sources
+
+
+def update_index(paths: List[str], index_dir: str, model: str | None = None, batch_size: int = 128,
+                 auto_compact: bool = True) -> Dict[str, Any]:
+    """
+    기존 인덱스를 입력 경로 기준으로 증분 갱신. 반환: 처리 통계
+    - 입력 경로에 없는 파일은 삭제로 간주
+    """
+    index_path, docs_path, _ = _paths(index_dir)
+    store = FaissStore.load(index_path, docs_path)
+    # sources.json 이 없는 기존 인덱스: 청크 레코드로부터 상태 복원
+    sources = read_sources(index_dir) or sources_from_items(
+        store.docs, skip=set(store.tombstones.tolist()), with_file_hash=False)
+    # 기존 인덱스와 같은 청크 방식 (chunker 기록이 없는 구버전 매니페스트는 fixed)
+    chunker = (store.build_info.get("chunking") or {}).get("chunker", "fixed")
+    emb = Embeddings(model=model or store.build_info.get("embedding_model"), batch_size=batch_size,
+                     dimensions=store.build_info.get("embedding_dimensions"), cache_path=EMB_CACHE_PATH)
+
+    stats = {"files_unchanged": 0, "files_changed": 0, "files_added": 0, "files_deleted": 0,
+             "chunks_reused": 0, "chunks_embedded": 0, "chunks_deleted": 0}
+    base = store.index.ntotal
+    new_items: List[Dict[str, Any]] = []
+    new_owner: List[tuple] = []  # (path, 청크 번호) — new_items 와 같은 순서
+    updates: Dict[int, Dict[str, Any]] = {}
+    next_sources: Dict[str, Dict[str, Any]] = {}
+    old_refs = Counter(r for ent in sources.values() for r in ent.get("rows", []))
+
+    files = collect_files(paths)
+    for fp in files:
+        sha = file_sha1(fp)
+        old = sources.get(fp)
+        if old is not None and old.get("sha1") == sha:
+            next_sources[fp] = old
+            stats["files_unchanged"] += 1
+            continue
+        doc = load_document(fp)
+        if doc is None:
+            continue
+        stats["files_changed" if old is not None else "files_added"] += 1
+        # 기존 청크: 해시 → 행 목록 (같은 텍스트가 여러 번 나와도 하나씩 소비)
+        pool: Dict[str, List[int]] = {}
+        for row, h in zip((old or {}).get("rows", []), (old or {}).get("hashes", [])):
+            pool.setdefault(h, []).append(row)
+        ent = {"sha1": sha, "rows": [], "hashes": []}
+        for i, ch in enumerate(chunk_document(doc["text"], chunker)):
+            h = text_sha1(ch)
+            item = {"id": chunk_id(fp, i), "text": ch, "meta": {"path": fp, "chunk": i}}
+            if pool.get(h):
+                row = pool[h].pop(0)
+                # 벡터 재사용, 레코드(id/청크 번호)만 갱신. 공유 행은 대표 레코드의 파일일 때만
+                if old_refs[row] == 1 or store.docs[row].get("meta", {}).get("path") == fp:
+                    updates[row] = item
+                ent["rows"].append(row)
+                stats["chunks_reused"] += 1
+            else:
+                new_items.append(item)
+                new_owner.append((fp, i))
+                ent["rows"].append(-1)  # 임베딩 후 채움
+            ent["hashes"].append(h)
+        next_sources[fp] = ent
+
+    present = set(files)
+    stats["files_deleted"] = sum(1 for fp in sources if fp not in present)
+
+    if new_items:
+        vecs = emb.encode([it["text"] for it in new_items]).astype("float32", copy=False)
+        store.add_vectors(vecs)  # 레코드는 save_update 가 청크 저장소 뒤에 추가
+        for j, (fp, i) in enumerate(new_owner):
+            next_sources[fp]["rows"][i] = base + j
+
+    # 소유자 수가 바뀐 행: 0 이면 삭제, 남으면 dup_count 갱신 (+ 대표 파일이 빠졌으면 남은 소유자로 레코드 이전)
+    owners = row_owners(next_sources)
+    removed: List[int] = []
+    for row in sorted(set(updates) | {r for r, n in old_refs.items() if len(owners.get(r, ())) != n}):
+        own = owners.get(row)
+        if not own:
+            updates.pop(row, None)
+            removed.append(row)
+            continue
+        rec = updates.get(row) or store.docs[row]
+        meta = dict(rec.get("meta", {}))
+        if meta.get("path") not in {p for p, _ in own}:
+            p, i = own[0]
+            rec = {"id": chunk_id(p, i), "text": rec["text"], "meta": dict(meta, path=p, chunk=i)}
+            meta = dict(rec["meta"])
+        if len(own) > 1:
+            meta["dup_count"] = len(own) - 1
+        else:
+            meta.pop("dup_count", None)
+        aliases = alias_paths(own, meta.get("path"))
+        if aliases:
+            meta["alias_paths"] = aliases
+        else:
+            meta.pop("alias_paths", None)
+        if row in updates or rec.get("meta") != meta:
+            updates[row] = dict(rec, meta=meta)
+    # 실제로 달라진 레코드만 기록 (청크 번호/소유 파일이 그대로면 생략)
+    updates = {row: item for row, item in updates.items() if item != store.docs[row]}
+    store.delete(removed)
+    stats["chunks_embedded"] = len(new_items)
+    stats["chunks_deleted"] = len(removed)
+
+    changed = bool(new_items or updates or removed)
+    if changed:
+        store.build_info.update(embedding_model=emb.model, chunking=chunking_info(chunker))
+        if not emb.backend.local:
+            store.build_info["embedding_usage"] = stats["embedding_usage"] = emb.usage()
+        store.save_update(base, new_items, updates)
+    write_sources(index_dir, next_sources)
+    write_dedup(index_dir, next_sources, store.docs)
+
+    ratio = store.tombstones.size / max(store.index.ntotal, 1)
+    stats["tombstone_ratio"] = round(float(ratio), 4)
+    if auto_compact and ratio > COMPACT_RATIO:
+        stats["compacted"] = compact_index(index_dir)
+    return stats
+
+
+def compact_index(index_dir: str) -> Dict[str, Any]:
+    """
+    tombstone 을 제거하고 살아있는 벡터/청크만으로 인덱스 재구성 (임베딩 재호출 없음)
+    - IVF/PQ 등 학습형 인덱스는 남은 벡터로 다시 학습
+    - 모든 행이 삭제됨: 학습할 벡터가 없으므로 빈 flat 인덱스 (다음 전체 빌드에서 원래 설정으로)
+    """
+    index_path, docs_path, _ = _paths(index_dir)
+    old = FaissStore.load(index_path, docs_path)
+    if old.tombstones.size == 0:
+        return {"removed": 0, "count": int(old.index.ntotal)}
+    dead = np.zeros(old.index.ntotal, dtype=bool)
+    dead[old.tombstones] = True
+    live = np.flatnonzero(~dead)
+    vecs = old.all_vectors()[live]
+
+    if live.size:
+        store = FaissStore(old.dim, index_path, docs_path, index_type=old.index_type, nlist=old.nlist,
+                           hnsw_m=old.hnsw_m, nprobe=old.nprobe, ef_search=old.ef_search,
+                           storage=old.storage, pq_m=old.pq_m, rerank_factor=old.rerank_factor,
+                           chunk_block_size=old.chunk_block_size, chunk_compress=old.chunk_compress,
+                           lexical=old.lexical, coarse_dim=old.coarse_dim)
+    else:
+        store = FaissStore(old.dim, index_path, docs_path, chunk_block_size=old.chunk_block_size,
+                           chunk_compress=old.chunk_compress, lexical=old.lexical)
+    store.build_info = {k: old.build_info[k] for k in ("embedding_model", "embedding_dimensions", "normalized", "chunking")
+                        if k in old.build_info}
+    if live.size:
+        store.add(vecs, [old.docs[int(r)] for r in live])
+    store.save()
+
+    # 행 번호 재매핑
+    remap = {int(r): i for i, r in enumerate(live)}
+    sources = read_sources(index_dir)
+    for ent in sources.values():
+        pairs = [(remap[r], h) for r, h in zip(ent.get("rows", []), ent.get("hashes", [])) if r in remap]
+        ent["rows"] = [r for r, _ in pairs]
+        ent["hashes"] = [h for _, h in pairs]
+    write_sources(index_dir, sources)
+    write_dedup(index_dir, sources, store.docs)
+    return {"removed": int(old.tombstones.size), "count": int(live.size)}
@@ -1,122 +1,420 @@
 # -*- coding: utf-8 -*-
 """
 인덱싱 입력 데이터 로딩/정제/청크
+- PDF 는 페이지 단위로 프로세스 풀에서 병렬 추출, 페이지 텍스트는 (파일 해시, 페이지) 키로 디스크 캐시
+  → 바뀌지 않은 PDF 는 다시 파싱하지 않음. 문서/페이지 순서는 항상 입력 순서대로
 """
 
-import re, json
-from typing import List, Dict, Any
+import os, re, json, hashlib, unicodedata, multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Any, Tuple, Iterator
 from pathlib import Path
 
+import numpy as np
+
+from .local_embed import ngram_hashes, mix64
+from .tokens import count_tokens  # 청크 토큰 예산 (임베딩 요청 한도와 같은 계산)
+
+# 기본 청크 파라미터 (build_index 매니페스트에도 기록)
+CHUNK_SIZE = 1200
+CHUNK_OVERLAP = 200
+
+# 구조 인식 청크 (chunker="structured"): 문단/문장(한국어 종결 포함) 경계에서 자르고 토큰 예산으로 채움
+CHUNKERS = ("fixed", "structured")
+CHUNK_TOKENS = 512          # 청크당 토큰 예산
+CHUNK_OVERLAP_TOKENS = 40   # 문단 중간에서 잘릴 때만, 앞 청크 끝 문장을 이 예산 안에서 통째로 이어 붙임
+
+# PDF 페이지 텍스트 캐시 (<dir>/<해시 앞 2자리>/<파일 해시>/<페이지>.txt)
+PDF_CACHE_DIR = os.getenv("DAY2_PDF_CACHE", os.path.join(".cache", "day2_pdf"))
+PAGES_PER_TASK = 8  # 작업 1개당 페이지 수 (PdfReader 열기 비용 분산)
+
 
 def read_text_file(path: str) -> str:
     """
     안전한 텍스트 로드(utf-8, errors='ignore')
     """
-    # ----------------------------------------------------------------------------
-    # TODO[DAY2-G-01] 구현 지침
-    #  - with open(path, "r", encoding="utf-8", errors="ignore") as f: return f.read()
-    # ----------------------------------------------------------------------------
-    raise NotImplementedError("TODO[DAY2-G-01]: read_text_file")
+    with open(path, "r", encoding="utf-8", errors="ignore") as f:
+        return f.read()
+
+
+def file_sha1(path: str, bufsize: int = 1 << 20) -> str:
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(bufsize), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _extract_pages(task: Tuple[str, List[int]]) -> List[Tuple[int, str]]:
+    """(작업 프로세스) PDF 의 지정 페이지들 텍스트 추출"""
+    from pypdf import PdfReader
+    path, pages = task
+    reader = PdfReader(path)
+    return [(p, reader.pages[p].extract_text() or "") for p in pages]
 
 
-def read_pdf_file(path: str) -> str:
+def _write_atomic(path: str, text: str):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+
+def read_pdf_files(paths: List[str], pool: ProcessPoolExecutor | None = None,
+                   cache_dir: str | None = PDF_CACHE_DIR) -> Dict[str, str]:
+    """
+    여러 PDF → {경로: 전체 텍스트}. 캐시에 없는 페이지만 모아 pool 에서 병렬 추출
+    - cache_dir=None 이면 캐시 사용 안 함 / pool=None 이면 현재 프로세스에서 순차 추출
+    """
+    from pypdf import PdfReader
+    pages: Dict[str, List[str | None]] = {}
+    cache: Dict[str, str | None] = {}
+    tasks = []
+    for path in paths:
+        d = None
+        if cache_dir:
+            h = file_sha1(path)
+            d = os.path.join(cache_dir, h[:2], h)
+        meta = os.path.join(d, "pages.json") if d else None
+        if meta and os.path.exists(meta):
+            with open(meta, "r", encoding="utf-8") as f:
+                n = int(json.load(f)["pages"])
+        else:
+            n = len(PdfReader(path).pages)
+            if d:
+                os.makedirs(d, exist_ok=True)
+                _write_atomic(meta, json.dumps({"path": path, "pages": n}))
+        texts: List[str | None] = [None] * n
+        for p in range(n):
+            fp = os.path.join(d, f"{p:05d}.txt") if d else None
+            if fp and os.path.exists(fp):
+                with open(fp, "r", encoding="utf-8") as f:
+                    texts[p] = f.read()
+        missing = [p for p in range(n) if texts[p] is None]
+        tasks.extend((path, missing[i:i + PAGES_PER_TASK]) for i in range(0, len(missing), PAGES_PER_TASK))
+        pages[path], cache[path] = texts, d
+
+    results = pool.map(_extract_pages, tasks) if pool is not None and len(tasks) > 1 else map(_extract_pages, tasks)
+    for (path, _), extracted in zip(tasks, results):
+        for p, text in extracted:
+            pages[path][p] = text
+            if cache[path]:
+                _write_atomic(os.path.join(cache[path], f"{p:05d}.txt"), text)
+    return {path: "\n".join(pages[path]) for path in paths}
+
+
+def read_pdf_file(path: str, pool: ProcessPoolExecutor | None = None) -> str:
     """
-    pypdf 로 PDF 모든 페이지 텍스트 추출
+    pypdf 로 PDF 모든 페이지 텍스트 추출 (페이지 캐시 사용)
     """
-    # ----------------------------------------------------------------------------
-    # TODO[DAY2-G-02] 구현 지침
-    #  - from pypdf import PdfReader
-    #  - reader = PdfReader(path); texts=[]
-    #  - for page in reader.pages: texts.append(page.extract_text() or "")
-    #  - return "\n".join(texts)
-    # ----------------------------------------------------------------------------
-    raise NotImplementedError("TODO[DAY2-G-02]: read_pdf_file")
+    return read_pdf_files([path], pool)[path]
 
 
 def clean_text(s: str) -> str:
     """
     과도한 공백/개행/컨트롤 문자 정제
     """
-    # ----------------------------------------------------------------------------
-    # TODO[DAY2-G-03] 구현 지침
-    #  - s = s or ""
-    #  - s = re.sub(r"\r", "\n", s)
-    #  - s = re.sub(r"[ \t]+", " ", s)
-    #  - s = re.sub(r"\n{3,}", "\n\n", s)
-    #  - return s.strip()
-    # ----------------------------------------------------------------------------
-    raise NotImplementedError("TODO[DAY2-G-03]: clean_text")
+    s = s or ""
+    s = re.sub(r"\r", "\n", s)
+    s = re.sub(r"[ \t]+", " ", s)
+    s = re.sub(r"\n{3,}", "\n\n", s)
+    return s.strip()
 
 
-def chunk_text(text: str, chunk_size: int = 1200, chunk_overlap: int = 200) -> List[str]:
+def chunk_text(text: str, chunk_size: int = CHUNK_SIZE, chunk_overlap: int = CHUNK_OVERLAP) -> List[str]:
     """
     슬라이딩 윈도우로 청크 분할.
     - 길이가 chunk_size 이하이면 그대로 1청크
     - 그 외에는 overlap 적용하여 분할
     """
-    # ----------------------------------------------------------------------------
-    # TODO[DAY2-G-04] 구현 지침
-    #  - if len(text) <= chunk_size: return [text]
-    #  - chunks=[]; start=0
-    #  - while start < len(text):
-    #       end = min(len(text), start+chunk_size)
-    #       chunks.append(text[start:end])
-    #       start += (chunk_size - chunk_overlap)
-    #  - return chunks
-    # ----------------------------------------------------------------------------
-    raise NotImplementedError("TODO[DAY2-G-04]: chunk_text")
+    if len(text) <= chunk_size:
+        return [text]
+    chunks = []
+    start = 0
+    while start < len(text):
+        end = min(len(text), start + chunk_size)
+        chunks.append(text[start:end])
+        start += (chunk_size - chunk_overlap)
+    return chunks
+
+
+_PARA_RE = re.compile(r"\n[ \t]*\n")
+# 문장 끝: 종결 부호(+닫는 따옴표/괄호) 뒤 공백, 또는 부호 없이 한국어 종결 어미로 끝난 줄
+_SENT_RE = re.compile(r"[.!?。！？…][\"'”’)\]]*\s+|(?<=[다요죠까음함임됨])[ \t]*\n")
+
+
+def split_sentences(text: str) -> List[str]:
+    out, start = [], 0
+    for m in _SENT_RE.finditer(text):
+        sent = text[start:m.end()].strip()
+        if sent:
+            out.append(sent)
+        start = m.end()
+    if text[start:].strip():
+        out.append(text[start:].strip())
+    return out
+
+
+def _units(para: str) -> Tuple[List[str], str]:
+    """문단 → (분할 단위, 단위 사이 구분자). 표(줄마다 '|' 가 2개 이상)는 행 단위, 그 외는 문장 단위"""
+    lines = [ln for ln in para.split("\n") if ln.strip()]
+    if len(lines) > 1 and sum(ln.count("|") >= 2 for ln in lines) * 2 > len(lines):
+        return lines, "\n"
+    return split_sentences(para), " "
+
+
+def chunk_structured(text: str, max_tokens: int = CHUNK_TOKENS,
+                     overlap_tokens: int = CHUNK_OVERLAP_TOKENS) -> List[str]:
+    """
+    문단 → 문장(표는 행) 단위를 한 번 훑으며 토큰 예산까지 채워 청크 생성 (단위마다 토큰 수는 한 번만 계산)
+    - 문단 경계에서 잘리면 겹침 없음, 문단 중간에서 잘리면 끝 문장(들)을 overlap_tokens 안에서만 이어 붙임
+    - 예산보다 긴 단일 단위는 글자 수 비례로 잘라 각각 한 청크
+    """
+    chunks: List[str] = []
+    cur: List[Tuple[str, str, int]] = []  # (앞 구분자, 단위, 토큰 수)
+    cur_tok = fresh = 0
+
+    def flush(carry: bool, need: int = 0):
+        nonlocal cur, cur_tok, fresh
+        if fresh:
+            chunks.append("".join(sep + u for sep, u, _ in cur).strip())
+        tail, t = [], 0
+        if carry:
+            # 이어 붙일 끝 문장 + 다음 단위(need)가 예산을 넘지 않는 만큼만
+            budget = min(overlap_tokens, max_tokens - need)
+            for sep, u, n in reversed(cur):
+                if t + n > budget:
+                    break
+                tail.insert(0, (sep, u, n))
+                t += n
+        cur, cur_tok, fresh = tail, t, 0
+
+    for para in _PARA_RE.split(text or ""):
+        units, joiner = _units(para.strip())
+        for j, u in enumerate(units):
+            n = count_tokens(u)
+            if n > max_tokens:
+                flush(carry=False)
+                step = max(1, len(u) * max_tokens // n)
+                chunks.extend(u[k:k + step] for k in range(0, len(u), step))
+                continue
+            if cur_tok + n > max_tokens:
+                flush(carry=j > 0, need=n)
+            cur.append(("\n\n" if j == 0 else joiner, u, n))
+            cur_tok += n
+            fresh += 1
+    flush(carry=False)
+    return chunks
+
+
+def chunk_document(text: str, chunker: str = "fixed") -> List[str]:
+    if chunker == "fixed":
+        return chunk_text(text)
+    if chunker == "structured":
+        return chunk_structured(text)
+    raise ValueError(f"지원하지 않는 chunker: {chunker} (가능: {CHUNKERS})")
+
+
+def chunking_info(chunker: str = "fixed") -> Dict[str, Any]:
+    """매니페스트 chunking 항목 (증분 갱신이 같은 청크 방식을 쓰도록 chunker 도 기록)"""
+    if chunker == "structured":
+        return {"chunker": chunker, "chunk_tokens": CHUNK_TOKENS, "chunk_overlap_tokens": CHUNK_OVERLAP_TOKENS}
+    return {"chunker": "fixed", "chunk_size": CHUNK_SIZE, "chunk_overlap": CHUNK_OVERLAP}
+
+
+# ---------- 완전/근접 중복 청크 제거 (머리말/꼬리말/면책 문구 등 반복 상용구) ----------
+DEDUP_SHINGLE = 5       # SimHash 특성: 정규화 텍스트의 문자 5-gram 집합
+DEDUP_MAX_HAMMING = 4   # 64비트 SimHash 해밍 거리 ≤ 4 → 근접 중복 (쪽 번호/날짜만 다른 머리말·꼬리말 수준)
+DEDUP_BANDS = 5         # 12비트 밴드 5개: 거리 ≤ 4 이면 최소 한 밴드가 일치(비둘기집) → 같은 밴드 버킷만 비교
+DEDUP_MIN_CHARS = 64    # 이보다 짧은 청크는 완전 중복만 검사 (특성이 적어 SimHash 가 불안정)
+DEDUP_BUCKET_CAP = 64   # 버킷당 비교할 대표 수 상한 → 최악의 경우에도 청크 수에 선형
+
+
+def _dedup_norm(text: str) -> str:
+    return " ".join(unicodedata.normalize("NFKC", text or "").lower().split())
+
+
+def simhash64(text: str) -> int:
+    """(정규화된) 텍스트의 문자 n-gram 집합 → 64비트 SimHash. 비트 투표는 NumPy 벡터 연산"""
+    h = np.unique(mix64(ngram_hashes(text, (DEDUP_SHINGLE,))))
+    if h.size == 0:
+        return 0
+    bits = np.unpackbits(h.astype("<u8").view("u1").reshape(-1, 8), axis=1, bitorder="little")
+    votes = bits.sum(axis=0, dtype="int64") * 2 - h.size
+    return int(sum(1 << int(i) for i in np.flatnonzero(votes > 0)))
+
+
+class NearDupIndex:
+    """
+    온라인 중복 판정: 먼저 본 청크가 대표, 이후 같은/비슷한 청크는 대표 번호를 돌려줌
+    - 완전 중복: 정규화 텍스트 sha1 사전 (O(1))
+    - 근접 중복: SimHash 밴드 버킷에서 후보만 골라 해밍 거리 비교 (청크당 O(밴드 수 × 버킷 상한))
+    """
+
+    def __init__(self, max_hamming: int = DEDUP_MAX_HAMMING, bands: int = DEDUP_BANDS,
+                 min_chars: int = DEDUP_MIN_CHARS, near: bool = True):
+        self.max_hamming = max_hamming
+        self.bands = bands
+        self.width = 64 // bands
+        self.min_chars = min_chars
+        self.near = near
+        self.count = 0  # 대표 수
+        self._exact: Dict[bytes, int] = {}
+        self._buckets: Dict[Tuple[int, int], List[Tuple[int, int]]] = {}  # (밴드, 값) → [(SimHash, 대표 번호)]
+
+    def check(self, text: str) -> Tuple[int, str]:
+        """→ (대표 번호, "new" | "exact" | "near"). "new" 면 이 텍스트가 새 대표 (번호 = 추가 순서)"""
+        norm = _dedup_norm(text)
+        key = hashlib.sha1(norm.encode("utf-8")).digest()
+        hit = self._exact.get(key)
+        if hit is not None:
+            return hit, "exact"
+        sig = simhash64(norm) if self.near and len(norm) >= self.min_chars else None
+        mask = (1 << self.width) - 1
+        keys = [(b, (sig >> (b * self.width)) & mask) for b in range(self.bands)] if sig is not None else []
+        for k in keys:
+            for other, rep in self._buckets.get(k, ()):
+                if bin(sig ^ other).count("1") <= self.max_hamming:
+                    self._exact[key] = rep
+                    return rep, "near"
+        rep = self.count
+        self.count += 1
+        self._exact[key] = rep
+        for k in keys:
+            bucket = self._buckets.setdefault(k, [])
+            if len(bucket) < DEDUP_BUCKET_CAP:
+                bucket.append((sig, rep))
+        return rep, "new"
+
+
+def dedup_corpus(items: List[Dict[str, Any]], near: bool = True,
+                 max_hamming: int = DEDUP_MAX_HAMMING) -> Tuple[List[Dict[str, Any]], List[int], Dict[str, Any]]:
+    """
+    코퍼스에서 완전/근접 중복 청크 제거 → (대표만 남긴 코퍼스, 입력 청크별 대표 위치, 절감 통계)
+    - 대표는 입력 순서상 첫 청크. 대표 meta["dup_count"] = 합쳐진 청크 수,
+      meta["alias_paths"] = 합쳐진 청크의 다른 파일 경로 (path 필터가 별칭 경로로도 대표 청크를 찾음)
+    - 입력 청크 → 대표 위치(rows)는 증분 갱신 상태(sources.json)에 모든 소유 파일을 기록하는 데 사용
+      (제거된 청크 id 목록은 인덱스의 dedup.json 으로 따로 기록: incremental.write_dedup)
+    """
+    idx = NearDupIndex(max_hamming=max_hamming, near=near)
+    kept: List[Dict[str, Any]] = []
+    rows: List[int] = []
+    stats = {"chunks_in": 0, "exact_duplicates": 0, "near_duplicates": 0,
+             "chars_saved": 0, "tokens_in": 0, "tokens_saved": 0}
+    for it in items:
+        text = it.get("text", "")
+        tok = count_tokens(text)
+        stats["chunks_in"] += 1
+        stats["tokens_in"] += tok
+        rep, kind = idx.check(text)
+        if kind == "new":
+            rows.append(len(kept))
+            kept.append(it)
+            continue
+        rows.append(rep)
+        meta = kept[rep].setdefault("meta", {})
+        meta["dup_count"] = meta.get("dup_count", 0) + 1
+        path = it.get("meta", {}).get("path")
+        if path is not None and path != meta.get("path") and path not in meta.get("alias_paths", ()):
+            meta["alias_paths"] = meta.get("alias_paths", []) + [path]
+        stats[f"{kind}_duplicates"] += 1
+        stats["chars_saved"] += len(text)
+        stats["tokens_saved"] += tok
+    stats["chunks_kept"] = len(kept)
+    stats["embedding_saved_ratio"] = round(stats["tokens_saved"] / max(stats["tokens_in"], 1), 4)
+    return kept, rows, stats
+
+
+SUPPORTED_EXTS = ("txt", "md", "pdf")
+
+
+def collect_files(paths_or_dir: List[str]) -> List[str]:
+    """
+    입력 경로(디렉토리/파일)에서 txt/md/pdf 파일 경로 수집 (정렬 → 결정적 순서)
+    """
+    files = []
+    for p in paths_or_dir:
+        pp = Path(p)
+        if pp.is_dir():
+            for ext in SUPPORTED_EXTS:
+                files.extend(str(x) for x in pp.rglob(f"*.{ext}"))
+        else:
+            files.append(str(pp))
+    return sorted(set(files))
 
 
-def load_documents(paths_or_dir: List[str]) -> List[Dict[str, Any]]:
+def load_document(fp: str, raw: str | None = None) -> Dict[str, Any] | None:
+    """
+    단일 파일 로드/정제 → {"path":..., "text":...} (지원하지 않는 확장자면 None)
+    - raw: 이미 추출한 원문 (load_documents 의 병렬 PDF 추출 결과)
+    """
+    ext = fp.lower().split(".")[-1]
+    if ext not in SUPPORTED_EXTS:
+        return None
+    if raw is None:
+        raw = read_pdf_file(fp) if ext == "pdf" else read_text_file(fp)
+    return {"path": fp, "text": clean_text(raw)}
+
+
+def iter_documents(paths_or_dir: List[str], workers: int | None = None,
+                   window: int | None = None) -> Iterator[Dict[str, Any]]:
+    """
+    load_documents 의 생성기 버전: 파일을 window 개씩 묶어 로드 → 입력 순서대로 하나씩 yield
+    - 창 안의 PDF 페이지는 workers 개 프로세스에서 병렬 추출 (기본: CPU 수, 1 이면 순차)
+    - 동시에 메모리에 있는 원문은 창 하나 분량뿐 (기본 window = 2 * workers)
+    """
+    files = collect_files(paths_or_dir)
+    workers = workers or os.cpu_count() or 1
+    window = window or 2 * workers
+    # spawn: 스트리밍 빌드는 이 생성기를 펌프 스레드에서 돌림 → 다중 스레드 프로세스를 fork 하지 않음
+    pool = (ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+            if workers > 1 else None)
+    try:
+        for s in range(0, len(files), window):
+            part = files[s:s + window]
+            pdfs = [fp for fp in part if fp.lower().endswith(".pdf")]
+            pdf_text = read_pdf_files(pdfs, pool) if pdfs else {}
+            for fp in part:
+                d = load_document(fp, pdf_text.pop(fp, None))
+                if d is not None:
+                    yield d
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+
+def load_documents(paths_or_dir: List[str], workers: int | None = None) -> List[Dict[str, Any]]:
     """
     입력 경로(디렉토리/파일)에서 txt/md/pdf 수집 → [{"path":..., "text":...}, ...]
+    - PDF 페이지는 workers 개 프로세스에서 병렬 추출 (기본: CPU 수, 1 이면 순차)
+    """
+    files = collect_files(paths_or_dir)
+    return list(iter_documents(files, workers, window=max(1, len(files))))
+
+
+def iter_corpus(paths_or_dir: List[str], workers: int | None = None,
+                chunker: str = "fixed") -> Iterator[Dict[str, Any]]:
+    """
+    build_corpus 의 생성기 버전 (스트리밍 빌드용). 청크 레코드를 문서/청크 순서대로 yield
     """
-    # ----------------------------------------------------------------------------
-    # TODO[DAY2-G-05] 구현 지침
-    #  - files=[]
-    #  - for p in paths_or_dir:
-    #       pp=Path(p)
-    #       if pp.is_dir():
-    #          for ext in ("*.txt","*.md","*.pdf"): files.extend([str(x) for x in pp.rglob(ext)])
-    #       else: files.append(str(pp))
-    #  - docs=[]
-    #  - for fp in files:
-    #       ext = fp.lower().split(".")[-1]
-    #       if ext in ("txt","md"): raw = read_text_file(fp)
-    #       elif ext=="pdf": raw = read_pdf_file(fp)
-    #       else: continue
-    #       txt = clean_text(raw); docs.append({"path":fp,"text":txt})
-    #  - return docs
-    # ----------------------------------------------------------------------------
-    raise NotImplementedError("TODO[DAY2-G-05]: load_documents")
-
-
-def build_corpus(paths_or_dir: List[str]) -> List[Dict[str, Any]]:
+    for d in iter_documents(paths_or_dir, workers):
+        for i, ch in enumerate(chunk_document(d["text"], chunker)):
+            yield {"id": f"{d['path']}::chunk_{i:04d}", "text": ch, "meta": {"path": d["path"], "chunk": i}}
+
+
+def build_corpus(paths_or_dir: List[str], chunker: str = "fixed") -> List[Dict[str, Any]]:
     """
     문서를 청크 단위로 나눠 코퍼스 생성
     반환 예: [{"id":"<path>::chunk_0000","text":"...", "meta":{"path":..., "chunk":0}}, ...]
+    - chunker: "fixed"(1200자 창 + 200자 겹침) | "structured"(문단/문장 경계 + 토큰 예산)
     """
-    # ----------------------------------------------------------------------------
-    # TODO[DAY2-G-06] 구현 지침
-    #  - docs = load_documents(paths_or_dir)
-    #  - corpus=[]
-    #  - for d in docs:
-    #       chunks = chunk_text(d["text"])
-    #       for i,ch in enumerate(chunks):
-    #           cid = f"{d['path']}::chunk_{i:04d}"
-    #           corpus.append({"id":cid,"text":ch,"meta":{"path":d["path"],"chunk":i}})
-    #  - return corpus
-    # ----------------------------------------------------------------------------
-    raise NotImplementedError("TODO[DAY2-G-06]: build_corpus")
+    return list(iter_corpus(paths_or_dir, chunker=chunker))
 
 
 def save_docs_jsonl(items: List[Dict[str, Any]], out_path: str):
     """
     문서 메타를 JSONL로 저장(ensure_ascii=False)
     """
-    # ----------------------------------------------------------------------------
-    # TODO[DAY2-G-07] 구현 지침
-    #  - with open(out_path,"w",encoding="utf-8") as f:
-    #       for it in items: f.write(json.dumps(it, ensure_ascii=False) + "\n")
-    # ----------------------------------------------------------------------------
-    raise NotImplementedError("TODO[DAY2-G-07]: save_docs_jsonl")
+    with open(out_path, "w", encoding="utf-8") as f:
+        for it in items:
+            f.write(json.dumps(it, ensure_ascii=False) + "\n")
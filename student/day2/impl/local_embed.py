@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+"""
+오프라인 로컬 임베딩 백엔드 (CPU, 네트워크/API 키 불필요, 결정적)
+- 문자 n-gram(기본 2~4) 해시 → 고정 시드의 희소 랜덤 투영(특성마다 부호 있는 projections 개 좌표)으로 dim 차원에 누적
+  → L2 정규화. 해시/투영/누적 모두 NumPy 벡터 연산 (텍스트별 파이썬 루프는 코드포인트 변환뿐)
+- 모델 이름: "local-hash-<dim>" (예: local-hash-384). Day2Plan.embedding_model / build_index --model 로 선택
+- 의미 품질은 API 모델보다 낮음: 오프라인 빌드/테스트/벤치마크 용도
+"""
+
+from __future__ import annotations
+import re
+from typing import List, Tuple
+
+import numpy as np
+
+LOCAL_PREFIX = "local-hash"
+LOCAL_DEFAULT_DIM = 384
+_LOCAL_RE = re.compile(rf"^{LOCAL_PREFIX}(?:-(\d+))?$")
+
+_MASK64 = (1 << 64) - 1
+_P = np.uint64(1099511628211)             # 다항 롤링 해시 밑 (FNV prime)
+_GOLD = 0x9E3779B97F4A7C15
+_BLOCK = 4096                             # 한 번에 누적할 텍스트 수 (메모리 상한)
+_M1 = np.uint64(0xBF58476D1CE4E5B9)
+_M2 = np.uint64(0x94D049BB133111EB)
+
+
+def local_dim(model: str | None) -> int | None:
+    """로컬 모델 이름이면 차원, 아니면 None"""
+    m = _LOCAL_RE.match(model or "")
+    if m is None:
+        return None
+    return int(m.group(1)) if m.group(1) else LOCAL_DEFAULT_DIM
+
+
+def mix64(x: np.ndarray) -> np.ndarray:
+    """splitmix64 마무리 함수 (uint64 배열, 오버플로는 mod 2^64)"""
+    x = (x ^ (x >> np.uint64(30))) * _M1
+    x = (x ^ (x >> np.uint64(27))) * _M2
+    return x ^ (x >> np.uint64(31))
+
+
+def ngram_hashes(s: str, ngrams: Tuple[int, ...]) -> np.ndarray:
+    """문자 n-gram 다항 롤링 해시 (uint64, 섞기 전). 코드포인트 배열 위에서 벡터 연산"""
+    cps = np.frombuffer(s.encode("utf-32-le"), dtype="<u4").astype("uint64")
+    parts = []
+    for n in ngrams:
+        L = cps.size - n + 1
+        if L <= 0:
+            continue
+        h = np.full(L, (n * _GOLD) & _MASK64, dtype="uint64")
+        for j in range(n):
+            h = h * _P + cps[j:j + L]
+        parts.append(h)
+    return np.concatenate(parts) if parts else np.zeros(0, dtype="uint64")
+
+
+class HashEmbeddings:
+    """Embeddings 백엔드 인터페이스(model, dim, local, embed/encode) 의 로컬 구현"""
+
+    local = True
+
+    def __init__(self, dim: int = LOCAL_DEFAULT_DIM, ngrams: Tuple[int, ...] = (2, 3, 4),
+                 projections: int = 4, seed: int = 0, model: str | None = None):
+        self.dim = dim
+        self.ngrams = ngrams
+        self.projections = projections
+        self.seed = seed
+        self.model = model or f"{LOCAL_PREFIX}-{dim}"
+
+    def _gram_hashes(self, text: str) -> np.ndarray:
+        s = " " + " ".join((text or "").lower().split()) + " "  # 단어 경계도 n-gram 에 포함
+        return ngram_hashes(s, self.ngrams)
+
+    def _embed_block(self, texts: List[str]) -> np.ndarray:
+        out = np.zeros(len(texts) * self.dim, dtype="float64")
+        hashes = [self._gram_hashes(t) for t in texts]
+        h = np.concatenate(hashes) if hashes else np.zeros(0, dtype="uint64")
+        if h.size:
+            rows = np.repeat(np.arange(len(texts), dtype="int64"), [x.size for x in hashes])
+            for r in range(self.projections):
+                m = mix64(h ^ np.uint64((self.seed + (r + 1) * _GOLD) & _MASK64))
+                pos = (m % np.uint64(self.dim)).astype("int64")
+                sign = np.where(m >> np.uint64(63), 1.0, -1.0)
+                out += np.bincount(rows * self.dim + pos, weights=sign, minlength=out.size)
+        return out.reshape(len(texts), self.dim)
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """(N, dim) float32, L2 정규화. 빈 텍스트는 0 벡터"""
+        out = np.zeros((len(texts), self.dim), dtype="float32")
+        for s in range(0, len(texts), _BLOCK):
+            out[s:s + _BLOCK] = self._embed_block(texts[s:s + _BLOCK])
+        out /= np.linalg.norm(out, axis=1, keepdims=True) + 1e-12
+        return out
+
+    encode = embed
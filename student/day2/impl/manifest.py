@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+"""
+인덱스 매니페스트(manifest.json)
+- faiss.index 옆에 빌드 정보를 기록 → 로딩 시 네트워크 호출 없이 호환성 검증
+- 기록 항목: 임베딩 모델/차원/정규화, 벡터 수, 청크 파라미터, 빌드 시각
+"""
+
+from __future__ import annotations
+import os, json, time
+from typing import Dict, Any, Optional
+
+MANIFEST_NAME = "manifest.json"
+MANIFEST_VERSION = 1
+
+# 모델별 기본 차원 (매니페스트가 없는 구버전 인덱스 검증용)
+KNOWN_DIMS = {
+    "text-embedding-3-small": 1536,
+    "text-embedding-3-large": 3072,
+    "text-embedding-ada-002": 1536,
+}
+
+
+def manifest_path(index_dir: str) -> str:
+    return os.path.join(index_dir, MANIFEST_NAME)
+
+
+def make_manifest(
+    dim: int,
+    count: int,
+    embedding_model: str | None = None,
+    normalized: bool = True,
+    chunking: Optional[Dict[str, Any]] = None,
+    **extra: Any,
+) -> Dict[str, Any]:
+    m = {
+        "version": MANIFEST_VERSION,
+        "embedding_model": embedding_model,
+        "dim": int(dim),
+        "normalized": bool(normalized),
+        "metric": "ip",
+        "count": int(count),
+        "chunking": chunking or {},
+        "built_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+    m.update(extra)
+    return m
+
+
+def write_manifest(index_dir: str, manifest: Dict[str, Any]) -> str:
+    path = manifest_path(index_dir)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
+    return path
+
+
+def read_manifest(index_dir: str) -> Optional[Dict[str, Any]]:
+    path = manifest_path(index_dir)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def check_compat(manifest: Optional[Dict[str, Any]], index_dim: int, embedding_model: str | None):
+    """
+    로컬 정보만으로 인덱스/임베더 호환성 검증 (불일치 시 ValueError)
+    - 매니페스트가 없으면(구버전 인덱스) 모델 기본 차원표로만 검사
+    """
+    if manifest is None:
+        expected = KNOWN_DIMS.get(embedding_model or "")
+        if expected is not None and expected != index_dim:
+            raise ValueError(f"임베딩 차원이 인덱스와 다릅니다. (index={index_dim}, embedder={expected})")
+        return
+    if int(manifest.get("dim", index_dim)) != index_dim:
+        raise ValueError(f"매니페스트 차원과 인덱스 차원이 다릅니다. (manifest={manifest.get('dim')}, index={index_dim})")
+    built_with = manifest.get("embedding_model")
+    if built_with and embedding_model and built_with != embedding_model:
+        raise ValueError(f"인덱스는 '{built_with}' 모델로 생성되었습니다. (요청 모델={embedding_model})")
+    if not manifest.get("normalized", True):
+        raise ValueError("정규화되지 않은 벡터로 생성된 인덱스입니다. (내적=코사인 가정 불가)")
@@ -0,0 +1,284 @@
+# -*- coding: utf-8 -*-
+"""
+메타데이터 → id 역색인 (필터 검색용)
+- build_corpus 가 만드는 meta 필드(path, chunk, 이후 date/doc_type 등)를 자동 색인
+  * 문자열/불리언(또는 그 리스트) 필드 → 범주형: 값 → 정렬된 id 배열
+  * 숫자 필드 → 열(column) 배열: 범위 비교를 벡터화로 처리
+- 필터 식(dict) → 허용 id 비트마스크 → FAISS IDSelectorBitmap 으로 검색 내부에서 적용
+  예) {"path": "data/raw/a.pdf"}
+      {"path": {"$in": [...]}, "chunk": {"$gte": 0, "$lt": 10}}
+      {"path": {"$prefix": "data/raw/"}}
+      {"$or": [{"doc_type": "law"}, {"doc_type": "guide"}]}
+- 별칭 필드(ALIAS_FIELDS)의 값은 대상 필드로도 색인: 중복 제거된 청크의 alias_paths → path 필터가 별칭 파일로도 일치
+- 저장 레이아웃: <index_dir>/meta/fields.json (필드 목록/순서)
+    범주형 i 번째 필드: cat<i>.values.json + cat<i>.offsets.npy + cat<i>.ids.npy
+    숫자형 i 번째 필드: num<i>.col.npy
+- MetaIndexWriter: 행 단위로 흘려 쓰는 빌더 (FaissStore.save, 메모리 상한 고정)
+- update_meta_index: 증분 갱신. 기존 색인 + 바뀐 행의 meta 만으로 다시 기록 (다른 행의 레코드는 읽지 않음)
+"""
+
+from __future__ import annotations
+import os, json, shutil, tempfile
+from typing import Dict, Any, List, Iterable, Tuple
+
+import numpy as np
+
+from .postings import PostingSpill, SPILL_POSTINGS, swap_dir
+
+META_DIR = "meta"
+_NUM_MISSING = np.nan
+_COPY_BLOCK = 1 << 20  # 스필 파일 → .npy 복사 단위 (원소 수)
+ALIAS_FIELDS = {"alias_paths": "path"}  # 별칭 필드 → 값을 함께 색인할 필드
+
+
+def _is_num(v) -> bool:
+    return isinstance(v, (int, float)) and not isinstance(v, bool)
+
+
+def _entries(meta: Dict[str, Any] | None) -> Tuple[List[Tuple[str, str]], Dict[str, float]]:
+    """meta → (범주형 (필드, 값) 목록, 숫자형 {필드: 값})"""
+    cats: List[Tuple[str, str]] = []
+    nums: Dict[str, float] = {}
+    for key, val in (meta or {}).items():
+        if _is_num(val):
+            nums[key] = float(val)
+            continue
+        vals = [str(v) for v in (val if isinstance(val, (list, tuple)) else [val]) if isinstance(v, (str, bool))]
+        cats.extend((key, v) for v in vals)
+        if key in ALIAS_FIELDS:
+            cats.extend((ALIAS_FIELDS[key], v) for v in vals)
+    return cats, nums
+
+
+class MetaIndex:
+    def __init__(self, n: int, cat: Dict[str, Dict[str, np.ndarray]], num: Dict[str, np.ndarray]):
+        self.n = n
+        self.cat = cat   # field → {value: ids(int64, 오름차순)}
+        self.num = num   # field → (n,) float64 (값 없음 = nan)
+
+    # ---------- Build ----------
+    @classmethod
+    def build(cls, metas: Iterable[Dict[str, Any]]) -> "MetaIndex":
+        """메모리 색인 (MetaIndexWriter 를 임시 디렉토리에 돌려 읽어 들임). 디스크 색인은 MetaIndexWriter 로 직접 기록"""
+        with tempfile.TemporaryDirectory() as d:
+            w = MetaIndexWriter(d)
+            for meta in metas:
+                w.add(meta)
+            return w.finish(mmap=False)
+
+    # ---------- Persist ----------
+    @staticmethod
+    def exists(index_dir: str) -> bool:
+        return os.path.exists(os.path.join(index_dir, META_DIR, "fields.json"))
+
+    @classmethod
+    def load(cls, index_dir: str, mmap: bool = True) -> "MetaIndex":
+        d = os.path.join(index_dir, META_DIR)
+        mode = "r" if mmap else None
+        with open(os.path.join(d, "fields.json"), "r", encoding="utf-8") as fp:
+            fields = json.load(fp)
+        cat = {}
+        for i, f in enumerate(fields["cat"]):
+            with open(os.path.join(d, f"cat{i}.values.json"), "r", encoding="utf-8") as fp:
+                values = json.load(fp)
+            offsets = np.load(os.path.join(d, f"cat{i}.offsets.npy"))
+            ids = np.load(os.path.join(d, f"cat{i}.ids.npy"), mmap_mode=mode)
+            cat[f] = {v: ids[offsets[j]:offsets[j + 1]] for j, v in enumerate(values)}
+        num = {f: np.load(os.path.join(d, f"num{i}.col.npy"), mmap_mode=mode)
+               for i, f in enumerate(fields["num"])}
+        return cls(int(fields["n"]), cat, num)
+
+    # ---------- Filter ----------
+    def _cat_mask(self, field: str, values: Iterable[str]) -> np.ndarray:
+        table = self.cat.get(field, {})
+        m = np.zeros(self.n, dtype=bool)
+        for v in values:
+            ids = table.get(str(v))
+            if ids is not None:
+                m[np.asarray(ids)] = True
+        return m
+
+    def _field_mask(self, field: str, cond) -> np.ndarray:
+        if not isinstance(cond, dict):
+            cond = {"$eq": cond}
+        m = np.ones(self.n, dtype=bool)
+        for op, arg in cond.items():
+            if field in self.num and op in ("$eq", "$ne", "$in", "$gt", "$gte", "$lt", "$lte"):
+                col = np.asarray(self.num[field])
+                with np.errstate(invalid="ignore"):
+                    if op == "$eq":
+                        m &= col == float(arg)
+                    elif op == "$ne":
+                        m &= col != float(arg)
+                    elif op == "$in":
+                        m &= np.isin(col, [float(a) for a in arg])
+                    elif op == "$gt":
+                        m &= col > float(arg)
+                    elif op == "$gte":
+                        m &= col >= float(arg)
+                    elif op == "$lt":
+                        m &= col < float(arg)
+                    else:
+                        m &= col <= float(arg)
+            elif op == "$eq":
+                m &= self._cat_mask(field, [arg])
+            elif op == "$ne":
+                m &= ~self._cat_mask(field, [arg])
+            elif op == "$in":
+                m &= self._cat_mask(field, arg)
+            elif op == "$nin":
+                m &= ~self._cat_mask(field, arg)
+            elif op == "$prefix":
+                vals = [v for v in self.cat.get(field, {}) if v.startswith(arg)]
+                m &= self._cat_mask(field, vals)
+            else:
+                raise ValueError(f"지원하지 않는 필터 연산자: {field}.{op}")
+        return m
+
+    def mask(self, expr: Dict[str, Any]) -> np.ndarray:
+        """필터 식 → (n,) bool 허용 마스크 (키 여러 개 = AND)"""
+        m = np.ones(self.n, dtype=bool)
+        for key, cond in (expr or {}).items():
+            if key == "$and":
+                for sub in cond:
+                    m &= self.mask(sub)
+            elif key == "$or":
+                any_m = np.zeros(self.n, dtype=bool)
+                for sub in cond:
+                    any_m |= self.mask(sub)
+                m &= any_m
+            elif key == "$not":
+                m &= ~self.mask(cond)
+            else:
+                m &= self._field_mask(key, cond)
+        return m
+
+
+class MetaIndexWriter:
+    """
+    메타 색인 빌더: meta 를 행 순서대로 add → finish() 가 <index_dir>/meta/ 기록 (MetaIndex.build 도 이것을 사용)
+    - 범주형: (필드, 값) → 행 포스팅을 PostingSpill 로 디스크 런에 흘려 씀
+    - 숫자형: 필드별 float64 열을 파일에 이어 씀 (처음 나온 행 이전은 nan 으로 채움)
+    - 메모리: (필드, 값) 사전 + 버퍼. 행 수에 비례하는 파이썬 객체를 만들지 않음
+    """
+
+    def __init__(self, index_dir: str, max_postings: int = SPILL_POSTINGS):
+        self.index_dir = index_dir
+        self.d = os.path.join(index_dir, META_DIR)
+        self.tmp = os.path.join(self.d, "spill")
+        os.makedirs(self.tmp, exist_ok=True)
+        self.n = 0
+        self.keys: Dict[Tuple[str, str], int] = {}
+        self.spill = PostingSpill(os.path.join(self.tmp, "runs"), max_postings)
+        self._num: Dict[str, Any] = {}  # 필드 → 열 파일 핸들
+
+    def add(self, meta: Dict[str, Any] | None):
+        row = self.n
+        self.n += 1
+        cats, nums = _entries(meta)
+        for kv in cats:
+            self.spill.add(self.keys.setdefault(kv, len(self.keys)), row)
+        for f in nums.keys() - self._num.keys():
+            fh = self._num[f] = open(os.path.join(self.tmp, f"num.{len(self._num)}.f64"), "wb")
+            for s in range(0, row, _COPY_BLOCK):
+                fh.write(np.full(min(_COPY_BLOCK, row - s), _NUM_MISSING, dtype="float64").tobytes())
+        for f, fh in self._num.items():
+            fh.write(np.float64(nums.get(f, _NUM_MISSING)).tobytes())
+
+    def finish(self, mmap: bool = True) -> MetaIndex:
+        order = sorted(self.keys)  # (필드, 값) 순 → 필드별로 값이 정렬된 연속 구간
+        rank = np.empty(len(order), dtype="int64")
+        rank[[self.keys[k] for k in order]] = np.arange(len(order))
+        all_path = os.path.join(self.d, "ids.all.npy")
+        offsets, _ = self.spill.finish(len(order), all_path, "int64", rank=rank)
+        all_ids = np.load(all_path, mmap_mode="r")
+        fields = sorted({f for f, _ in order})
+        lo = 0
+        for i, f in enumerate(fields):
+            hi = lo
+            while hi < len(order) and order[hi][0] == f:
+                hi += 1
+            with open(os.path.join(self.d, f"cat{i}.values.json"), "w", encoding="utf-8") as fp:
+                json.dump([v for _, v in order[lo:hi]], fp, ensure_ascii=False)
+            np.save(os.path.join(self.d, f"cat{i}.offsets.npy"), offsets[lo:hi + 1] - offsets[lo])
+            _copy_npy(all_ids[offsets[lo]:offsets[hi]], os.path.join(self.d, f"cat{i}.ids.npy"))
+            lo = hi
+        del all_ids
+        os.remove(all_path)
+        nums = sorted(self._num)
+        for i, f in enumerate(nums):
+            fh = self._num[f]
+            fh.close()
+            _copy_npy(np.memmap(fh.name, dtype="float64", mode="r"), os.path.join(self.d, f"num{i}.col.npy"))
+        shutil.rmtree(self.tmp, ignore_errors=True)
+        with open(os.path.join(self.d, "fields.json"), "w", encoding="utf-8") as fp:
+            json.dump({"n": self.n, "cat": fields, "num": nums}, fp, ensure_ascii=False)
+        return MetaIndex.load(self.index_dir, mmap=mmap)
+
+
+def update_meta_index(index_dir: str, old: MetaIndex, changed: Dict[int, Dict[str, Any]], n: int) -> MetaIndex:
+    """
+    증분 갱신: 기존 색인 + 바뀐 행(새 행 포함, 행 → meta)만으로 meta/ 를 다시 기록 → 행 수 n
+    - 바뀐 행은 기존 포스팅에서 빼고 새 값으로 다시 넣음, 나머지 행은 기존 배열을 그대로 옮김
+    - 새 디렉토리에 기록 후 교체 (old 는 기존 파일을 mmap 으로 읽는 중)
+    """
+    rows = np.fromiter(sorted(changed), dtype="int64", count=len(changed))
+    cat_new: Dict[str, Dict[str, List[int]]] = {}
+    num_new: Dict[str, Dict[int, float]] = {}
+    for row in rows.tolist():
+        cats, nums = _entries(changed[row])
+        for key, v in cats:
+            cat_new.setdefault(key, {}).setdefault(v, []).append(row)
+        for key, x in nums.items():
+            num_new.setdefault(key, {})[row] = x
+    d = os.path.join(index_dir, META_DIR)
+    tmp = d + ".new"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+    fields = sorted(set(old.cat) | set(cat_new))
+    for i, f in enumerate(fields):
+        table, add = old.cat.get(f, {}), cat_new.get(f, {})
+        values, sizes = [], [0]
+        raw = os.path.join(tmp, f"cat{i}.ids.raw")
+        with open(raw, "wb") as fh:
+            for v in sorted(set(table) | set(add)):
+                ids = np.asarray(table.get(v, np.zeros(0, "int64")), dtype="int64")
+                ids = np.union1d(ids[~np.isin(ids, rows)], np.asarray(add.get(v, []), dtype="int64"))
+                if ids.size:
+                    values.append(v)
+                    sizes.append(ids.size)
+                    fh.write(ids.tobytes())
+        with open(os.path.join(tmp, f"cat{i}.values.json"), "w", encoding="utf-8") as fp:
+            json.dump(values, fp, ensure_ascii=False)
+        np.save(os.path.join(tmp, f"cat{i}.offsets.npy"), np.cumsum(sizes).astype("int64"))
+        _copy_npy(np.memmap(raw, dtype="int64", mode="r") if os.path.getsize(raw) else np.zeros(0, "int64"),
+                  os.path.join(tmp, f"cat{i}.ids.npy"))
+        os.remove(raw)
+    nums = sorted(set(old.num) | set(num_new))
+    for i, f in enumerate(nums):
+        out = np.lib.format.open_memmap(os.path.join(tmp, f"num{i}.col.npy"), mode="w+", dtype="float64", shape=(n,))
+        src = old.num.get(f)
+        for s in range(0, n, _COPY_BLOCK):
+            e = min(n, s + _COPY_BLOCK)
+            out[s:e] = _NUM_MISSING
+            if src is not None and s < old.n:
+                out[s:min(e, old.n)] = src[s:min(e, old.n)]
+        out[rows] = _NUM_MISSING
+        vals = num_new.get(f, {})
+        if vals:
+            out[np.fromiter(vals.keys(), dtype="int64")] = np.fromiter(vals.values(), dtype="float64")
+        out.flush()
+        del out
+    with open(os.path.join(tmp, "fields.json"), "w", encoding="utf-8") as fp:
+        json.dump({"n": n, "cat": fields, "num": nums}, fp, ensure_ascii=False)
+    swap_dir(tmp, d)
+    return MetaIndex.load(index_dir)
+
+
+def _copy_npy(src: np.ndarray, path: str):
+    """배열(memmap 가능)을 블록 단위로 .npy 파일에 복사 (전체를 메모리에 올리지 않음)"""
+    out = np.lib.format.open_memmap(path, mode="w+", dtype=src.dtype, shape=src.shape)
+    for s in range(0, src.shape[0], _COPY_BLOCK):
+        out[s:s + _COPY_BLOCK] = src[s:s + _COPY_BLOCK]
+    out.flush()
+    del out
@@ -0,0 +1,263 @@
+# -*- coding: utf-8 -*-
+"""
+스트리밍 인덱스 빌드 (메모리 상한 고정 + 체크포인트/재개)
+- 단계: 문서 → 청크(iter_corpus) → 임베딩 배치 → FAISS add → 청크 저장소 append
+  단계마다 스레드 1개, 사이는 크기 제한 큐 → 추출/임베딩/기록이 겹치고 대기 데이터는 큐 깊이 × 배치로 제한
+- 코퍼스 리스트 / 전체 텍스트 / (N, D) 행렬을 만들지 않음
+  · 청크 레코드: chunks.dat 에 바로 append → 완료 후 ChunkStore 를 한 번 훑어 메타/BM25/docs.jsonl 생성
+    (색인 포스팅은 postings.PostingSpill 로 디스크 런에 흘려 쓴 뒤 병합, 압축 리포트도 블록 단위 계산)
+  · 벡터: 스풀 파일(vectors.spill)에 이어 쓰기만 함 → 끝에서 인덱스를 한 번 생성/학습 후 블록 단위 추가
+    (전체 벡터 수를 알고 있으므로 일반 빌드와 같은 자동 선택, 재채점 모드는 스풀을 vectors.npy 로 변환)
+  · 증분 갱신 상태(sources.json): 배치별 항목을 저널(checkpoint/sources.jsonl)에 이어 쓰고 끝에서 파일별로 병합
+  · 라우팅 중심(centroids): 스풀 memmap 의 표본으로 계산 (spherical_kmeans 가 표본만 읽음)
+- 체크포인트(checkpoint_every 배치마다): 이어 쓰는 파일(청크 저장소/스풀/저널)을 flush 하고 각 길이만
+  state.json 에 기록 → 체크포인트 비용/크기가 코퍼스 크기와 무관
+  → resume=True 면 각 파일을 기록된 길이로 자르고 처리한 청크 수만큼 건너뛰고 이어서 빌드
+    (청크 순서는 입력 순서로 결정적, 건너뛴 구간은 PDF 페이지 캐시/임베딩 캐시 덕분에 재추출·재임베딩 비용이 거의 없음)
+"""
+
+from __future__ import annotations
+import os, json, queue, shutil, logging, threading
+from typing import List, Dict, Any, Iterable, Iterator, Tuple
+
+import numpy as np
+
+from .ingest import iter_corpus, chunking_info
+from .embeddings import Embeddings
+from .embcache import EMB_CACHE_PATH
+from .store import FaissStore
+from .chunkstore import ChunkStore, ChunkStoreWriter
+from .incremental import sources_from_items, SOURCES_NAME
+from .federation import write_centroids
+
+log = logging.getLogger(__name__)
+
+STREAM_BATCH = 1024           # 파이프라인 배치(청크 수). Embeddings 가 내부에서 API 요청 단위로 다시 나눔
+QUEUE_DEPTH = 4               # 단계 사이 큐에 대기할 수 있는 배치 수
+CHECKPOINT_EVERY = 16         # 체크포인트 간격 (배치 수, 0 이면 사용 안 함)
+CHECKPOINT_DIR = "checkpoint"
+JOURNAL_NAME = "sources.jsonl"  # 줄마다 [파일 경로, 배치 안의 sources 항목]
+
+_END = object()
+
+
+# ---------- 단계 연결 (스레드 + 크기 제한 큐) ----------
+def _put(q: queue.Queue, x, stop: threading.Event) -> bool:
+    while not stop.is_set():
+        try:
+            q.put(x, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _drain(q: queue.Queue, stop: threading.Event) -> Iterator[Any]:
+    """큐 → 생성기. 앞 단계의 예외는 그대로 다시 발생"""
+    while not stop.is_set():
+        try:
+            x = q.get(timeout=0.1)
+        except queue.Empty:
+            continue
+        if x is _END:
+            return
+        if isinstance(x, BaseException):
+            raise x
+        yield x
+
+
+def _pump(items: Iterable[Any], q: queue.Queue, stop: threading.Event):
+    """(스레드) 생성기 결과를 큐로 전달, 끝/예외도 큐로 전달"""
+    try:
+        for x in items:
+            if not _put(q, x, stop):
+                return
+    except BaseException as e:
+        _put(q, e, stop)
+        return
+    _put(q, _END, stop)
+
+
+def _batches(items: Iterable[Dict[str, Any]], size: int, skip: int = 0) -> Iterator[List[Dict[str, Any]]]:
+    batch: List[Dict[str, Any]] = []
+    for i, it in enumerate(items):
+        if i < skip:
+            continue
+        batch.append(it)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+# ---------- 체크포인트 ----------
+def _ck_dir(index_dir: str) -> str:
+    return os.path.join(index_dir, CHECKPOINT_DIR)
+
+
+def has_checkpoint(index_dir: str) -> bool:
+    return os.path.exists(os.path.join(_ck_dir(index_dir), "state.json"))
+
+
+def _read_checkpoint(index_dir: str) -> Dict[str, Any] | None:
+    if not has_checkpoint(index_dir):
+        return None
+    with open(os.path.join(_ck_dir(index_dir), "state.json"), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _write_checkpoint(index_dir: str, state: Dict[str, Any]):
+    """state.json 원자적 교체 (이어 쓰는 파일들은 호출 측이 먼저 flush). 중간에 죽어도 직전 체크포인트 유효"""
+    tmp = os.path.join(_ck_dir(index_dir), "state.json.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False)
+    os.replace(tmp, os.path.join(_ck_dir(index_dir), "state.json"))
+
+
+def _journal_entries(path: str) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """저널 → (파일 경로, sources 항목). 청크는 파일 순서대로 나오므로 연속된 같은 경로 줄만 합치면 됨"""
+    cur, ent = None, None
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            p, e = json.loads(line)
+            if p == cur:
+                ent["rows"].extend(e["rows"])
+                ent["hashes"].extend(e["hashes"])
+                continue
+            if cur is not None:
+                yield cur, ent
+            cur, ent = p, e
+    if cur is not None:
+        yield cur, ent
+
+
+def _write_sources_journal(index_dir: str, journal: str):
+    """저널 → sources.json 스트리밍 기록 (메모리는 파일 하나의 항목)"""
+    path = os.path.join(index_dir, SOURCES_NAME)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        f.write("{")
+        for i, (p, ent) in enumerate(_journal_entries(journal)):
+            f.write((", " if i else "") + json.dumps(p, ensure_ascii=False) + ": " + json.dumps(ent, ensure_ascii=False))
+        f.write("}")
+    os.replace(path + ".tmp", path)
+
+
+# ---------- 빌드 ----------
+def build_streaming(paths: List[str], index_dir: str, model: str | None = None, batch_size: int = 128,
+                    lexical: bool = True, centroids: int = 0, dimensions: int | None = None,
+                    resume: bool = False, stream_batch: int = STREAM_BATCH, queue_depth: int = QUEUE_DEPTH,
+                    checkpoint_every: int = CHECKPOINT_EVERY, workers: int | None = None,
+                    chunker: str = "fixed", **store_opts) -> str:
+    """
+    build_index(versioned=False) 의 스트리밍 버전. 결과 디렉토리 구성은 동일
+    - store_opts: FaissStore 옵션 (index_type, nlist, hnsw_m, storage, pq_m, rerank_factor,
+                  chunk_block_size, chunk_compress, coarse_dim)
+    - resume: index_dir 의 체크포인트에서 이어서 빌드 (빌드 설정이 다르면 ValueError)
+    """
+    os.makedirs(index_dir, exist_ok=True)
+    index_path = os.path.join(index_dir, "faiss.index")
+    docs_path = os.path.join(index_dir, "docs.jsonl")
+    emb = Embeddings(model=model, batch_size=batch_size, dimensions=dimensions, cache_path=EMB_CACHE_PATH)
+    config = {
+        "paths": list(paths), "embedding_model": emb.model, "embedding_dimensions": emb.dimensions,
+        "chunking": chunking_info(chunker), "store": store_opts,
+        "lexical": lexical, "centroids": centroids,
+    }
+    block_size = store_opts.get("chunk_block_size", 1)
+    compress = store_opts.get("chunk_compress", False)
+    journal_path = os.path.join(_ck_dir(index_dir), JOURNAL_NAME)
+
+    state = _read_checkpoint(index_dir) if resume else None
+    if state is not None and json.loads(json.dumps(config)) != state["config"]:
+        raise ValueError("체크포인트의 빌드 설정과 현재 설정이 다릅니다. resume 없이 다시 빌드하세요.")
+    store: FaissStore | None = None
+    writer: ChunkStoreWriter | None = None
+    done = 0
+    if state is not None:
+        store = FaissStore(state["dim"], index_path, docs_path, lexical=lexical, **store_opts)
+        store.spill_vectors(rows=state["chunks"])
+        writer = ChunkStoreWriter(index_dir, block_size, compress, state=state)
+        journal = open(journal_path, "r+b")
+        journal.truncate(state["journal"])
+        journal.seek(state["journal"])
+        done = state["chunks"]
+        log.info("resume from chunk %d", done)
+    else:
+        shutil.rmtree(_ck_dir(index_dir), ignore_errors=True)
+        os.makedirs(_ck_dir(index_dir))
+        journal = open(journal_path, "wb")
+
+    stop = threading.Event()
+    q_chunks: queue.Queue = queue.Queue(maxsize=queue_depth)
+    q_vecs: queue.Queue = queue.Queue(maxsize=queue_depth)
+
+    def _embed():
+        for items in _drain(q_chunks, stop):
+            vecs = emb.encode([it.get("text", "") for it in items])
+            if not isinstance(vecs, np.ndarray) or vecs.ndim != 2 or vecs.shape[0] != len(items):
+                raise ValueError("임베딩 결과가 (배치 크기, D) numpy 배열이 아닙니다.")
+            yield items, np.ascontiguousarray(vecs, dtype="float32")
+
+    threads = [
+        threading.Thread(target=_pump, args=(_batches(iter_corpus(paths, workers, chunker), stream_batch, done),
+                                            q_chunks, stop), daemon=True),
+        threading.Thread(target=_pump, args=(_embed(), q_vecs, stop), daemon=True),
+    ]
+    for t in threads:
+        t.start()
+
+    batches = 0
+    try:
+        for items, vecs in _drain(q_vecs, stop):
+            if store is None:
+                store = FaissStore(vecs.shape[1], index_path, docs_path, lexical=lexical, **store_opts)
+                store.spill_vectors()
+            if writer is None:
+                writer = ChunkStoreWriter(index_dir, block_size, compress)
+            row0 = writer.count
+            writer.extend(items)
+            store.add_vectors(vecs)
+            for path, ent in sources_from_items(items, start=row0).items():
+                journal.write((json.dumps([path, ent], ensure_ascii=False) + "\n").encode("utf-8"))
+
+            batches += 1
+            if checkpoint_every and batches % checkpoint_every == 0:
+                ck = writer.checkpoint()
+                if ck is not None:
+                    store.sync_spill()
+                    journal.flush()
+                    _write_checkpoint(index_dir, dict(ck, config=config, dim=store.dim, chunks=writer.count,
+                                                      journal=journal.tell()))
+    finally:
+        stop.set()
+        for t in threads:
+            t.join(timeout=5)
+        journal.close()
+
+    if store is None or writer is None or writer.count == 0:
+        raise ValueError("build_corpus 결과가 비어 있습니다. 유효한 입력 경로를 확인하세요.")
+    writer.close()
+    if centroids > 0:
+        write_centroids(index_dir, store.spill_array(), centroids)  # 표본만 읽음
+    store.build_from_spill()
+
+    store.docs = ChunkStore(index_dir, cache_size=store.chunk_cache)
+    store.build_info = {
+        "embedding_model": emb.model,
+        "embedding_dimensions": emb.dimensions,
+        "normalized": True,
+        "chunking": chunking_info(chunker),
+        "streaming": True,
+    }
+    if not emb.backend.local:
+        store.build_info["embedding_usage"] = emb.usage()
+        log.info("embedding usage: %s", store.build_info["embedding_usage"])
+    if store.reranks:
+        store.build_info["compression"] = store.compression_report()
+        log.info("compression: %s", store.build_info["compression"])
+    store.save(write_chunks=False)
+    _write_sources_journal(index_dir, journal_path)
+    shutil.rmtree(_ck_dir(index_dir), ignore_errors=True)
+    log.info("streaming build: %d chunks (resumed from %d)", writer.count, done)
+    return index_dir
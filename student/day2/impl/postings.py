@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+"""
+디스크 스필 포스팅 빌더 (BM25/메타데이터 역색인의 메모리 상한 고정 빌드)
+- (key, row[, value]) 포스팅을 max_postings 개까지 메모리에 모았다가 key 순 정렬된 런(run) 파일로 내보냄
+- finish(): 런을 차례로 읽어 key 별 구간(offsets)에 흩뿌려 기록 → 출력은 np.lib.format.open_memmap (.npy)
+  * 행은 오름차순으로 add 된다고 가정 → 런 순서 + 런 내 안정 정렬로 key 별 행 오름차순 유지
+- 메모리: 버퍼(max_postings) + key 별 카운트(O(키 수)). 포스팅 전체를 메모리에 올리지 않음
+"""
+
+from __future__ import annotations
+import os, shutil
+from array import array
+from typing import List, Tuple
+
+import numpy as np
+
+SPILL_POSTINGS = 1 << 21  # 메모리 버퍼 포스팅 수 (≈ 48MB) — 넘으면 런 파일로 내보냄
+
+
+class PostingSpill:
+    def __init__(self, tmp_dir: str, max_postings: int = SPILL_POSTINGS, with_values: bool = False):
+        self.tmp_dir = tmp_dir
+        self.max_postings = max(1, max_postings)
+        self.with_values = with_values
+        self._keys, self._rows, self._vals = array("q"), array("q"), array("q")
+        self._runs: List[str] = []
+        self.counts = np.zeros(0, dtype="int64")  # key → 포스팅 수
+
+    def add(self, key: int, row: int, value: int = 0):
+        self._keys.append(key)
+        self._rows.append(row)
+        if self.with_values:
+            self._vals.append(value)
+        if len(self._keys) >= self.max_postings:
+            self._flush()
+
+    def add_many(self, keys: np.ndarray, rows: np.ndarray, values: np.ndarray | None = None):
+        """배열 단위 add (기존 색인의 포스팅을 블록째 옮길 때). key 별 행 오름차순 가정은 add 와 같음"""
+        self._keys.frombytes(np.asarray(keys, dtype="int64").tobytes())
+        self._rows.frombytes(np.asarray(rows, dtype="int64").tobytes())
+        if self.with_values:
+            self._vals.frombytes(np.asarray(values, dtype="int64").tobytes())
+        if len(self._keys) >= self.max_postings:
+            self._flush()
+
+    def _flush(self):
+        if not self._keys:
+            return
+        keys = np.frombuffer(self._keys, dtype="int64")
+        order = np.argsort(keys, kind="stable")
+        c = np.bincount(keys)
+        if c.size > self.counts.size:
+            self.counts = np.concatenate([self.counts, np.zeros(c.size - self.counts.size, dtype="int64")])
+        self.counts[:c.size] += c
+        os.makedirs(self.tmp_dir, exist_ok=True)
+        path = os.path.join(self.tmp_dir, f"run{len(self._runs):05d}.npz")
+        parts = {"keys": keys[order], "rows": np.frombuffer(self._rows, dtype="int64")[order]}
+        if self.with_values:
+            parts["vals"] = np.frombuffer(self._vals, dtype="int64")[order]
+        np.savez(path, **parts)
+        self._runs.append(path)
+        self._keys, self._rows, self._vals = array("q"), array("q"), array("q")
+
+    def finish(self, n_keys: int, rows_path: str, rows_dtype: str = "int64",
+               vals_path: str | None = None, vals_dtype: str = "uint16",
+               rank: np.ndarray | None = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        런 병합 → rows_path(.npy) [+ vals_path] 에 key 순서대로 기록. (offsets(n_keys+1), counts(n_keys)) 반환
+        - rank: 출력 key 순서 (rank[key] = 출력 위치). None 이면 key 번호 순
+        """
+        self._flush()
+        counts = np.zeros(n_keys, dtype="int64")
+        counts[:self.counts.size] = self.counts
+        rank = np.arange(n_keys, dtype="int64") if rank is None else np.asarray(rank, dtype="int64")
+        out_counts = np.zeros(n_keys, dtype="int64")
+        out_counts[rank] = counts
+        offsets = np.zeros(n_keys + 1, dtype="int64")
+        np.cumsum(out_counts, out=offsets[1:])
+        total = int(offsets[-1])
+        rows_out = np.lib.format.open_memmap(rows_path, mode="w+", dtype=rows_dtype, shape=(total,))
+        vals_out = (np.lib.format.open_memmap(vals_path, mode="w+", dtype=vals_dtype, shape=(total,))
+                    if vals_path else None)
+        fill = np.zeros(n_keys, dtype="int64")
+        for path in self._runs:
+            with np.load(path) as run:
+                k = rank[run["keys"]]
+                starts = np.flatnonzero(np.r_[True, k[1:] != k[:-1]])
+                group = np.repeat(np.arange(starts.size), np.diff(np.r_[starts, k.size]))
+                pos = offsets[k] + fill[k] + (np.arange(k.size) - starts[group])
+                rows_out[pos] = run["rows"]
+                if vals_out is not None:
+                    vals_out[pos] = run["vals"]
+                fill[k[starts]] += np.diff(np.r_[starts, k.size])
+        rows_out.flush()
+        del rows_out
+        if vals_out is not None:
+            vals_out.flush()
+            del vals_out
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+        self._runs = []
+        return offsets, out_counts
+
+
+def swap_dir(new: str, d: str):
+    """완성된 new 디렉토리로 d 교체 (기존 d 의 파일을 mmap 으로 연 객체는 닫힐 때까지 유효)"""
+    old = d + ".old"
+    shutil.rmtree(old, ignore_errors=True)
+    if os.path.isdir(d):
+        os.rename(d, old)
+    os.rename(new, d)
+    shutil.rmtree(old, ignore_errors=True)
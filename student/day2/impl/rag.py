@@ -1,12 +1,22 @@
 # -*- coding: utf-8 -*-
 from __future__ import annotations
 import os, json
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Any, List
 import numpy as np
 
 from student.common.schemas import Day2Plan
 from .embeddings import Embeddings
 from .store import FaissStore
+from .session import get_session
+from .manifest import read_manifest, check_compat
+from .chunkstore import chunkstore_exists
+from .versions import resolve_index_dir
+from .shared import shared_root
+from .bm25 import rrf_fuse
+from .diversify import mmr_select, merge_adjacent, chunk_overlap_of
+from .batcher import get_batcher
+from .federation import is_federated, get_router, collection_dir
 
 def _idx_paths(index_dir: str):
     return (
@@ -14,22 +24,33 @@ def _idx_paths(index_dir: str):
         os.path.join(index_dir, "docs.jsonl"),
     )
 
-def _load_store(plan: Day2Plan, emb: Embeddings) -> FaissStore:
-    index_path, docs_path = _idx_paths(plan.index_dir)
-    if not (os.path.exists(index_path) and os.path.exists(docs_path)):
-        raise FileNotFoundError(f"FAISS 인덱스가 없습니다. 먼저 ingest를 실행하세요: {plan.index_dir}")
-    store = FaissStore.load(index_path, docs_path)
-    # 차원 체크
-    test_dim = emb.encode(["__dim_check__"]).shape[1]
-    if store.dim != test_dim:
-        raise ValueError(f"임베딩 차원이 인덱스와 다릅니다. (index={store.dim}, embedder={test_dim})")
+def _load_store(index_dir: str, emb: Embeddings, mmap: bool = False, warmup: bool = False) -> FaissStore:
+    index_dir = resolve_index_dir(index_dir)  # 버전 레이아웃이면 CURRENT 가 가리키는 디렉토리
+    index_path, docs_path = _idx_paths(index_dir)
+    if not (os.path.exists(index_path) and (chunkstore_exists(index_dir) or os.path.exists(docs_path))):
+        raise FileNotFoundError(f"FAISS 인덱스가 없습니다. 먼저 ingest를 실행하세요: {index_dir}")
+    # 매니페스트로 호환성 검증 (프로브 임베딩 호출 없음 → 로딩 전에 빠르게 실패)
+    manifest = read_manifest(index_dir)
+    if manifest is not None:
+        check_compat(manifest, int(manifest.get("dim", 0)), getattr(emb, "model", None))
+    store = FaissStore.load(index_path, docs_path, mmap=mmap, warmup=warmup)
+    check_compat(manifest, store.dim, getattr(emb, "model", None))
     return store
 
 def _gate(contexts: List[Dict[str, Any]], plan: Day2Plan) -> Dict[str, Any]:
-    if not contexts:
+    return _gate_scores([c["score"] for c in contexts], plan)
+
+def _gate_scores(scores, plan: Day2Plan) -> Dict[str, Any]:
+    """점수 목록(순위 순)만으로 게이트 판정 → 청크 텍스트 조회 전에도 사용 가능"""
+    scores = [float(x) for x in scores]
+    if not scores:
         return {"status":"insufficient","top_score":0.0,"mean_topk":0.0}
-    top_score = float(contexts[0]["score"])
-    mean_topk = float(np.mean([c["score"] for c in contexts[:plan.top_k]]))
+    top_score = float(max(scores))
+    top = scores[:plan.top_k]
+    if plan.score_floor > 0:
+        # 범위 검색은 floor 미만 hit 를 돌려주지 않음 → 빈 자리를 0 으로 채워 평균이 부풀지 않게 함
+        top += [0.0] * (plan.top_k - len(top))
+    mean_topk = float(np.mean(top))
     if top_score >= plan.min_score and mean_topk >= plan.min_mean_topk:
         return {"status":"enough","top_score":top_score,"mean_topk":mean_topk}
     return {"status":"insufficient","top_score":top_score,"mean_topk":mean_topk}
@@ -46,19 +67,152 @@ def _draft_answer(query: str, contexts: List[Dict[str, Any]], plan: Day2Plan) ->
             break
     return f"질의: {query}\n\n핵심 근거 요약:\n" + "\n".join(buf) if buf else ""
 
+def _hybrid_ids(store: FaissStore, query: str, qv: np.ndarray, plan: Day2Plan, k: int):
+    """
+    벡터 후보 + BM25 후보를 RRF 로 융합 → 상위 k 개 (scores, ids, fused)
+    - 순서는 융합 점수, scores 는 게이트 비교를 위해 코사인 값 유지 (BM25 전용 후보는 정확 재계산)
+    """
+    n_cand = max(plan.hybrid_candidates, k)
+    filters = plan.filters or None
+    v_scores, v_ids = store.search_ids(qv, n_cand, nprobe=plan.nprobe, ef_search=plan.ef_search, filter=filters)
+    allow = store.filter_mask(filters) if filters else None
+    _, l_ids = store.bm25.search(query, n_cand, exclude=store.tombstones, allow=allow)
+    fused = rrf_fuse([v_ids, l_ids], k=plan.rrf_k, top_k=k)
+    ids = np.array([i for i, _ in fused], dtype="int64")
+    cos = dict(zip(v_ids.tolist(), v_scores.tolist()))
+    missing = np.array([i for i in ids.tolist() if i not in cos], dtype="int64")
+    cos.update(zip(missing.tolist(), store.exact_scores(qv, missing).tolist()))
+    scores = np.array([cos[i] for i in ids.tolist()], dtype="float32")
+    return scores, ids, np.array([f for _, f in fused], dtype="float32")
+
+def _plain(plan: Day2Plan) -> bool:
+    """벡터 검색만으로 끝나는 계획인지 (마이크로 배치에서 FAISS 검색까지 묶을 수 있음)"""
+    return not (plan.hybrid or plan.mmr or plan.filters)
+
+def _floor(scores: np.ndarray, ids: np.ndarray, plan: Day2Plan, fused=None):
+    """score_floor 미만 hit 제거"""
+    if plan.score_floor <= 0:
+        return scores, ids, fused
+    keep = scores >= plan.score_floor
+    return scores[keep], ids[keep], (fused[keep] if fused is not None else None)
+
+def _search(store: FaissStore, query: str, qv: np.ndarray, plan: Day2Plan):
+    """
+    id 수준 검색 → (scores, ids, fused|None). 청크 텍스트는 읽지 않음
+    - score_floor > 0 이면 범위 검색 (임계값 이상만, 상한 k)
+    - MMR 은 후보 mmr_candidates 개를 id/벡터 수준에서 top_k 개로 고름
+    """
+    k = max(plan.top_k, plan.mmr_candidates) if plan.mmr else plan.top_k
+    fused = None
+    if plan.hybrid and store.bm25 is not None:
+        scores, ids, fused = _hybrid_ids(store, query, qv, plan, k)
+        scores, ids, fused = _floor(scores, ids, plan, fused)
+    elif plan.score_floor > 0:
+        scores, ids = store.range_search_ids(qv, plan.score_floor, k, nprobe=plan.nprobe,
+                                             ef_search=plan.ef_search, filter=plan.filters or None)
+    else:
+        scores, ids = store.search_ids(qv, k, nprobe=plan.nprobe, ef_search=plan.ef_search,
+                                       filter=plan.filters or None)
+    if plan.mmr and ids.size > 1:
+        pick = mmr_select(qv, store.vectors(ids), scores, plan.top_k,
+                          lam=plan.mmr_lambda, dup_threshold=plan.dup_threshold)
+        scores, ids = scores[pick], ids[pick]
+        fused = fused[pick] if fused is not None else None
+    return scores, ids, fused
+
+def _materialize(store: FaissStore, plan: Day2Plan, scores: np.ndarray, ids: np.ndarray, fused=None):
+    """청크 조회 → (선택) 인접 청크 병합"""
+    contexts = store.materialize(scores, ids)
+    if fused is not None:
+        for c, f in zip(contexts, fused):
+            c["fused_score"] = float(f)
+    if plan.merge_adjacent:
+        contexts = merge_adjacent(contexts, overlap=chunk_overlap_of(store.build_info))
+    return contexts
+
+def _early_reject(scores, plan: Day2Plan):
+    """early_gate: 청크 조회 전 점수만으로 insufficient 판정되면 게이트 결과 반환, 아니면 None"""
+    if not plan.early_gate or plan.force_rag_only:
+        return None
+    gate = _gate_scores(scores, plan)
+    return gate if gate["status"] == "insufficient" else None
+
+_FED_POOL = ThreadPoolExecutor(max_workers=8, thread_name_prefix="day2-fed")  # FAISS 검색은 GIL 해제
+
+def _federated(query: str, plan: Day2Plan):
+    """
+    연합 인덱스: 질의 벡터를 중심이 가까운 route_top 개 컬렉션으로 보내 병렬 검색 후 코사인 점수로 병합
+    - 각 하위 인덱스는 자체 세션(상주/버전 교체)을 가짐. 임베딩은 1회만 계산
+    - 병합은 id 수준에서 먼저 하고 전체 top_k 에 든 hit 만 청크 조회 → (contexts, 조기 게이트|None)
+    """
+    router = get_router(plan.index_dir)
+    sessions = {n: get_session(collection_dir(plan.index_dir, n), plan.embedding_model, _load_store,
+                               mmap=plan.index_mmap, warmup=plan.index_warmup) for n in router.names}
+    if not sessions:
+        return [], None
+    _, emb = next(iter(sessions.values())).current()  # 컬렉션 임베딩 모델/차원은 get_router 가 동일함을 검증
+    qv = emb.encode([query])[0]
+
+    def run(name: str):
+        store = sessions[name].store()
+        return (name, store) + _search(store, query, qv, plan)
+
+    hits = []  # (score, 컬렉션, store, 위치, scores, ids, fused)
+    for name, store, scores, ids, fused in _FED_POOL.map(run, router.route(qv, plan.route_top)):
+        hits.extend((float(sc), name, store, j, scores, ids, fused) for j, sc in enumerate(scores))
+    hits.sort(key=lambda h: -h[0])
+    hits = hits[:plan.top_k]
+    gate = _early_reject([h[0] for h in hits], plan)
+    if gate is not None:
+        return [], gate
+    contexts, overlaps = [], set()
+    for score, name, store, j, scores, ids, fused in hits:
+        overlaps.add(chunk_overlap_of(store.build_info))
+        c = _materialize(store, plan, scores[j:j + 1], ids[j:j + 1],
+                         fused[j:j + 1] if fused is not None else None)[0]
+        c["meta"] = {**c.get("meta", {}), "collection": name}
+        contexts.append(c)
+    if plan.merge_adjacent:
+        # 같은 path 는 같은 컬렉션 → 겹침 길이가 컬렉션마다 다르면 최소 일치 길이 규칙으로
+        contexts = merge_adjacent(contexts, overlap=overlaps.pop() if len(overlaps) == 1 else None)
+    return contexts, None
+
 class Day2Agent:
     def __init__(self, plan_defaults: Day2Plan = Day2Plan()):
         self.plan_defaults = plan_defaults
 
     def handle(self, query: str, plan: Day2Plan = None) -> Dict[str, Any]:
         plan = plan or self.plan_defaults
-        emb = Embeddings(model=plan.embedding_model)
-
-        store = _load_store(plan, emb)
-        qv = emb.encode([query])[0]
-        contexts = store.search(qv, top_k=plan.top_k)
+        if is_federated(plan.index_dir):
+            contexts, gate = _federated(query, plan)
+            return self._respond(query, plan, contexts, gate)
+        # 프로세스 전역 세션: 인덱스/임베더 상주, 파일 변경 시에만 재로딩
+        if plan.shared_index:
+            # 발행자 프로세스가 올린 공유 세그먼트를 mmap 으로 참조 (워커 수와 무관하게 메모리 1벌)
+            session = get_session(shared_root(plan.shared_index), plan.embedding_model, _load_store,
+                                  shared=True, mmap=True, warmup=plan.index_warmup)
+        else:
+            session = get_session(plan.index_dir, plan.embedding_model, _load_store,
+                                  mmap=plan.index_mmap, warmup=plan.index_warmup)
+        if plan.micro_batch:
+            # 동시 요청과 묶어 임베딩 1회 + FAISS 다중 질의 검색 1회
+            spec = (plan.top_k, plan.nprobe, plan.ef_search) if _plain(plan) else None
+            batcher = get_batcher(session, plan.batch_window_ms, plan.batch_max)
+            store, qv, hit = batcher.submit(query, spec).result()
+            scores, ids, fused = _floor(*hit, plan) if hit is not None else _search(store, query, qv, plan)
+        else:
+            store, emb = session.current()
+            qv = emb.encode([query])[0]
+            scores, ids, fused = _search(store, query, qv, plan)
+        # 조기 게이트: 무관한 질의는 청크 텍스트를 읽지 않고 바로 insufficient 응답
+        gate = _early_reject(scores, plan)
+        if gate is not None:
+            return self._respond(query, plan, [], gate)
+        return self._respond(query, plan, _materialize(store, plan, scores, ids, fused))
 
-        gate = _gate(contexts, plan)
+    def _respond(self, query: str, plan: Day2Plan, contexts: List[Dict[str, Any]],
+                 gate: Dict[str, Any] | None = None) -> Dict[str, Any]:
+        gate = gate or _gate(contexts, plan)
         payload: Dict[str, Any] = {
             "type": "rag_answer",
             "query": query,
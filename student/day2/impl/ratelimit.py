@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+"""
+임베딩 API 호출 속도 제어
+- TokenBucket: 초당 rate 로 채워지는 버킷 (RPM: 요청 1개 = 1, TPM: 요청 토큰 수만큼 소비)
+- RateLimiter: RPM/TPM 버킷 2개 + Retry-After 에 따른 전체 일시 정지
+- AdaptiveConcurrency: 동시 요청 수 한도. 429 시 절반(곱셈 감소), 연속 성공 시 1씩 증가(덧셈 증가)
+"""
+
+from __future__ import annotations
+import time, threading
+
+
+class TokenBucket:
+    def __init__(self, per_minute: float, burst: float | None = None):
+        self.rate = per_minute / 60.0
+        self.capacity = float(burst if burst is not None else per_minute)
+        self.level = self.capacity
+        self.stamp = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self.level = min(self.capacity, self.level + (now - self.stamp) * self.rate)
+        self.stamp = now
+
+    def acquire(self, n: float = 1.0):
+        """n 만큼 소비 가능할 때까지 대기 (버킷보다 큰 요청은 버킷 전체를 소비)"""
+        n = min(float(n), self.capacity)
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self.level >= n:
+                    self.level -= n
+                    return
+                wait = (n - self.level) / self.rate
+            time.sleep(min(wait, 1.0))
+
+
+class RateLimiter:
+    def __init__(self, rpm: float, tpm: float):
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self._resume_at = 0.0
+        self._lock = threading.Lock()
+        self.throttled = 0  # 429 횟수 (통계)
+
+    def pause(self, seconds: float):
+        """Retry-After: 모든 워커의 다음 요청을 seconds 뒤로 미룸"""
+        with self._lock:
+            self._resume_at = max(self._resume_at, time.monotonic() + seconds)
+            self.throttled += 1
+
+    def acquire(self, n_tokens: int):
+        while True:
+            wait = self._resume_at - time.monotonic()
+            if wait <= 0:
+                break
+            time.sleep(wait)
+        self.requests.acquire(1)
+        self.tokens.acquire(n_tokens)
+
+
+class AdaptiveConcurrency:
+    def __init__(self, max_limit: int, increase_every: int = 8):
+        self.max_limit = max(1, max_limit)
+        self.limit = self.max_limit
+        self.active = 0
+        self.increase_every = increase_every
+        self._ok = 0
+        self._cond = threading.Condition()
+
+    def __enter__(self):
+        with self._cond:
+            while self.active >= self.limit:
+                self._cond.wait()
+            self.active += 1
+        return self
+
+    def __exit__(self, *exc):
+        with self._cond:
+            self.active -= 1
+            self._cond.notify_all()
+
+    def success(self):
+        with self._cond:
+            self._ok += 1
+            if self._ok >= self.increase_every and self.limit < self.max_limit:
+                self.limit += 1
+                self._ok = 0
+                self._cond.notify_all()
+
+    def throttle(self):
+        with self._cond:
+            self.limit = max(1, self.limit // 2)
+            self._ok = 0
+
+
+def retry_after_seconds(exc: Exception) -> float | None:
+    """예외의 HTTP 응답 헤더(retry-after-ms / retry-after)에서 대기 시간 추출"""
+    headers = getattr(getattr(exc, "response", None), "headers", None) or {}
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000.0
+        if headers.get("retry-after"):
+            return float(headers["retry-after"])
+    except (TypeError, ValueError):
+        return None
+    return None
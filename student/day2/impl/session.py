@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+"""
+Day2 검색 세션 (프로세스 전역 캐시)
+- 목표: 질의마다 FAISS 인덱스/청크 저장소/임베더를 다시 만들지 않고 상주시킨다.
+- 인덱스 파일의 (mtime, size) 또는 CURRENT 버전이 바뀌었을 때만 자동 재로딩
+  (교체는 질의 사이에 일어나며, 진행 중인 질의는 이전 store 를 끝까지 사용)
+- 여러 스레드에서 공유해도 안전 (로딩은 락으로 직렬화, 검색은 스냅샷 참조)
+- lease 가 있으면(공유 메모리 모드) 현재 로딩된 버전에 임대를 유지 → 발행자가 사용 중 버전을 지우지 않음
+"""
+
+from __future__ import annotations
+import os, threading
+from typing import Dict, Any, Tuple, Callable, Optional
+
+from .embeddings import Embeddings
+from .store import FaissStore
+from .versions import resolve_index_dir
+from .manifest import read_manifest
+from .shared import SharedIndexLease
+
+
+def _file_sig(path: str) -> Tuple[int, int]:
+    try:
+        st = os.stat(path)
+        return (st.st_mtime_ns, st.st_size)
+    except FileNotFoundError:
+        return (0, -1)
+
+
+class Day2Session:
+    """
+    (index_dir, embedding_model) 하나에 대응하는 상주 세션
+    - store(): 최신 FaissStore 반환 (변경 감지 시 재로딩)
+    - embedder: 재사용되는 Embeddings 인스턴스
+    """
+
+    def __init__(self, index_dir: str, embedding_model: str | None,
+                 loader: Callable[..., FaissStore], load_opts: Optional[Dict[str, Any]] = None,
+                 lease: Optional[SharedIndexLease] = None):
+        self.index_dir = index_dir
+        self.embedding_model = embedding_model
+        self._loader = loader
+        self.load_opts = dict(load_opts or {})
+        self._lock = threading.RLock()  # store() 가 락을 쥔 채 embedder 를 생성할 수 있음
+        self._embedder: Optional[Embeddings] = None
+        self._store: Optional[FaissStore] = None
+        self._sig: Tuple = ()
+        self.reloads = 0
+        self.lease = lease
+
+    @staticmethod
+    def _watch_paths(index_dir: str):
+        return (
+            os.path.join(index_dir, "faiss.index"),
+            os.path.join(index_dir, "docs.jsonl"),
+            os.path.join(index_dir, "chunks.idx"),
+            os.path.join(index_dir, "manifest.json"),
+        )
+
+    def _signature(self) -> Tuple:
+        # (현재 버전 디렉토리, 파일 서명들) — 버전 레이아웃이 아니면 index_dir 그대로
+        resolved = resolve_index_dir(self.index_dir)
+        return (resolved,) + tuple(_file_sig(p) for p in self._watch_paths(resolved))
+
+    @property
+    def embedder(self) -> Embeddings:
+        emb = self._embedder
+        if emb is None:
+            with self._lock:
+                if self._embedder is None:
+                    # 인덱스가 축소 차원으로 만들어졌으면 질의 임베딩도 같은 차원으로
+                    manifest = read_manifest(resolve_index_dir(self.index_dir)) or {}
+                    self._embedder = Embeddings(model=self.embedding_model,
+                                                dimensions=manifest.get("embedding_dimensions"))
+                emb = self._embedder
+        return emb
+
+    def store(self) -> FaissStore:
+        sig = self._signature()
+        store = self._store
+        if store is not None and sig == self._sig:
+            return store
+        with self._lock:
+            # 다른 스레드가 먼저 재로딩했을 수 있으므로 다시 확인
+            sig = self._signature()
+            if self._store is None or sig != self._sig:
+                dims = (read_manifest(sig[0]) or {}).get("embedding_dimensions")
+                if self._embedder is not None and self._embedder.dimensions != dims:
+                    self._embedder = None  # 임베딩 차원이 다른 버전으로 교체됨 → 질의 임베더 재생성
+                if self.lease is not None:
+                    self.lease.move(sig[0])  # 로딩 전에 임대 → 로딩 중 회수 방지
+                self._store = self._loader(sig[0], self.embedder, **self.load_opts)
+                self._sig = sig
+                self.reloads += 1
+            return self._store
+
+    def current(self) -> Tuple[FaissStore, Embeddings]:
+        """
+        (store, embedder) 쌍: store() 가 먼저 → 차원이 다른 버전으로 교체되며 재생성된 embedder 를 받음
+        (embedder 를 먼저 읽으면 교체 전 차원으로 질의를 임베딩할 수 있음)
+        """
+        store = self.store()
+        return store, self.embedder
+
+    def invalidate(self):
+        with self._lock:
+            self._store = None
+            self._sig = ()
+
+
+_SESSIONS: Dict[Tuple, Day2Session] = {}
+_SESSIONS_LOCK = threading.Lock()
+
+
+def get_session(index_dir: str, embedding_model: str | None,
+                loader: Callable[..., FaissStore], shared: bool = False, **load_opts: Any) -> Day2Session:
+    """
+    프로세스 전역 세션 조회/생성 (load_opts: 로더에 전달할 옵션, 예: mmap/warmup)
+    - shared=True: index_dir 은 공유 세그먼트 루트(shared_root(name)), 버전 임대를 유지
+    """
+    key = (os.path.abspath(index_dir), embedding_model or "", shared, tuple(sorted(load_opts.items())))
+    sess = _SESSIONS.get(key)
+    if sess is None:
+        with _SESSIONS_LOCK:
+            sess = _SESSIONS.get(key)
+            if sess is None:
+                lease = SharedIndexLease(index_dir) if shared else None
+                sess = Day2Session(index_dir, embedding_model, loader, load_opts, lease)
+                _SESSIONS[key] = sess
+    return sess
+
+
+def clear_sessions():
+    """테스트/재시작용: 모든 세션 제거"""
+    with _SESSIONS_LOCK:
+        for sess in _SESSIONS.values():
+            if sess.lease is not None:
+                sess.lease.release()
+        _SESSIONS.clear()
+
@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+"""
+여러 워커 프로세스가 하나의 Day2 인덱스를 공유 (공유 메모리 + 읽기 전용 mmap)
+- 로더(발행자) 프로세스: 현재 인덱스 버전을 /dev/shm/<name>/versions/<버전> 으로 한 번 복사 후 CURRENT 교체
+  → tmpfs 페이지가 곧 공유 메모리. 워커는 이를 mmap 으로 열기 때문에 복사본이 생기지 않음
+  (FAISS 인덱스: IO_FLAG_MMAP, 청크 저장소/BM25/메타/원본 벡터: np.memmap)
+- 워커: Day2Plan.shared_index=<name> 이면 세션이 공유 루트를 mmap 으로 로딩하고
+  현재 사용 중인 버전에 임대(lease) 파일을 남김 → 버전 교체 시 새 버전으로 옮김
+- 참조 카운트: leases/<버전>/<pid>-<토큰> 파일 수 (죽은 pid 는 무시)
+  발행자는 CURRENT 가 아니고 살아있는 임대가 없는 버전만 삭제
+"""
+
+from __future__ import annotations
+import os, time, uuid, shutil, argparse, tempfile
+from typing import List
+
+from .versions import (
+    new_version_dir, publish as publish_version, list_versions, current_version, resolve_index_dir,
+)
+
+SHM_BASE = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+LEASES_DIR = "leases"
+
+
+def shared_root(name: str) -> str:
+    return os.path.join(SHM_BASE, f"day2_{name}")
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def live_leases(root: str, version: str) -> List[str]:
+    d = os.path.join(root, LEASES_DIR, version)
+    if not os.path.isdir(d):
+        return []
+    out = []
+    for fn in os.listdir(d):
+        try:
+            pid = int(fn.split("-", 1)[0])
+        except ValueError:
+            continue
+        if _pid_alive(pid):
+            out.append(fn)
+        else:
+            # 비정상 종료한 워커의 임대 정리
+            try:
+                os.remove(os.path.join(d, fn))
+            except FileNotFoundError:
+                pass
+    return out
+
+
+class SharedIndexLease:
+    """워커 측 임대: 사용 중인 버전 디렉토리에 대한 참조 1개"""
+
+    def __init__(self, root: str):
+        self.root = root
+        self.token = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self.path: str | None = None
+
+    def move(self, index_dir: str):
+        """index_dir(=versions/<버전>) 로 임대 이동 (새 임대 먼저 만들고 이전 임대 해제)"""
+        version = os.path.basename(os.path.normpath(index_dir))
+        d = os.path.join(self.root, LEASES_DIR, version)
+        os.makedirs(d, exist_ok=True)
+        path = os.path.join(d, self.token)
+        if path == self.path:
+            return
+        with open(path, "w") as f:
+            f.write(str(time.time()))
+        old, self.path = self.path, path
+        if old:
+            try:
+                os.remove(old)
+            except FileNotFoundError:
+                pass
+
+    def release(self):
+        if self.path:
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+            self.path = None
+
+    def __del__(self):
+        self.release()
+
+
+class SharedIndexPublisher:
+    """로더 프로세스 측: 공유 세그먼트에 인덱스 버전 발행 / 미사용 버전 회수"""
+
+    def __init__(self, name: str = "day2"):
+        self.name = name
+        self.root = shared_root(name)
+        os.makedirs(self.root, exist_ok=True)
+
+    def publish(self, index_dir: str) -> str:
+        """index_dir(버전 레이아웃이면 CURRENT)의 파일을 공유 세그먼트로 복사 후 발행. 버전 이름 반환"""
+        src = resolve_index_dir(index_dir)
+        version, staging = new_version_dir(self.root)
+        try:
+            for cur, _, files in os.walk(src):
+                rel = os.path.relpath(cur, src)
+                dst = os.path.join(staging, rel) if rel != "." else staging
+                os.makedirs(dst, exist_ok=True)
+                for fn in files:
+                    shutil.copyfile(os.path.join(cur, fn), os.path.join(dst, fn))
+        except Exception:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+        # 정리는 임대를 보고 collect() 에서 수행 (keep 을 크게 주어 자동 삭제 방지)
+        publish_version(self.root, version, keep=1 << 30)
+        self.collect()
+        return version
+
+    def collect(self) -> List[str]:
+        """CURRENT 가 아니고 살아있는 임대가 없는 버전 삭제. 삭제한 버전 목록 반환"""
+        cur = current_version(self.root)
+        removed = []
+        for v in list_versions(self.root):
+            if v != cur and not live_leases(self.root, v):
+                shutil.rmtree(os.path.join(self.root, "versions", v), ignore_errors=True)
+                shutil.rmtree(os.path.join(self.root, LEASES_DIR, v), ignore_errors=True)
+                removed.append(v)
+        return removed
+
+    def refcounts(self):
+        return {v: len(live_leases(self.root, v)) for v in list_versions(self.root)}
+
+    def close(self):
+        """공유 세그먼트 전체 제거 (살아있는 임대가 있으면 거부)"""
+        busy = {v: n for v, n in self.refcounts().items() if n}
+        if busy:
+            raise RuntimeError(f"사용 중인 버전이 있어 제거할 수 없습니다: {busy}")
+        shutil.rmtree(self.root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Day2 인덱스를 공유 메모리 세그먼트로 발행")
+    ap.add_argument("--index_dir", default="indices/day2")
+    ap.add_argument("--name", default="day2")
+    ap.add_argument("--watch", type=float, default=0.0, help="N초마다 원본 CURRENT 변경 감시 후 재발행 (0=1회)")
+    args = ap.parse_args()
+
+    pub = SharedIndexPublisher(args.name)
+    last = None
+    while True:
+        src = resolve_index_dir(args.index_dir)
+        if src != last:
+            print(f"published {pub.publish(args.index_dir)} → {pub.root}")
+            last = src
+        else:
+            pub.collect()
+        if args.watch <= 0:
+            break
+        time.sleep(args.watch)
@@ -1,53 +1,717 @@
 # -*- coding: utf-8 -*-
-import os, json
+import os, json, threading
 from typing import List, Dict, Any, Tuple
 import numpy as np
 import faiss
 
+from .manifest import make_manifest, write_manifest, read_manifest
+from .chunkstore import ChunkStore, ChunkStoreWriter, write_chunkstore, write_chunk_updates, chunkstore_exists
+from .bm25 import BM25Index, BM25Writer, update_bm25
+from .metaindex import MetaIndex, MetaIndexWriter, update_meta_index
+
+# ---------- 인덱스 타입 ----------
+# flat: 완전 탐색(정확) / ivf: 역색인 클러스터(IVF-Flat) / hnsw: 그래프 탐색
+INDEX_TYPES = ("auto", "flat", "ivf", "hnsw")
+AUTO_FLAT_MAX = 20_000        # 이하이면 flat 이 가장 빠르고 정확
+AUTO_HNSW_MAX = 1_000_000     # 이하이면 hnsw, 초과하면 ivf (메모리/학습 비용 고려)
+TRAIN_POINTS_PER_LIST = 64    # IVF 학습 샘플 수 = nlist * 64 (상한 = 전체 벡터 수)
+TRAIN_POINTS_CODEC = 256 * 64 # SQ/PQ 코덱 학습 샘플 수 (PQ 코드북 256개 × 64)
+PQ_NBITS = 8                  # PQ 코드 비트 수 (코드북 2^8 = 256 → 학습 벡터 256개 이상 필요)
+MIN_PQ_NBITS = 4              # 벡터가 적으면 비트 수를 낮춰 학습, 이보다 작아야 하면 PQ 대신 sq8/flat
+
+# ---------- 벡터 저장 방식 ----------
+# flat: float32 원본 / fp16: 반정밀도 / sq8: 8bit 스칼라 양자화 / pq: 곱 양자화
+# 압축 모드는 후보를 rerank_factor 배 더 가져온 뒤 디스크의 원본 벡터(vectors.npy)로 정확히 재채점
+STORAGE_TYPES = ("flat", "fp16", "sq8", "pq")
+VECTORS_NAME = "vectors.npy"
+SPILL_NAME = "vectors.spill"  # 스트리밍 빌드 중 벡터 스풀 (float32 행 연속, 끝에 인덱스 생성 + vectors.npy 로 변환)
+SPILL_BLOCK = 65536           # 스풀 → 인덱스/vectors.npy 복사 단위 (행 수)
+TOMBSTONES_NAME = "tombstones.npy"  # 삭제/변경된 청크 id (증분 갱신, compact 전까지 검색에서 제외)
+# 2단계(Matryoshka) 검색: coarse_dim 을 주면 앞쪽 coarse_dim 차원(재정규화)으로 FAISS 후보 검색 후
+# 원본 전체 차원 벡터(vectors.npy)로 재채점 (text-embedding-3 계열은 앞부분 차원만으로도 의미 보존)
+COARSE_DIMS = (256, 512)
+_MANIFEST_DERIVED = ("version", "dim", "count", "metric", "built_at")  # make_manifest 가 채우는 항목
+UPDATE_OVERLAY_RATIO = 0.2  # 덮어 읽는 레코드(chunks.upd.jsonl)가 이 비율을 넘으면 증분 저장 대신 전체 재작성
+
+
+def choose_index_type(n: int) -> str:
+    """벡터 수(ntotal) 기준 자동 선택"""
+    if n <= AUTO_FLAT_MAX:
+        return "flat"
+    if n <= AUTO_HNSW_MAX:
+        return "hnsw"
+    return "ivf"
+
+
+def default_nlist(n: int) -> int:
+    # 경험칙: 4*sqrt(n), 리스트당 최소 39개 학습 포인트 확보
+    return int(max(1, min(4 * np.sqrt(max(n, 1)), n // 39 or 1)))
+
+
+def default_pq_m(dim: int) -> int:
+    # 서브벡터당 16차원 근처, dim 의 약수여야 함 (1536 → 96 bytes/vector)
+    m = max(1, dim // 16)
+    while dim % m:
+        m -= 1
+    return m
+
+
+def pq_nbits_for(n: int) -> int:
+    """학습 벡터 n 개로 k-means 가 가능한 PQ 비트 수 (코드북 크기 2^nbits ≤ n)"""
+    return min(PQ_NBITS, int(np.log2(max(n, 1))))
+
+
+def _codec_string(storage: str, dim: int, pq_m: int | None, pq_nbits: int = PQ_NBITS) -> str:
+    if storage == "flat":
+        return "Flat"
+    if storage == "fp16":
+        return "SQfp16"
+    if storage == "sq8":
+        return "SQ8"
+    if storage == "pq":
+        return f"PQ{pq_m or default_pq_m(dim)}" + (f"x{pq_nbits}" if pq_nbits != PQ_NBITS else "")
+    raise ValueError(f"지원하지 않는 storage: {storage} (가능: {STORAGE_TYPES})")
+
+
+def _factory_string(index_type: str, n: int, nlist: int | None, hnsw_m: int,
+                    storage: str = "flat", dim: int = 0, pq_m: int | None = None,
+                    pq_nbits: int = PQ_NBITS) -> str:
+    codec = _codec_string(storage, dim, pq_m, pq_nbits)
+    if index_type == "flat":
+        return codec
+    if index_type == "ivf":
+        # 클러스터 수 > 학습 벡터 수 이면 k-means 가 실패 → 벡터 수로 제한
+        return f"IVF{min(nlist or default_nlist(n), max(n, 1))},{codec}"
+    if index_type == "hnsw":
+        return f"HNSW{hnsw_m},{codec}"
+    raise ValueError(f"지원하지 않는 index_type: {index_type} (가능: {INDEX_TYPES})")
+
+
+def exact_topk(Q: np.ndarray, X: np.ndarray, k: int, block: int = 65536) -> np.ndarray:
+    """
+    정확 내적 top-k id (q, k). X(메모리 배열 또는 memmap)를 블록 단위로 훑어 후보를 병합
+    → 메모리 O(q * (k + block)) (압축 리포트/벤치마크의 정답)
+    """
+    best_s = np.full((Q.shape[0], 0), -np.inf, dtype="float32")
+    best_i = np.zeros((Q.shape[0], 0), dtype="int64")
+    for s in range(0, X.shape[0], block):
+        S = Q @ np.asarray(X[s:s + block], dtype="float32").T
+        cat_s = np.concatenate([best_s, S], axis=1)
+        cat_i = np.concatenate([best_i, np.broadcast_to(np.arange(s, s + S.shape[1]), S.shape)], axis=1)
+        kk = min(k, cat_s.shape[1])
+        part = np.argpartition(-cat_s, kk - 1, axis=1)[:, :kk]
+        best_s = np.take_along_axis(cat_s, part, axis=1)
+        best_i = np.take_along_axis(cat_i, part, axis=1)
+    order = np.argsort(-best_s, axis=1)
+    return np.take_along_axis(best_i, order, axis=1)
+
+
+def _update_docs_jsonl(path: str, base: int, new_items: List[Dict[str, Any]], updates: Dict[int, Dict[str, Any]]):
+    """docs.jsonl 증분 갱신: 새 행은 뒤에 추가, 바뀐 행이 있으면 줄 단위 복사(디코딩 없음)로 그 줄만 교체"""
+    lines = (json.dumps(it, ensure_ascii=False) + "\n" for it in new_items)
+    if not updates:
+        with open(path, "a", encoding="utf-8") as f:
+            f.writelines(lines)
+        return
+    with open(path, "rb") as src, open(path + ".tmp", "wb") as dst:
+        for row, line in enumerate(src):
+            if row >= base:
+                break
+            if row in updates:
+                line = (json.dumps(updates[row], ensure_ascii=False) + "\n").encode("utf-8")
+            dst.write(line)
+        dst.writelines(l.encode("utf-8") for l in lines)
+    os.replace(path + ".tmp", path)
+
+
+def _is_mapped(index) -> bool:
+    """코드가 파일 매핑인지: IVF 는 디스크 역색인 리스트, 그 외(HNSW 는 저장 인덱스)는 힙 소유가 아닌 코드 배열"""
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None:
+        return isinstance(faiss.downcast_InvertedLists(ivf.invlists), faiss.OnDiskInvertedLists)
+    index = faiss.downcast_index(index)
+    if isinstance(index, faiss.IndexHNSW):
+        index = faiss.downcast_index(index.storage)
+    codes = getattr(index, "codes", None)
+    return codes is not None and getattr(codes, "is_owned", True) is False
+
+
+def _detect_index_type(index) -> str:
+    if faiss.try_extract_index_ivf(index) is not None:
+        return "ivf"
+    if isinstance(index, faiss.IndexHNSW):
+        return "hnsw"
+    return "flat"
+
+
 class FaissStore:
-    def __init__(self, dim: int, index_path: str, docs_path: str):
+    def __init__(self, dim: int, index_path: str, docs_path: str,
+                 index_type: str = "flat", nlist: int | None = None, hnsw_m: int = 32,
+                 nprobe: int = 16, ef_search: int = 64,
+                 storage: str = "flat", pq_m: int | None = None, rerank_factor: int = 4,
+                 chunk_block_size: int = 1, chunk_compress: bool = False, chunk_cache: int = 1024,
+                 lexical: bool = False, coarse_dim: int | None = None):
         self.dim = dim
+        self.coarse_dim = coarse_dim if coarse_dim and coarse_dim < dim else None
         self.index_path = index_path
         self.docs_path = docs_path
-        self.index = faiss.IndexFlatIP(dim)  # 코사인=내적 (임베딩 정규화 가정)
-        self.docs: List[Dict[str, Any]] = []
+        if index_type not in INDEX_TYPES:
+            raise ValueError(f"지원하지 않는 index_type: {index_type} (가능: {INDEX_TYPES})")
+        self.index_type = index_type
+        if storage not in STORAGE_TYPES:
+            raise ValueError(f"지원하지 않는 storage: {storage} (가능: {STORAGE_TYPES})")
+        self.storage = storage
+        self.pq_m = pq_m
+        self.pq_nbits = PQ_NBITS
+        self.rerank_factor = rerank_factor
+        self.nlist = nlist
+        self.hnsw_m = hnsw_m
+        # 질의 시 기본 탐색 폭 (search 인자로 질의마다 조정 가능)
+        self.nprobe = nprobe
+        self.ef_search = ef_search
+        # flat(float32) 은 즉시 생성, 그 외는 첫 add() 에서 벡터 수를 보고 생성/학습
+        plain = index_type == "flat" and storage == "flat" and self.coarse_dim is None
+        self.index = faiss.IndexFlatIP(dim) if plain else None  # 코사인=내적 (임베딩 정규화 가정)
+        # 압축 모드 재채점용 원본 float32 벡터 (빌드 중: 배열 목록 / 로드 후: np.memmap)
+        self._full_parts: List[np.ndarray] = []
+        self._full: np.ndarray | None = None
+        # 스트리밍 빌드: 원본 벡터를 메모리 대신 스풀 파일에 이어 씀 (spill_vectors())
+        self._spill = None
+        self._spill_rows = 0
+        self.mmapped = False
+        self._lock = threading.Lock()
+        # 삭제 표시된 id (정렬된 int64) → 검색 시 IDSelector 로 FAISS 내부에서 제외
+        self.tombstones = np.zeros(0, dtype="int64")
+        self._tomb_sel = None
+        # 빌드 중: 파이썬 리스트 / 로드 후: ChunkStore (id 로 O(1) 랜덤 액세스, 리스트와 같은 인터페이스)
+        self.docs: List[Dict[str, Any]] | ChunkStore = []
+        self.chunk_block_size = chunk_block_size
+        self.chunk_compress = chunk_compress
+        self.chunk_cache = chunk_cache
+        # lexical=True: save() 시 BM25 역색인(bm25/)도 함께 생성 → 하이브리드 검색
+        self.lexical = lexical
+        self.bm25: BM25Index | None = None
+        # 메타데이터 → id 역색인 (필터 검색). save() 시 meta/ 로 기록
+        self.meta_index: MetaIndex | None = None
+        # 빌드 정보(임베딩 모델, 청크 파라미터 등) → save() 시 manifest.json 으로 기록
+        self.build_info: Dict[str, Any] = {}
 
     # ---------- Build ----------
-    def add(self, embeddings: np.ndarray, items: List[Dict[str, Any]]):
+    @property
+    def index_dim(self) -> int:
+        """FAISS 인덱스 차원 (2단계 검색이면 coarse_dim)"""
+        return self.coarse_dim or self.dim
+
+    def _coarse(self, X: np.ndarray) -> np.ndarray:
+        """(n, dim) → FAISS 인덱스용 (n, index_dim): 앞쪽 coarse_dim 차원 잘라 재정규화"""
+        X = np.atleast_2d(X)
+        if self.coarse_dim is None:
+            return np.ascontiguousarray(X, dtype="float32")
+        P = np.array(X[:, :self.coarse_dim], dtype="float32")
+        P /= np.linalg.norm(P, axis=1, keepdims=True) + 1e-12
+        return P
+
+    def _create_index(self, vecs: np.ndarray):
+        """vecs: 전체 차원 벡터 (메모리 배열 또는 스풀 memmap). 학습 표본만 읽어 coarse 변환"""
+        n = vecs.shape[0]
+        if self.index_type == "auto":
+            self.index_type = choose_index_type(n)
+        if self.storage == "pq":
+            self.pq_nbits = pq_nbits_for(n)
+            if self.pq_nbits < MIN_PQ_NBITS:
+                raise ValueError(f"storage='pq' 를 학습하기에 벡터 수({n})가 너무 적습니다 "
+                                 f"(최소 {2 ** MIN_PQ_NBITS}개). storage='sq8' 또는 'flat' 을 사용하세요.")
+        spec = _factory_string(self.index_type, n, self.nlist, self.hnsw_m,
+                               self.storage, self.index_dim, self.pq_m, self.pq_nbits)
+        index = faiss.index_factory(self.index_dim, spec, faiss.METRIC_INNER_PRODUCT)
+        if not index.is_trained:
+            # 재현성을 위해 고정 시드로 샘플링하여 학습
+            ivf = faiss.try_extract_index_ivf(index)
+            need = max(ivf.nlist * TRAIN_POINTS_PER_LIST if ivf is not None else 0,
+                       TRAIN_POINTS_CODEC if self.storage in ("sq8", "pq") else 0)
+            n_train = min(n, need)
+            rng = np.random.default_rng(1234)
+            sample = vecs if n_train == n else vecs[rng.choice(n, n_train, replace=False)]
+            index.train(self._coarse(sample))
+        self.index = index
+
+    def add_vectors(self, embeddings: np.ndarray):
+        """벡터만 추가 (청크 레코드는 호출 측이 따로 기록: 스트리밍 빌드)"""
         assert embeddings.shape[1] == self.dim
-        self.index.add(embeddings.astype("float32"))
+        vecs = np.ascontiguousarray(embeddings, dtype="float32")
+        if self._spill is not None:
+            # 스트리밍 빌드: 스풀에만 이어 씀, 인덱스는 build_from_spill() 에서 한 번에 생성
+            self._spill.write(vecs.tobytes())
+            self._spill_rows += vecs.shape[0]
+            self._full = None
+            return
+        if self.index is None:
+            self._create_index(vecs)
+        if self.reranks:
+            if not self._full_parts and self.index.ntotal > 0:
+                # 로드된 인덱스에 추가: 기존 원본 벡터 뒤에 이어 붙임
+                self._full_parts = [np.asarray(self.full_vectors())]
+            self._full_parts.append(vecs)
+            self._full = None
+        self.index.add(self._coarse(vecs))
+
+    def add(self, embeddings: np.ndarray, items: List[Dict[str, Any]]):
+        self.add_vectors(embeddings)
+        if isinstance(self.docs, ChunkStore):
+            self.docs = list(self.docs)
         self.docs.extend(items)
 
-    def save(self):
-        os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
-        faiss.write_index(self.index, self.index_path)
+    def spill_vectors(self, rows: int = 0):
+        """
+        add_vectors() 를 스풀 파일(vectors.spill) 이어 쓰기로 전환 (스트리밍 빌드). 인덱스는 build_from_spill()
+        - 스풀은 추가만 하는 벡터 기록 → 체크포인트는 행 수만 남김
+        - rows>0: 체크포인트에서 재개. 앞쪽 rows 행만 남기고 잘라냄
+        """
+        path = os.path.join(os.path.dirname(self.index_path), SPILL_NAME)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._spill = open(path, "r+b" if rows else "wb")
+        self._spill.truncate(rows * self.dim * 4)
+        self._spill.seek(rows * self.dim * 4)
+        self._spill_rows = rows
+        self._full = None
+
+    def sync_spill(self) -> int:
+        """스풀 파일을 디스크에 반영하고 기록된 행 수 반환 (체크포인트용)"""
+        if self._spill is not None:
+            self._spill.flush()
+        return self._spill_rows
+
+    def spill_array(self) -> np.ndarray:
+        """스풀에 기록된 (rows, dim) 벡터의 읽기 전용 memmap"""
+        self._spill.flush()
+        path = os.path.join(os.path.dirname(self.index_path), SPILL_NAME)
+        if self._spill_rows == 0:
+            return np.zeros((0, self.dim), dtype="float32")
+        return np.memmap(path, dtype="float32", mode="r", shape=(self._spill_rows, self.dim))
+
+    def build_from_spill(self):
+        """
+        스풀 전체로 인덱스를 한 번 생성/학습하고 블록 단위로 추가 (벡터 수를 알고 있으므로 일반 빌드와 같은 자동 선택)
+        - 재채점 모드는 스풀을 남겨 save() 가 vectors.npy 로 변환, 그 외는 스풀 삭제
+        """
+        X = self.spill_array()
+        if self.index is None:
+            self._create_index(X)
+        for s in range(0, X.shape[0], SPILL_BLOCK):
+            self.index.add(self._coarse(X[s:s + SPILL_BLOCK]))
+        del X
+        self._full = None
+        if not self.reranks:
+            self._spill.close()
+            os.remove(os.path.join(os.path.dirname(self.index_path), SPILL_NAME))
+            self._spill = None
+
+    def _finish_spill(self):
+        """스풀 파일 → vectors.npy (블록 단위 복사, 메모리 사용은 블록 크기로 제한)"""
+        self._spill.close()
+        path = os.path.join(os.path.dirname(self.index_path), SPILL_NAME)
+        shape = (self._spill_rows, self.dim)
+        out = np.lib.format.open_memmap(self._vectors_path(), mode="w+", dtype="float32", shape=shape)
+        if self._spill_rows:
+            src = np.memmap(path, dtype="float32", mode="r", shape=shape)
+            for s in range(0, shape[0], SPILL_BLOCK):
+                out[s:s + SPILL_BLOCK] = src[s:s + SPILL_BLOCK]
+            del src
+        out.flush()
+        del out
+        os.remove(path)
+        self._spill = None
+        self._full = None
+
+    # ---------- Delete (tombstone) ----------
+    def delete(self, ids):
+        """
+        id(=행 번호) 삭제 표시. 벡터/청크는 compact 전까지 남아 있고 검색에서만 제외
+        - 행 번호가 id 이므로 FAISS remove_ids(행 이동 발생) 대신 tombstone 사용 → 모든 인덱스 타입 지원
+        """
+        ids = np.asarray(list(ids), dtype="int64")
+        if ids.size == 0:
+            return
+        self.tombstones = np.union1d(self.tombstones, ids)
+        self._tomb_sel = None
+
+    @property
+    def live_count(self) -> int:
+        return int(self.index.ntotal - self.tombstones.size) if self.index is not None else 0
+
+    def _tombstone_selector(self):
+        if self.tombstones.size == 0:
+            return None
+        if self._tomb_sel is None:
+            batch = faiss.IDSelectorBatch(self.tombstones.size, faiss.swig_ptr(self.tombstones))
+            # 내부 selector 가 GC 되지 않도록 함께 보관
+            self._tomb_sel = (faiss.IDSelectorNot(batch), batch)
+        return self._tomb_sel[0]
+
+    def all_vectors(self) -> np.ndarray:
+        """저장된 전체 벡터 (compact/재구성용). 압축 모드는 원본, 그 외는 인덱스에서 복원"""
+        if self.reranks:
+            return np.asarray(self.full_vectors(), dtype="float32")
+        ivf = faiss.try_extract_index_ivf(self.index)
+        if ivf is not None:
+            ivf.make_direct_map()
+        return self.index.reconstruct_n(0, self.index.ntotal)
+
+    @property
+    def reranks(self) -> bool:
+        """원본 벡터로 재채점하는지 (압축 저장 또는 2단계 검색)"""
+        return self.storage != "flat" or self.coarse_dim is not None
+
+    def _vectors_path(self) -> str:
+        return os.path.join(os.path.dirname(self.index_path), VECTORS_NAME)
+
+    def full_vectors(self) -> np.ndarray:
+        """재채점용 원본 벡터 (로드된 경우 디스크 memmap, 빌드 중이면 메모리 배열)"""
+        if self._full is None:
+            if self._spill is not None:
+                self._full = self.spill_array()
+            elif self._full_parts:
+                self._full = np.vstack(self._full_parts)
+                self._full_parts = [self._full]
+            else:
+                self._full = np.load(self._vectors_path(), mmap_mode="r")
+        return self._full
+
+    def save(self, write_chunks: bool = True):
+        """
+        - write_chunks=False: 청크 저장소는 이미 기록됨 (스트리밍 빌드: self.docs 가 그 ChunkStore)
+        """
+        self._write_vectors()
+        index_dir = os.path.dirname(self.index_path)
+        if write_chunks:
+            write_chunkstore(index_dir, self.docs, block_size=self.chunk_block_size, compress=self.chunk_compress)
+        # 청크를 한 번만 순회하며 메타 색인 / BM25 / docs.jsonl 을 함께 기록
+        # (색인 포스팅은 디스크 런으로 흘려 씀 → 스트리밍 빌드에서도 메모리 상한 고정)
+        meta_w = MetaIndexWriter(index_dir)
+        bm25_w = BM25Writer(index_dir) if self.lexical else None
+        tomb = set(self.tombstones.tolist())
+        # docs.jsonl: 사람이 읽는/호환용 내보내기 (검색 경로에서는 사용하지 않음)
         with open(self.docs_path, "w", encoding="utf-8") as f:
-            for it in self.docs:
+            for row, it in enumerate(self.docs):
+                meta_w.add(it.get("meta", {}))
+                if bm25_w is not None:
+                    bm25_w.add(it["text"], skip=row in tomb)
                 f.write(json.dumps(it, ensure_ascii=False) + "\n")
+        self.meta_index = meta_w.finish()
+        if bm25_w is not None:
+            self.bm25 = bm25_w.finish()
+        self._write_manifest()
+
+    def save_update(self, base: int, new_items: List[Dict[str, Any]], updates: Dict[int, Dict[str, Any]]):
+        """
+        증분 갱신 저장: 로드 후 행 base 부터 add_vectors() 로 추가한 new_items + 레코드가 바뀐 행 updates 만 기록
+        - 청크 저장소: 새 레코드는 뒤에 이어 쓰고 바뀐 레코드는 chunks.upd.jsonl 에 추가
+        - 메타 색인/BM25: 기존 배열 + 바뀐 행만으로 다시 기록 (전체 청크를 다시 읽거나 토큰화하지 않음)
+        - docs.jsonl: 새 행은 뒤에 추가, 바뀐 행이 있으면 줄 단위 복사로 그 줄만 교체
+        - 구버전 인덱스(청크 저장소/색인 없음)나 덮어 읽는 레코드가 많으면 전체 save()
+        """
+        index_dir = os.path.dirname(self.index_path)
+        overlay = (self.docs.updated_count if isinstance(self.docs, ChunkStore) else 0) + len(updates)
+        if (not isinstance(self.docs, ChunkStore) or self.meta_index is None
+                or (self.lexical and self.bm25 is None) or overlay > UPDATE_OVERLAY_RATIO * self.index.ntotal):
+            docs = list(self.docs) + list(new_items)
+            for row, item in updates.items():
+                docs[row] = item
+            self.docs = docs
+            return self.save()
+        self._write_vectors()
+        if new_items:
+            with ChunkStoreWriter.reopen(index_dir) as w:
+                w.extend(new_items)
+        write_chunk_updates(index_dir, updates)
+        self.docs = ChunkStore(index_dir, cache_size=self.chunk_cache)
+        changed = {row: it.get("meta", {}) for row, it in updates.items()}
+        changed.update((base + j, it.get("meta", {})) for j, it in enumerate(new_items))
+        self.meta_index = update_meta_index(index_dir, self.meta_index, changed, self.index.ntotal)
+        if self.lexical:
+            self.bm25 = update_bm25(index_dir, self.bm25, (it["text"] for it in new_items), self.tombstones)
+        _update_docs_jsonl(self.docs_path, base, new_items, updates)
+        self._write_manifest()
+
+    def _write_vectors(self):
+        """faiss.index (+ 재채점용 vectors.npy) + tombstones.npy"""
+        if self.index is None:
+            raise ValueError("저장할 인덱스가 없습니다. 먼저 add()로 벡터를 추가하세요.")
+        os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+        faiss.write_index(self.index, self.index_path)
+        if self.reranks:
+            if self._spill is not None:
+                self._full = None  # 스풀 memmap 해제 후 변환
+                self._finish_spill()
+            else:
+                np.save(self._vectors_path(), self.full_vectors())
+        elif os.path.exists(self._vectors_path()):
+            os.remove(self._vectors_path())  # 재채점하지 않는 인덱스로 다시 만든 경우 (compact)
+        tomb_path = os.path.join(os.path.dirname(self.index_path), TOMBSTONES_NAME)
+        if self.tombstones.size:
+            np.save(tomb_path, self.tombstones)
+        elif os.path.exists(tomb_path):
+            os.remove(tomb_path)
+
+    def _write_manifest(self):
+        """manifest.json: build_info + 인덱스/저장 파라미터"""
+        # 로드한 인덱스의 build_info = 이전 매니페스트 → 저장 시 다시 계산되는 항목(dim/count 등)은 제외
+        info = {k: v for k, v in self.build_info.items() if k not in _MANIFEST_DERIVED}
+        info.update(index_type=self.index_type, index_params={
+            "nlist": faiss.extract_index_ivf(self.index).nlist if self.index_type == "ivf" else None,
+            "hnsw_m": self.hnsw_m if self.index_type == "hnsw" else None,
+            "nprobe": self.nprobe,
+            "ef_search": self.ef_search,
+        }, storage=self.storage, storage_params={
+            "pq_m": (self.pq_m or default_pq_m(self.index_dim)) if self.storage == "pq" else None,
+            "pq_nbits": self.pq_nbits if self.storage == "pq" else None,
+            "rerank_factor": self.rerank_factor,
+        })
+        info["coarse_dim"] = self.coarse_dim
+        info["tombstones"] = int(self.tombstones.size)
+        info["lexical"] = bool(self.lexical)
+        manifest = make_manifest(self.dim, self.index.ntotal, **info)
+        write_manifest(os.path.dirname(self.index_path), manifest)
+        self.build_info = manifest
 
     # ---------- Load ----------
+    @staticmethod
+    def _read_index(index_path: str, mmap: bool):
+        """
+        mmap=True: 인덱스 파일을 메모리 매핑 (힙으로 복사하지 않음 → 즉시 시작, 페이지 캐시 공유)
+        - flat 코드(HNSW 는 저장 벡터만, 그래프 링크는 힙)는 IO_FLAG_MMAP_IFC 지원 버전에서 매핑
+        - IVF 계열은 IFC 를 거부 → IO_FLAG_MMAP 으로 역색인 리스트를 매핑 (OnDiskInvertedLists)
+        - 반환한 mapped 는 로드된 인덱스를 보고 판단 (매핑 플래그가 무시된 경우 False)
+        """
+        if not mmap:
+            return faiss.read_index(index_path), False
+        flags = faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY
+        ifc = getattr(faiss, "IO_FLAG_MMAP_IFC", 0)
+        if ifc:
+            try:
+                index = faiss.read_index(index_path, flags | ifc)
+                return index, _is_mapped(index)
+            except RuntimeError:
+                pass
+        index = faiss.read_index(index_path, flags)
+        return index, _is_mapped(index)
+
     @classmethod
-    def load(cls, index_path: str, docs_path: str):
-        index = faiss.read_index(index_path)
+    def load(cls, index_path: str, docs_path: str, mmap: bool = False, warmup: bool = False):
+        index, mapped = cls._read_index(index_path, mmap)
         dim = index.d
         store = cls(dim, index_path, docs_path)
         store.index = index
-        store.docs = []
-        with open(docs_path, "r", encoding="utf-8") as f:
-            for line in f:
-                store.docs.append(json.loads(line))
+        store.mmapped = mapped
+        index_dir = os.path.dirname(index_path)
+        if chunkstore_exists(index_dir):
+            store.docs = ChunkStore(index_dir, cache_size=store.chunk_cache)
+            store.chunk_block_size = store.docs.block_size
+            store.chunk_compress = store.docs.compressed
+        else:
+            # 청크 저장소가 없는 구버전 인덱스: docs.jsonl 전체 로딩
+            store.docs = []
+            with open(docs_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    store.docs.append(json.loads(line))
+        store.build_info = read_manifest(index_dir) or {}
+        if MetaIndex.exists(index_dir):
+            store.meta_index = MetaIndex.load(index_dir)
+        tomb_path = os.path.join(index_dir, TOMBSTONES_NAME)
+        if os.path.exists(tomb_path):
+            store.tombstones = np.load(tomb_path).astype("int64")
+        # 인덱스 타입/탐색 파라미터 복원 (매니페스트 우선, 없으면 인덱스 객체에서 판별)
+        store.index_type = store.build_info.get("index_type") or _detect_index_type(index)
+        params = store.build_info.get("index_params") or {}
+        store.nprobe = params.get("nprobe") or store.nprobe
+        store.ef_search = params.get("ef_search") or store.ef_search
+        store.nlist = params.get("nlist")
+        if store.index_type == "hnsw":
+            store.hnsw_m = params.get("hnsw_m") or store.hnsw_m
+        store.storage = store.build_info.get("storage") or "flat"
+        sparams = store.build_info.get("storage_params") or {}
+        store.pq_m = sparams.get("pq_m")
+        store.pq_nbits = sparams.get("pq_nbits") or PQ_NBITS
+        store.rerank_factor = sparams.get("rerank_factor") or store.rerank_factor
+        if store.build_info.get("coarse_dim"):
+            # 2단계 검색: 인덱스는 coarse_dim 차원, 질의/재채점은 매니페스트의 전체 차원
+            store.coarse_dim = int(store.build_info["coarse_dim"])
+            store.dim = int(store.build_info.get("dim") or store.full_vectors().shape[1])
+        if BM25Index.exists(index_dir):
+            store.lexical = True
+            store.bm25 = BM25Index.load(index_dir)
+            ivf = faiss.try_extract_index_ivf(index)
+            if ivf is not None and not store.reranks and ivf.direct_map.no():
+                ivf.make_direct_map()  # lexical 후보의 코사인 점수 계산(reconstruct)용
+        if warmup:
+            store.warmup()
         return store
 
+    def warmup(self, hot_lists: int | None = None, page: int = 4096) -> int:
+        """
+        매핑된 인덱스 페이지 선반영(pre-fault) → 첫 질의 지연 제거. 접근한 바이트 수 반환
+        - IVF: 가장 큰(=질의가 가장 자주 닿는) 역색인 리스트 hot_lists 개를 순서대로 읽음
+        - 그 외: 인덱스 파일 전체에 WILLNEED 힌트
+        """
+        ivf = faiss.try_extract_index_ivf(self.index) if self.index is not None else None
+        if ivf is None:
+            if hasattr(os, "posix_fadvise") and os.path.exists(self.index_path):
+                fd = os.open(self.index_path, os.O_RDONLY)
+                try:
+                    os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+                finally:
+                    os.close(fd)
+                return os.path.getsize(self.index_path)
+            return 0
+        invlists = ivf.invlists
+        sizes = np.array([invlists.list_size(l) for l in range(ivf.nlist)])
+        n_hot = ivf.nlist if hot_lists is None else min(hot_lists, ivf.nlist)
+        touched = 0
+        for l in np.argsort(-sizes)[:n_hot]:
+            nbytes = int(sizes[l]) * invlists.code_size
+            if nbytes == 0:
+                continue
+            ptr = invlists.get_codes(int(l))
+            try:
+                codes = faiss.rev_swig_ptr(ptr, nbytes)
+                int(codes[::page].sum())  # 페이지마다 1바이트씩 읽어 페이지 폴트 유발
+                touched += nbytes
+            finally:
+                invlists.release_codes(int(l), ptr)
+        return touched
+
     # ---------- Search ----------
-    def search(self, query_vec: np.ndarray, top_k: int = 5) -> List[Dict[str, Any]]:
-        if query_vec.ndim == 1:
-            query_vec = query_vec[None, :]
-        D, I = self.index.search(query_vec.astype("float32"), top_k)
+    def filter_mask(self, filter: Dict[str, Any]) -> np.ndarray:
+        """필터 식 → (ntotal,) 허용 마스크 (tombstone 제외 포함)"""
+        if self.meta_index is None:
+            # 메타 색인이 없는 구버전 인덱스: 청크 레코드로 한 번 생성
+            self.meta_index = MetaIndex.build(d.get("meta", {}) for d in self.docs)
+        mask = self.meta_index.mask(filter)
+        n = self.index.ntotal
+        if mask.size < n:
+            mask = np.concatenate([mask, np.zeros(n - mask.size, dtype=bool)])
+        mask[self.tombstones] = False
+        return mask
+
+    @staticmethod
+    def _bitmap_selector(mask: np.ndarray):
+        """bool 마스크 → IDSelectorBitmap (faiss 비트 순서 = little-endian). (selector, keepalive) 반환"""
+        bitmap = np.packbits(mask, bitorder="little")
+        return faiss.IDSelectorBitmap(mask.size, faiss.swig_ptr(bitmap)), bitmap
+
+    def _search_params(self, nprobe: int | None = None, ef_search: int | None = None, sel=None):
+        # 공유 인덱스의 속성을 바꾸지 않도록 질의별 SearchParameters 사용 (스레드 안전)
+        sel = sel if sel is not None else self._tombstone_selector()
+        extra = {"sel": sel} if sel is not None else {}
+        if self.index_type == "ivf":
+            return faiss.SearchParametersIVF(nprobe=int(nprobe or self.nprobe), **extra)
+        if self.index_type == "hnsw":
+            return faiss.SearchParametersHNSW(efSearch=int(ef_search or self.ef_search), **extra)
+        return faiss.SearchParameters(**extra) if extra else None
+
+    def _rerank(self, q: np.ndarray, ids: np.ndarray, top_k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """압축 코드 점수 대신 원본 float32 벡터로 정확한 내적 재계산 → 코사인 점수 유지"""
+        ids = ids[ids >= 0]
+        if ids.size == 0:
+            return np.zeros(0, dtype="float32"), ids
+        order = np.argsort(ids)  # memmap 순차 접근
+        exact = np.asarray(self.full_vectors()[ids[order]], dtype="float32") @ q
+        scores = np.empty_like(exact)
+        scores[order] = exact
+        best = np.argsort(-scores)[:top_k]
+        return scores[best], ids[best]
+
+    def search_ids_batch(self, queries: np.ndarray, top_k: int = 5,
+                         nprobe: int | None = None, ef_search: int | None = None,
+                         rerank_factor: int | None = None,
+                         filter: Dict[str, Any] | None = None) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """
+        (n, d) 질의 행렬을 한 번의 FAISS 호출로 검색 (FAISS 내부 멀티스레드) → 질의별 (scores, ids)
+        - 청크 텍스트는 읽지 않음 (-1 제거, 점수 내림차순)
+        - filter: 메타데이터 필터 식 → FAISS 검색 내부에서 IDSelector 로 적용 (사후 필터링 없음)
+        """
+        Q = np.ascontiguousarray(np.atleast_2d(queries), dtype="float32")
+        empty = (np.zeros(0, dtype="float32"), np.zeros(0, dtype="int64"))
+        sel = keep_alive = None  # keep_alive: 검색이 끝날 때까지 비트맵 버퍼 유지
+        if filter:
+            mask = self.filter_mask(filter)
+            if not mask.any():
+                return [empty for _ in range(Q.shape[0])]
+            sel, keep_alive = self._bitmap_selector(mask)
+        params = self._search_params(nprobe, ef_search, sel=sel)
+        if self.reranks:
+            fetch_k = top_k * max(1, int(rerank_factor or self.rerank_factor))
+            _, I = self.index.search(self._coarse(Q), fetch_k, params=params)
+            return [self._rerank(Q[r], I[r], top_k) for r in range(Q.shape[0])]
+        D, I = self.index.search(Q, top_k, params=params)
+        keep = I >= 0
+        return [(D[r][keep[r]], I[r][keep[r]]) for r in range(Q.shape[0])]
+
+    def search_ids(self, query_vec: np.ndarray, top_k: int = 5,
+                   nprobe: int | None = None, ef_search: int | None = None,
+                   rerank_factor: int | None = None,
+                   filter: Dict[str, Any] | None = None) -> Tuple[np.ndarray, np.ndarray]:
+        """단일 질의용 search_ids_batch"""
+        return self.search_ids_batch(query_vec, top_k, nprobe, ef_search, rerank_factor, filter)[0]
+
+    def range_search_ids(self, query_vec: np.ndarray, min_score: float, max_k: int = 5,
+                         nprobe: int | None = None, ef_search: int | None = None,
+                         filter: Dict[str, Any] | None = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        점수 min_score 이상인 hit 만 (최대 max_k 개, 내림차순) → 무관한 질의는 빈 결과로 빨리 끝남
+        - flat/IVF 평문 인덱스: FAISS range_search (임계값 이상 후보만 결과 버퍼에 담음)
+        - HNSW/압축 모드: range_search 결과가 근사 점수라 max_k 검색(+재채점) 후 임계값으로 자름
+        """
+        q = np.asarray(query_vec, dtype="float32").reshape(1, -1)
+        if self.reranks or self.index_type == "hnsw":
+            scores, ids = self.search_ids(q, max_k, nprobe, ef_search, filter=filter)
+            keep = scores >= min_score
+            return scores[keep], ids[keep]
+        sel = keep_alive = None
+        if filter:
+            mask = self.filter_mask(filter)
+            if not mask.any():
+                return np.zeros(0, dtype="float32"), np.zeros(0, dtype="int64")
+            sel, keep_alive = self._bitmap_selector(mask)
+        # range_search 는 내적 > radius 를 반환 → 같은 값도 포함하도록 한 단계 아래 float32 값 사용
+        radius = float(np.nextafter(np.float32(min_score), np.float32(-np.inf)))
+        lims, D, I = self.index.range_search(q, radius, params=self._search_params(nprobe, ef_search, sel=sel))
+        D, I = D[lims[0]:lims[1]], I[lims[0]:lims[1]].astype("int64")
+        if D.size > max_k:
+            part = np.argpartition(-D, max_k - 1)[:max_k]
+            D, I = D[part], I[part]
+        order = np.argsort(-D)
+        return D[order], I[order]
+
+    def vectors(self, ids: np.ndarray) -> np.ndarray:
+        """지정 id 들의 벡터 (ids 순서, float32). 압축 모드는 원본 벡터, 그 외는 인덱스에서 복원"""
+        ids = np.asarray(ids, dtype="int64")
+        if ids.size == 0:
+            return np.zeros((0, self.dim), dtype="float32")
+        if self.reranks:
+            order = np.argsort(ids)  # memmap 순차 접근
+            out = np.empty((ids.size, self.dim), dtype="float32")
+            out[order] = self.full_vectors()[ids[order]]
+            return out
+        ivf = faiss.try_extract_index_ivf(self.index)
+        if ivf is not None and ivf.direct_map.no():
+            with self._lock:
+                if ivf.direct_map.no():
+                    ivf.make_direct_map()
+        return self.index.reconstruct_batch(ids)
+
+    def exact_scores(self, query_vec: np.ndarray, ids: np.ndarray) -> np.ndarray:
+        """지정 id 들의 정확한 내적(코사인) 점수 (lexical 후보 등 벡터 검색에 안 나온 id 용)"""
+        q = np.asarray(query_vec, dtype="float32").reshape(-1)
+        return self.vectors(ids) @ q
+
+    def materialize(self, scores: np.ndarray, ids: np.ndarray) -> List[Dict[str, Any]]:
+        """id → 청크 레코드 조회 (top_k 개만 읽음)"""
         out = []
-        for rank, (score, idx) in enumerate(zip(D[0], I[0])):
+        for score, idx in zip(scores, ids):
             if idx == -1:
                 continue
-            doc = self.docs[idx]
+            doc = self.docs[int(idx)]
             out.append({
                 "doc_id": doc["id"],
                 "chunk": doc["text"],
@@ -55,3 +719,62 @@ class FaissStore:
                 "meta": doc.get("meta", {})
             })
         return out
+
+    def search(self, query_vec: np.ndarray, top_k: int = 5,
+               nprobe: int | None = None, ef_search: int | None = None,
+               rerank_factor: int | None = None,
+               filter: Dict[str, Any] | None = None) -> List[Dict[str, Any]]:
+        scores, ids = self.search_ids(query_vec, top_k, nprobe, ef_search, rerank_factor, filter)
+        return self.materialize(scores, ids)
+
+    def search_batch(self, queries: np.ndarray, top_k: int = 5,
+                     nprobe: int | None = None, ef_search: int | None = None,
+                     rerank_factor: int | None = None,
+                     filter: Dict[str, Any] | None = None) -> List[List[Dict[str, Any]]]:
+        hits = self.search_ids_batch(queries, top_k, nprobe, ef_search, rerank_factor, filter)
+        return [self.materialize(scores, ids) for scores, ids in hits]
+
+    # ---------- Report ----------
+    def compression_report(self, n_queries: int = 100, k: int = 10) -> Dict[str, Any]:
+        """
+        압축 모드의 메모리 절감/재현율 변화 측정
+        - 저장된 벡터 일부를 질의로 사용, 원본 벡터 완전 탐색 결과를 정답으로 recall@k 계산
+        - raw: 압축 코드 점수만 사용 / rerank: 원본 벡터 재채점 후
+        - 메모리 상한 고정: 원본 벡터는 memmap 을 블록 단위로 훑어 정답 top-k 를 갱신,
+          인덱스 크기는 메모리 직렬화 대신 임시 파일 크기로 측정 (스트리밍 빌드에서도 사용)
+        """
+        full = self.full_vectors() if self.reranks else None
+        n = self.index.ntotal
+        flat_bytes = n * self.dim * 4
+        tmp = self.index_path + ".size.tmp"
+        os.makedirs(os.path.dirname(tmp) or ".", exist_ok=True)
+        faiss.write_index(self.index, tmp)
+        index_bytes = os.path.getsize(tmp)
+        os.remove(tmp)
+        report: Dict[str, Any] = {
+            "storage": self.storage,
+            "coarse_dim": self.coarse_dim,
+            "index_type": self.index_type,
+            "count": int(n),
+            "flat_bytes": int(flat_bytes),
+            "index_bytes": int(index_bytes),
+            "memory_saved_ratio": round(1.0 - index_bytes / max(flat_bytes, 1), 4),
+        }
+        if full is None or n == 0:
+            return report
+        rng = np.random.default_rng(0)
+        qids = rng.choice(n, min(n_queries, n), replace=False)
+        Q = np.asarray(full[qids], dtype="float32")
+        truth = exact_topk(Q, full, k)
+        params = self._search_params()
+        _, I_raw = self.index.search(self._coarse(Q), k, params=params)
+        _, I_cand = self.index.search(self._coarse(Q), k * self.rerank_factor, params=params)
+        hits_raw = hits_rr = 0
+        for qi in range(len(qids)):
+            t = set(truth[qi].tolist())
+            hits_raw += len(t & set(I_raw[qi].tolist()))
+            hits_rr += len(t & set(self._rerank(Q[qi], I_cand[qi], k)[1].tolist()))
+        denom = float(len(qids) * k)
+        report.update(recall_at_k=k, recall_raw=round(hits_raw / denom, 4),
+                      recall_rerank=round(hits_rr / denom, 4))
+        return report
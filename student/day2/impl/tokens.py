@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+"""
+토큰 수 계산 (청크 토큰 예산 + 임베딩 요청 한도 공용)
+- tiktoken 이 있고 BPE 파일을 쓸 수 있으면 정확한 수, 아니면 UTF-8 바이트 기반 보수적 추정
+- 인코더는 첫 계산 때 모델별로 한 번 로드 (BPE 다운로드가 import 시점에 일어나지 않게)
+"""
+
+from __future__ import annotations
+from typing import Any, Dict
+
+try:  # 선택: 정확한 토큰 수
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+DEFAULT_ENCODING = "cl100k_base"
+_ENCODERS: Dict[str, Any] = {}  # 모델 이름("" = 기본 인코딩) → 인코더 | None
+
+
+def get_encoder(model: str | None = None):
+    """모델의 tiktoken 인코더 (모르는 모델은 cl100k_base). tiktoken 이 없거나 오프라인이면 None"""
+    key = model or ""
+    if key not in _ENCODERS:
+        enc = None
+        if tiktoken is not None:
+            try:
+                try:
+                    enc = tiktoken.encoding_for_model(model) if model else tiktoken.get_encoding(DEFAULT_ENCODING)
+                except KeyError:
+                    enc = tiktoken.get_encoding(DEFAULT_ENCODING)
+            except Exception:  # 오프라인 등으로 BPE 파일을 받을 수 없음 → 추정치 사용
+                enc = None
+        _ENCODERS[key] = enc
+    return _ENCODERS[key]
+
+
+def estimate_tokens(text: str) -> int:
+    """추정: 한글 1음절(3바이트) ≈ 1.5 토큰 → 바이트/2 (영문은 과대 추정 = 청크 예산/요청 한도 초과 방지)"""
+    return len(text.encode("utf-8")) // 2 + 1
+
+
+def count_tokens(text: str, model: str | None = None) -> int:
+    enc = get_encoder(model)
+    if enc is not None:
+        return len(enc.encode(text, disallowed_special=()))
+    return estimate_tokens(text)
@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+"""
+버전별 인덱스 발행(publish) / 롤백
+- 레이아웃: <root>/versions/<버전>/{faiss.index, chunks.*, manifest.json, ...}
+           <root>/CURRENT  ← 현재 서비스 중인 버전 이름 (임시 파일 + os.replace 로 원자적 교체)
+- 빌드는 항상 새 버전 디렉토리에 기록 → 읽는 쪽은 완성된 버전만 보게 됨 (새 인덱스 + 옛 docs 조합 없음)
+- 오래된 버전은 keep 개만 남기고 정리, rollback 으로 즉시 이전 버전 복귀
+- CURRENT 가 없으면 <root> 자체를 인덱스 디렉토리로 사용 (구버전 평면 레이아웃 호환)
+"""
+
+from __future__ import annotations
+import os, time, uuid, shutil
+from typing import List, Tuple
+
+CURRENT_NAME = "CURRENT"
+VERSIONS_DIR = "versions"
+KEEP_VERSIONS = 3
+
+
+def _current_path(root: str) -> str:
+    return os.path.join(root, CURRENT_NAME)
+
+
+def _versions_root(root: str) -> str:
+    return os.path.join(root, VERSIONS_DIR)
+
+
+def is_versioned(root: str) -> bool:
+    return os.path.exists(_current_path(root))
+
+
+def current_version(root: str) -> str | None:
+    try:
+        with open(_current_path(root), "r", encoding="utf-8") as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def resolve_index_dir(root: str) -> str:
+    """CURRENT 가 가리키는 버전 디렉토리 (없으면 root 그대로)"""
+    ver = current_version(root)
+    return os.path.join(_versions_root(root), ver) if ver else root
+
+
+def list_versions(root: str) -> List[str]:
+    """완성된 버전 이름 목록 (오래된 순)"""
+    vroot = _versions_root(root)
+    if not os.path.isdir(vroot):
+        return []
+    return sorted(d for d in os.listdir(vroot)
+                  if not d.endswith(".tmp") and os.path.isdir(os.path.join(vroot, d)))
+
+
+def new_version_dir(root: str) -> Tuple[str, str]:
+    """
+    새 버전 이름과 작업(staging) 디렉토리 생성 (이름 정렬 = 생성 순서)
+    - 작업 디렉토리는 "<버전>.tmp" → publish 시 이름 변경 (빌드 실패 시 목록에 나타나지 않음)
+    """
+    ns = time.time_ns()
+    name = time.strftime("%Y%m%d_%H%M%S", time.localtime(ns // 1_000_000_000)) + f"_{ns % 1_000_000_000:09d}"
+    path = os.path.join(_versions_root(root), name + ".tmp")
+    os.makedirs(path)
+    return name, path
+
+
+def pending_version_dir(root: str, marker: str) -> Tuple[str, str] | None:
+    """marker 파일/디렉토리가 있는 가장 최근 미발행(staging) 버전 (중단된 스트리밍 빌드 재개용)"""
+    vroot = _versions_root(root)
+    if not os.path.isdir(vroot):
+        return None
+    for d in sorted(os.listdir(vroot), reverse=True):
+        path = os.path.join(vroot, d)
+        if d.endswith(".tmp") and os.path.exists(os.path.join(path, marker)):
+            return d[:-len(".tmp")], path
+    return None
+
+
+def clone_current(root: str) -> Tuple[str, str]:
+    """
+    현재 버전을 새 버전 디렉토리로 복사 (증분 갱신/compact 는 복사본에서 수행 후 발행)
+    - 인덱스 파일은 제자리 쓰기가 있으므로 하드링크가 아닌 복사
+    - 하위 디렉토리(bm25/, meta/)도 복사 → 변경이 없어 save() 를 건너뛴 갱신도 완전한 버전으로 발행
+    """
+    src = resolve_index_dir(root)
+    name, dst = new_version_dir(root)
+    for fn in os.listdir(src):
+        p = os.path.join(src, fn)
+        if os.path.isdir(p):
+            shutil.copytree(p, os.path.join(dst, fn))
+        elif os.path.isfile(p):
+            shutil.copy2(p, os.path.join(dst, fn))
+    return name, dst
+
+
+def _write_current(root: str, name: str):
+    tmp = _current_path(root) + f".{uuid.uuid4().hex[:6]}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(name + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, _current_path(root))
+
+
+def publish(root: str, name: str, keep: int = KEEP_VERSIONS) -> str:
+    """CURRENT 를 name 으로 원자적 교체 후 오래된 버전 정리. 발행된 디렉토리 경로 반환"""
+    path = os.path.join(_versions_root(root), name)
+    staging = path + ".tmp"
+    if os.path.isdir(staging):
+        os.rename(staging, path)
+    if not os.path.exists(os.path.join(path, "faiss.index")):
+        raise FileNotFoundError(f"발행할 버전에 faiss.index 가 없습니다: {path}")
+    _write_current(root, name)
+    prune(root, keep)
+    return path
+
+
+def prune(root: str, keep: int = KEEP_VERSIONS):
+    """최신 keep 개와 CURRENT 대상만 남기고 삭제 (이미 열려 있는 파일은 OS 가 닫힐 때까지 유지)"""
+    cur = current_version(root)
+    versions = list_versions(root)
+    for name in versions[:-keep] if keep > 0 else versions:
+        if name != cur:
+            shutil.rmtree(os.path.join(_versions_root(root), name), ignore_errors=True)
+
+
+def rollback(root: str, to: str | None = None) -> str:
+    """to 버전(기본: 현재 직전 버전)으로 CURRENT 되돌리기. 버전 이름 반환"""
+    versions = list_versions(root)
+    if to is None:
+        cur = current_version(root)
+        older = [v for v in versions if cur is None or v < cur]
+        if not older:
+            raise ValueError("롤백할 이전 버전이 없습니다.")
+        to = older[-1]
+    if to not in versions:
+        raise ValueError(f"존재하지 않는 버전입니다: {to}")
+    _write_current(root, to)
+    return to
@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+"""
+Day2 테스트 공통 설정 (오프라인)
+- 임베딩은 로컬 해시 백엔드(local-hash-<dim>) → 네트워크/API 키 없이 실행
+- 임베딩/PDF 디스크 캐시는 끔 (모듈 import 전에 환경변수 설정)
+- 프로젝트 루트를 sys.path 에 추가 (student.day2.impl 절대 import)
+"""
+import os, sys, threading
+from pathlib import Path
+
+os.environ.setdefault("DAY2_EMB_CACHE", "")
+os.environ.setdefault("DAY2_PDF_CACHE", "")
+
+ROOT = Path(__file__).resolve().parents[3]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import numpy as np
+import pytest
+
+from student.day2.impl.embeddings import Embeddings
+from student.day2.impl.local_embed import HashEmbeddings
+from student.day2.impl.session import clear_sessions
+
+MODEL = "local-hash-64"
+
+# 서로 주제가 다른 문서 (파일명 → 본문). 문단 여러 개 → fixed/structured 청크 모두 여러 개 생성
+DOCS = {
+    "privacy.txt": (
+        "개인정보 보호법 제15조는 개인정보의 수집과 이용 요건을 정한다. 정보주체의 동의를 받은 경우에만 수집할 수 있다.\n\n"
+        "제17조의2 는 제3자 제공에 관한 특례를 규정한다. 제공 목적과 항목을 미리 알려야 한다.\n\n"
+        + "가명정보는 통계 작성과 과학적 연구 목적으로 처리할 수 있다. " * 30
+    ),
+    "medical.txt": (
+        "Medical AI devices require clinical validation before market approval. "
+        "Regulators review the training data, intended use and post-market monitoring plan.\n\n"
+        + "Software as a medical device must document its risk class and update policy. " * 25
+    ),
+    "finance.md": (
+        "# 금융 규제\n\n전자금융거래법은 접근매체의 관리 의무를 규정한다. 이용자는 비밀번호를 타인에게 알려서는 안 된다.\n\n"
+        + "금융회사는 이상거래 탐지 시스템을 운영하고 사고 발생 시 손해를 배상한다. " * 30
+    ),
+}
+
+
+@pytest.fixture(autouse=True)
+def _fresh_sessions():
+    """테스트마다 프로세스 전역 세션 초기화 (다른 tmp 인덱스를 잡고 있지 않게)"""
+    clear_sessions()
+    yield
+    clear_sessions()
+
+
+def write_docs(d: Path, docs=None) -> Path:
+    d.mkdir(parents=True, exist_ok=True)
+    for name, text in (docs or DOCS).items():
+        (d / name).write_text(text, encoding="utf-8")
+    return d
+
+
+@pytest.fixture
+def docs_dir(tmp_path) -> Path:
+    return write_docs(tmp_path / "docs")
+
+
+@pytest.fixture
+def flat_index(tmp_path, docs_dir) -> str:
+    """평면 레이아웃(버전 없음) 기본 인덱스"""
+    from student.day2.impl.build_index import build_index
+    out = str(tmp_path / "idx")
+    build_index([str(docs_dir)], out, model=MODEL, versioned=False)
+    return out
+
+
+def unit_rows(n: int, dim: int, seed: int = 0) -> np.ndarray:
+    """L2 정규화된 무작위 벡터 (n, dim) float32"""
+    x = np.random.default_rng(seed).standard_normal((n, dim)).astype("float32")
+    return x / np.linalg.norm(x, axis=1, keepdims=True)
+
+
+def items_for(n: int, path: str = "doc.txt"):
+    return [{"id": f"{path}::chunk_{i:04d}", "text": f"chunk {i}", "meta": {"path": path, "chunk": i}}
+            for i in range(n)]
+
+
+# ---------- 임베딩 API 대역 (네트워크 없이 배치/재시도/캐시 경로 검증) ----------
+class ApiError(Exception):
+    def __init__(self, status_code, headers=None):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+        self.response = type("R", (), {"headers": headers or {}})()
+
+
+class FakeApi:
+    """API 백엔드 대역: 요청(입력 목록)을 기록하고 로컬 해시 임베딩을 돌려줌. fail(texts) 가 예외를 주면 그 요청 실패"""
+
+    local = False
+
+    def __init__(self, dim=16, fail=None):
+        self.model, self.dim = "fake-api", dim
+        self.inner = HashEmbeddings(dim=dim)
+        self.calls, self.fail = [], fail
+        self._lock = threading.Lock()
+
+    def embed(self, texts):
+        with self._lock:
+            self.calls.append(list(texts))
+        err = self.fail(texts) if self.fail else None
+        if err is not None:
+            raise err
+        return self.inner.embed(texts)
+
+
+def api_embeddings(api: FakeApi, **kw) -> Embeddings:
+    """로컬 모델로 생성(토크나이저/네트워크 없음) 후 백엔드만 API 대역으로 교체"""
+    kw.setdefault("cache_path", None)
+    emb = Embeddings(model=f"local-hash-{api.dim}", **kw)
+    emb.backend = api
+    return emb
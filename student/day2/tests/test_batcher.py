@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+"""user-012: 동시 질의 마이크로 배칭 (임베딩 1회 + FAISS 다중 질의 검색 1회)"""
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from student.common.schemas import Day2Plan
+from student.day2.impl.batcher import MicroBatcher
+from student.day2.impl.rag import Day2Agent, _load_store
+from student.day2.impl.session import get_session
+
+from conftest import MODEL
+
+QUERIES = ["개인정보 수집 동의", "medical device approval", "이상거래 탐지", "가명정보 연구 목적"] * 4
+
+
+def test_concurrent_queries_share_batches(flat_index):
+    sess = get_session(flat_index, MODEL, _load_store)
+    store, emb = sess.current()
+    batcher = MicroBatcher(sess, window_ms=200, max_batch=64)
+    futs = [batcher.submit(q, (3, None, None)) for q in QUERIES]
+    results = [f.result(timeout=10) for f in futs]
+    assert batcher.requests == len(QUERIES)
+    assert batcher.batches < len(QUERIES)
+    for q, (s, qv, (scores, ids)) in zip(QUERIES, results):
+        assert s is store
+        np.testing.assert_allclose(qv, emb.encode([q])[0], atol=1e-6)
+        assert ids.tolist() == store.search_ids(qv, 3)[1].tolist()
+
+
+def test_embedding_only_requests_return_no_hits(flat_index):
+    batcher = MicroBatcher(get_session(flat_index, MODEL, _load_store), window_ms=1)
+    _, qv, hit = batcher.submit("개인정보").result(timeout=10)
+    assert hit is None and qv.shape == (64,)
+
+
+def test_micro_batched_agent_matches_direct_search(flat_index):
+    base = dict(index_dir=flat_index, embedding_model=MODEL, top_k=3, min_score=0.0, min_mean_topk=0.0)
+    direct, batched = Day2Agent(Day2Plan(**base)), Day2Agent(Day2Plan(micro_batch=True, **base))
+    with ThreadPoolExecutor(8) as pool:
+        outs = list(pool.map(batched.handle, QUERIES))
+    for q, out in zip(QUERIES, outs):
+        assert [c["doc_id"] for c in out["contexts"]] == [c["doc_id"] for c in direct.handle(q)["contexts"]]
@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+"""user-016: 인덱스 구성별 recall@k / 지연 / 메모리 벤치마크"""
+import numpy as np
+
+from student.day2.impl.bench import run_bench, exact_topk
+
+from conftest import unit_rows
+
+
+def test_exact_topk_blocks_match_full_sort():
+    X, Q = unit_rows(300, 8), unit_rows(5, 8, seed=1)
+    np.testing.assert_array_equal(exact_topk(Q, X, 7, block=64), np.argsort(-(Q @ X.T), axis=1)[:, :7])
+
+
+def test_run_bench_reports_every_configuration(docs_dir):
+    rep = run_bench([str(docs_dir)], k=3, n_queries=5, dim=32,
+                    index_types=("flat", "hnsw"), storages=("flat", "sq8", "pq"))
+    assert rep["embedding_model"] == "local-hash-32" and rep["dim"] == 32
+    by = {(r["index_type"], r["storage"]): r for r in rep["results"]}
+    assert len(by) == 6
+    assert by[("flat", "flat")]["recall@3"] == 1.0
+    for key in (("flat", "flat"), ("hnsw", "sq8")):
+        assert {"p50_ms", "p95_ms", "p99_ms", "build_s", "load_s", "disk_bytes"} <= set(by[key])
+    assert "error" in by[("flat", "pq")]  # 청크 수가 PQ 학습 최소치 미만 → 해당 구성만 오류로 기록
@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+"""user-024: 문단/문장 경계 + 토큰 예산 기반 구조 인식 청크"""
+import pytest
+
+import student.day2.impl.tokens as tokens
+from student.day2.impl.chunkbench import run_chunkbench
+from student.day2.impl.embeddings import Embeddings
+from student.day2.impl.ingest import (
+    chunk_structured, chunk_document, chunking_info, count_tokens, split_sentences,
+)
+
+
+def _para(tag, n):
+    return " ".join(f"{tag} 문단의 {i}번째 문장은 규정의 적용 범위를 설명한다." for i in range(n))
+
+
+def test_chunker_and_embedder_count_tokens_alike(monkeypatch):
+    monkeypatch.setattr(tokens, "tiktoken", None)  # 추정치 경로 (토크나이저 없음)
+    monkeypatch.setattr(tokens, "_ENCODERS", {})
+    emb = Embeddings(model="local-hash-16")
+    for t in ("", "개인정보 보호법", "Medical AI devices", _para("가", 3)):
+        assert count_tokens(t) == emb.count_tokens(t) == tokens.estimate_tokens(t)
+
+
+def test_split_sentences_handles_korean_endings():
+    text = "첫 문장이다. 둘째 문장인가? 셋째!\n마침표 없이 끝난다\n다음 줄"
+    assert split_sentences(text) == ["첫 문장이다.", "둘째 문장인가?", "셋째!", "마침표 없이 끝난다", "다음 줄"]
+
+
+@pytest.mark.parametrize("max_tokens, overlap", [(40, 0), (60, 20), (120, 40)])
+def test_chunks_fit_token_budget_including_overlap(max_tokens, overlap):
+    text = "\n\n".join(_para(t, 9) for t in ("가", "나", "다"))
+    chunks = chunk_structured(text, max_tokens=max_tokens, overlap_tokens=overlap)
+    assert len(chunks) > 3
+    assert all(count_tokens(c) <= max_tokens for c in chunks)
+
+
+def test_cuts_on_sentence_boundaries():
+    sents = split_sentences(_para("가", 12))
+    chunks = chunk_structured(_para("가", 12), max_tokens=60, overlap_tokens=0)
+    assert len(chunks) > 1
+    for c in chunks:
+        assert c.endswith(".")
+        assert all(s in sents for s in split_sentences(c))
+    assert " ".join(chunks) == _para("가", 12)  # 겹침 0 → 원문 그대로 나뉨
+
+
+def _carried(chunks):
+    """각 청크가 앞 청크의 끝 문장으로 시작하는지"""
+    return [cur.startswith(split_sentences(prev)[-1]) for prev, cur in zip(chunks, chunks[1:])]
+
+
+def test_overlap_only_inside_a_paragraph():
+    mid = chunk_structured(_para("가", 6), max_tokens=120, overlap_tokens=45)
+    assert len(mid) > 1 and all(_carried(mid))  # 문단 중간에서 잘림 → 앞 청크 끝 문장을 이어 붙임
+
+    paras = [_para(t, 3) for t in ("가", "나", "다")]  # 문단 하나 ≈ 예산 → 문단 경계에서 잘림
+    chunks = chunk_structured("\n\n".join(paras), max_tokens=120, overlap_tokens=45)
+    assert chunks == paras and not any(_carried(chunks))
+
+
+def test_overlong_sentence_is_split():
+    chunks = chunk_structured("가" * 3000, max_tokens=100)
+    assert len(chunks) > 1 and "".join(chunks) == "가" * 3000
+    assert all(count_tokens(c) <= 100 for c in chunks)
+
+
+def test_table_rows_are_units():
+    table = "\n".join(f"| 항목{i} | 값{i} | 비고 |" for i in range(40))
+    chunks = chunk_structured(table, max_tokens=50, overlap_tokens=0)
+    assert len(chunks) > 1
+    for c in chunks:
+        assert all(line.startswith("|") and line.endswith("|") for line in c.split("\n"))
+
+
+def test_chunker_selection_and_manifest_info():
+    text = _para("가", 3)
+    assert chunk_document(text, "structured") == chunk_structured(text)
+    assert chunking_info("structured")["chunker"] == "structured"
+    assert chunking_info()["chunker"] == "fixed"
+    with pytest.raises(ValueError):
+        chunk_document(text, "semantic")
+
+
+def test_chunkbench_compares_chunkers(docs_dir):
+    rep = run_chunkbench([str(docs_dir)], k=3, n_queries=10, dim=32)
+    assert rep["documents"] == 3 and rep["queries"] > 0
+    fixed, structured = rep["results"]
+    assert (fixed["chunker"], structured["chunker"]) == ("fixed", "structured")
+    assert structured["chunks"] > 0 and "vs_fixed" in structured
+    assert 0.0 <= structured["hit@3"] <= 1.0
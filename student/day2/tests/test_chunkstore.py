@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+"""user-006: 오프셋 색인 랜덤 액세스 청크 저장소"""
+import pytest
+
+from student.day2.impl.chunkstore import ChunkStore, write_chunkstore, chunkstore_exists
+from student.day2.impl.store import FaissStore
+
+from conftest import items_for
+
+
+@pytest.mark.parametrize("block_size, compress", [(1, False), (4, False), (4, True)])
+def test_random_access_roundtrip(tmp_path, block_size, compress):
+    items = items_for(10)
+    items[3]["text"] = "줄바꿈\n이 들어간 한글 청크"
+    assert write_chunkstore(str(tmp_path), items, block_size=block_size, compress=compress) == 10
+    assert chunkstore_exists(str(tmp_path))
+    cs = ChunkStore(str(tmp_path), cache_size=2)
+    assert len(cs) == 10
+    for i in (9, 0, 3, 7, 3):
+        assert cs[i] == items[i]
+    assert cs[-1] == items[9]
+    assert cs.get_many([5, 1]) == [items[5], items[1]]
+    assert list(cs) == items
+    with pytest.raises(IndexError):
+        cs[10]
+
+
+def test_loaded_store_reads_chunks_lazily(flat_index):
+    store = FaissStore.load(f"{flat_index}/faiss.index", f"{flat_index}/docs.jsonl")
+    assert isinstance(store.docs, ChunkStore)
+    last = store.docs[len(store.docs) - 1]
+    assert last["id"].endswith(f"::chunk_{last['meta']['chunk']:04d}")
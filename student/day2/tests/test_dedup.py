@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+"""user-025: 완전/근접 중복 청크 제거 + 공유 행 소유권을 지키는 증분 갱신"""
+import os
+
+import numpy as np
+import pytest
+
+from student.common.schemas import Day2Plan
+from student.day2.impl.build_index import build_index
+from student.day2.impl.incremental import update_index, compact_index, read_sources, read_dedup
+from student.day2.impl.ingest import NearDupIndex, dedup_corpus, simhash64
+from student.day2.impl.rag import Day2Agent
+from student.day2.impl.store import FaissStore
+
+from conftest import MODEL, write_docs
+
+NOTICE = "본 문서는 저작권법의 보호를 받으며 무단 전재와 재배포를 금지합니다. 모든 권리는 발행처에 있습니다. " * 5
+OTHER = "의료 인공지능 규제 개요와 책임 소재에 관한 설명입니다. " * 5
+
+
+def _item(path, text, i=0):
+    return {"id": f"{path}::chunk_{i:04d}", "text": text, "meta": {"path": path, "chunk": i}}
+
+
+def test_exact_and_near_duplicates_collapse_to_first():
+    items = [_item("a", NOTICE + "1쪽"), _item("b", OTHER), _item("c", "  " + NOTICE.upper() + "1쪽"),
+             _item("d", NOTICE + "2쪽"), _item("e", "짧은 꼬리말 1"), _item("f", "짧은 꼬리말 2")]
+    kept, rows, stats = dedup_corpus(items)
+    assert [it["meta"]["path"] for it in kept] == ["a", "b", "e", "f"]  # 짧은 청크는 완전 중복만 검사
+    assert rows == [0, 1, 0, 0, 2, 3]
+    assert kept[0]["meta"]["dup_count"] == 2 and kept[0]["meta"]["alias_paths"] == ["c", "d"]
+    assert (stats["exact_duplicates"], stats["near_duplicates"]) == (1, 1)
+    assert stats["chunks_in"] == 6 and stats["chunks_kept"] == 4 and 0 < stats["embedding_saved_ratio"] < 1
+
+
+def test_near_duplicates_can_be_disabled():
+    items = [_item("a", NOTICE + "1쪽"), _item("d", NOTICE + "2쪽")]
+    assert len(dedup_corpus(items, near=False)[0]) == 2
+    idx = NearDupIndex()
+    assert idx.check(NOTICE + "1쪽") == (0, "new")
+    assert idx.check(NOTICE + "2쪽") == (0, "near")
+    assert idx.check(OTHER) == (1, "new")
+    assert bin(simhash64(NOTICE) ^ simhash64(OTHER)).count("1") > 4
+
+
+def _load(idx):
+    return FaissStore.load(os.path.join(idx, "faiss.index"), os.path.join(idx, "docs.jsonl"))
+
+
+def _state(idx):
+    """(파일명 → 행, 살아있는 행 → (파일명, dup_count), dedup.json 행 → 다른 파일명)"""
+    s = _load(idx)
+    tomb = set(s.tombstones.tolist())
+    name = os.path.basename
+    sources = {name(p): ent["rows"] for p, ent in read_sources(idx).items()}
+    live = {r: (name(s.docs[r]["meta"]["path"]), s.docs[r]["meta"].get("dup_count"))
+            for r in range(s.index.ntotal) if r not in tomb}
+    dedup = {int(r): [name(p) for p in v["paths"]] for r, v in read_dedup(idx).items()}
+    return sources, live, dedup
+
+
+@pytest.fixture
+def dedup_index(tmp_path):
+    docs = write_docs(tmp_path / "docs", {"a.txt": NOTICE, "b.txt": NOTICE, "c.txt": NOTICE + " ", "e.txt": OTHER})
+    idx = str(tmp_path / "idx")
+    build_index([str(docs)], idx, model=MODEL, dedup=True, versioned=False)
+    return docs, idx
+
+
+def test_build_records_every_owner(dedup_index):
+    _, idx = dedup_index
+    sources, live, dedup = _state(idx)
+    assert sources == {"a.txt": [0], "b.txt": [0], "c.txt": [0], "e.txt": [1]}
+    assert live == {0: ("a.txt", 2), 1: ("e.txt", None)}
+    assert dedup == {0: ["b.txt", "c.txt"]}
+
+
+def test_deleting_canonical_file_rehomes_shared_row(dedup_index):
+    docs, idx = dedup_index
+    os.remove(docs / "a.txt")
+    stats = update_index([str(docs)], idx, auto_compact=False)
+    assert stats["chunks_deleted"] == 0 and stats["chunks_embedded"] == 0
+    sources, live, dedup = _state(idx)
+    assert sources == {"b.txt": [0], "c.txt": [0], "e.txt": [1]}
+    assert live == {0: ("b.txt", 1), 1: ("e.txt", None)}
+    assert dedup == {0: ["c.txt"]}
+    assert [os.path.basename(p) for p in _load(idx).docs[0]["meta"]["alias_paths"]] == ["c.txt"]
+
+
+def test_changing_alias_keeps_canonical_record(dedup_index):
+    docs, idx = dedup_index
+    (docs / "b.txt").write_text("b 는 이제 다른 문서 " * 10, encoding="utf-8")
+    update_index([str(docs)], idx, auto_compact=False)
+    sources, live, dedup = _state(idx)
+    assert sources["a.txt"] == sources["c.txt"] == [0] and sources["b.txt"] == [2]
+    assert live[0] == ("a.txt", 1) and live[2] == ("b.txt", None)
+    assert dedup == {0: ["c.txt"]}
+
+
+def test_changing_canonical_moves_record_to_remaining_owner(dedup_index):
+    docs, idx = dedup_index
+    os.remove(docs / "b.txt")
+    update_index([str(docs)], idx, auto_compact=False)
+    (docs / "a.txt").write_text(NOTICE + "추가", encoding="utf-8")
+    update_index([str(docs)], idx, auto_compact=False)
+    sources, live, dedup = _state(idx)
+    assert sources["c.txt"] == [0] and sources["a.txt"] == [2]
+    assert live[0] == ("c.txt", None) and live[2] == ("a.txt", None)
+    assert dedup == {}
+
+
+def test_last_owner_gone_tombstones_row_and_compact_remaps(dedup_index):
+    docs, idx = dedup_index
+    for n in ("a.txt", "b.txt", "c.txt"):
+        os.remove(docs / n)
+    stats = update_index([str(docs)], idx, auto_compact=False)
+    assert stats["chunks_deleted"] == 1
+    assert _state(idx)[1] == {1: ("e.txt", None)}
+    assert compact_index(idx) == {"removed": 1, "count": 1}
+    sources, live, dedup = _state(idx)
+    assert sources == {"e.txt": [0]} and live == {0: ("e.txt", None)} and dedup == {}
+
+
+def test_path_filter_matches_alias_paths(dedup_index):
+    docs, idx = dedup_index
+
+    def rows(name):
+        return np.flatnonzero(_load(idx).filter_mask({"path": str(docs / name)})).tolist()
+
+    assert rows("a.txt") == rows("b.txt") == rows("c.txt") == [0]
+    plan = Day2Plan(index_dir=idx, embedding_model=MODEL, top_k=3, min_score=0.0, min_mean_topk=0.0,
+                    filters={"path": str(docs / "b.txt")})
+    ctx = Day2Agent(plan).handle("저작권법 무단 전재")["contexts"]
+    assert [c["meta"]["path"] for c in ctx] == [str(docs / "a.txt")]
+
+    os.remove(docs / "a.txt")  # 대표 파일 삭제 → b.txt 로 이전, 별칭은 c.txt 만
+    update_index([str(docs)], idx, auto_compact=False)
+    assert rows("a.txt") == [] and rows("b.txt") == rows("c.txt") == [0]
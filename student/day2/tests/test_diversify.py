@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+"""user-011: MMR 다양화 + 인접 청크 병합"""
+import numpy as np
+
+from student.common.schemas import Day2Plan
+from student.day2.impl.diversify import mmr_select, merge_adjacent, chunk_overlap_of, MIN_OVERLAP
+from student.day2.impl.rag import Day2Agent
+from student.day2.impl.embeddings import Embeddings
+
+from conftest import MODEL
+
+
+def test_mmr_skips_near_duplicates():
+    q = np.array([1.0, 0.0, 0.0], dtype="float32")
+    a = np.array([0.9, 0.436, 0.0], dtype="float32")
+    dup = a + np.array([0.0, 0.0, 0.01], dtype="float32")
+    b = np.array([0.8, 0.0, 0.6], dtype="float32")
+    V = np.stack([a, dup, b])
+    V /= np.linalg.norm(V, axis=1, keepdims=True)
+    pick = mmr_select(q, V, V @ q, k=2, lam=0.7, dup_threshold=0.95)
+    assert pick.tolist() == [0, 2]
+    assert mmr_select(q, V, V @ q, k=3, lam=1.0, dup_threshold=1.01).tolist() == [0, 1, 2]
+
+
+def test_merge_adjacent_removes_overlap_and_keeps_best_rank():
+    ctx = [
+        {"doc_id": "a1", "chunk": "CDEFG", "score": 0.9, "meta": {"path": "a", "chunk": 1}},
+        {"doc_id": "b0", "chunk": "xyz", "score": 0.8, "meta": {"path": "b", "chunk": 0}},
+        {"doc_id": "a0", "chunk": "ABCDE", "score": 0.7, "meta": {"path": "a", "chunk": 0}},
+        {"doc_id": "a3", "chunk": "QRS", "score": 0.6, "meta": {"path": "a", "chunk": 3}},
+    ]
+    out = merge_adjacent(ctx, overlap=3)
+    assert [c["doc_id"] for c in out] == ["a0", "b0", "a3"]
+    assert out[0]["chunk"] == "ABCDEFG"
+    assert out[0]["score"] == 0.9
+    assert out[0]["meta"]["chunks"] == [0, 1]
+
+
+def _pair(a, b):
+    return [{"doc_id": "0", "chunk": a, "score": 0.9, "meta": {"path": "p", "chunk": 0}},
+            {"doc_id": "1", "chunk": b, "score": 0.8, "meta": {"path": "p", "chunk": 1}}]
+
+
+def test_merge_adjacent_keeps_accidental_short_match():
+    assert merge_adjacent(_pair("규정이다.", "다. 다음 조항"))[0]["chunk"] == "규정이다.다. 다음 조항"
+    assert merge_adjacent(_pair("규정이다.", "다. 다음 조항"), overlap=5)[0]["chunk"] == "규정이다.다. 다음 조항"
+    shared = "가" * MIN_OVERLAP
+    assert merge_adjacent(_pair("앞" + shared, shared + "뒤"))[0]["chunk"] == "앞" + shared + "뒤"
+    assert chunk_overlap_of({"chunking": {"chunker": "fixed", "chunk_size": 1200, "chunk_overlap": 200}}) == 200
+    assert chunk_overlap_of({"chunking": {"chunker": "structured", "chunk_overlap_tokens": 40}}) is None
+
+
+def test_mmr_plan_returns_no_near_duplicates(flat_index):
+    plan = Day2Plan(index_dir=flat_index, embedding_model=MODEL, top_k=3, min_score=0.0, min_mean_topk=0.0,
+                    mmr=True, dup_threshold=0.9)
+    out = Day2Agent().handle("가명정보 통계 작성 과학적 연구", plan)
+    assert len(out["contexts"]) >= 2
+    V = Embeddings(model=MODEL).encode([c["chunk"] for c in out["contexts"]])
+    sim = V @ V.T
+    assert np.all(sim[np.triu_indices(len(V), 1)] < 0.9)
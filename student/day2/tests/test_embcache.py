@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+"""user-018: 내용 주소 기반 임베딩 디스크 캐시"""
+import numpy as np
+import pytest
+
+import student.day2.impl.build_index as build_mod
+import student.day2.impl.embeddings as embeddings
+from student.day2.impl.build_index import build_index, build_report
+from student.day2.impl.embcache import EmbeddingCache, cache_key
+from student.day2.impl.rag import _load_store
+from student.day2.impl.session import get_session
+
+from conftest import FakeApi, api_embeddings, unit_rows, MODEL
+
+
+@pytest.fixture
+def cache(tmp_path):
+    c = EmbeddingCache(str(tmp_path / "emb.sqlite"))
+    yield c
+    c.close()
+
+
+def test_key_ignores_whitespace_but_not_model_or_dims():
+    assert cache_key("m", 8, "가  나\n다") == cache_key("m", 8, " 가 나 다 ")
+    assert cache_key("m", 8, "가") != cache_key("m", 16, "가")
+    assert cache_key("m", 8, "가") != cache_key("n", 8, "가")
+
+
+def test_roundtrip_is_float16_and_renormalized(cache):
+    X = unit_rows(5, 32)
+    keys = [cache_key("m", 32, f"t{i}") for i in range(5)]
+    cache.put_many(list(zip(keys, X)))
+    found = cache.get_many(keys + [cache_key("m", 32, "없음")])
+    assert len(found) == 5
+    for k, x in zip(keys, X):
+        assert found[k].dtype == np.float32
+        assert np.linalg.norm(found[k]) == pytest.approx(1.0, abs=1e-6)
+        np.testing.assert_allclose(found[k], x, atol=2e-3)
+    assert cache.stats()["bytes"] == 5 * 32 * 2
+    assert (cache.hits, cache.misses) == (5, 1)
+
+
+def test_evicts_least_recently_used_over_capacity(tmp_path):
+    c = EmbeddingCache(str(tmp_path / "emb.sqlite"), max_bytes=10 * 64)  # float16 32차원 = 64B → 10개
+    X = unit_rows(12, 32)
+    keys = [cache_key("m", 32, f"t{i}") for i in range(12)]
+    for k, x in zip(keys[:10], X[:10]):
+        c.put_many([(k, x)])
+    c.get_many([keys[0]])  # 가장 오래된 항목을 최근 사용으로 갱신
+    c.put_many(list(zip(keys[10:], X[10:])))
+    st = c.stats()
+    assert st["bytes"] <= 10 * 64
+    found = c.get_many(keys)
+    assert keys[0] in found and keys[1] not in found and keys[11] in found
+    c.close()
+
+
+def test_second_encode_hits_cache_and_duplicates_are_requested_once(tmp_path):
+    api = FakeApi()
+    emb = api_embeddings(api, max_concurrency=1)
+    emb.cache = EmbeddingCache(str(tmp_path / "emb.sqlite"))  # 로컬 모델로 생성해 캐시가 꺼져 있음 → 직접 연결
+    texts = ["첫 문장", "둘째  문장", "첫 문장", "둘째 문장 "]
+    V1 = emb.encode(texts)
+    assert sum(len(c) for c in api.calls) == 2  # 정규화 후 같은 텍스트는 한 번만 요청
+    np.testing.assert_allclose(V1[0], V1[2])
+    np.testing.assert_allclose(V1[1], V1[3])
+
+    api.calls.clear()
+    V2 = emb.encode(texts)
+    assert api.calls == []
+    np.testing.assert_allclose(V2, V1, atol=2e-3)
+    assert emb.cache.stats()["hit_rate"] > 0
+    emb.cache.close()
+
+
+def test_local_backend_has_no_cache(tmp_path):
+    from student.day2.impl.embeddings import Embeddings
+    assert Embeddings(model="local-hash-16", cache_path=str(tmp_path / "emb.sqlite")).cache is None
+
+
+def test_build_reports_cache_usage_and_query_path_has_no_cache(tmp_path, docs_dir, monkeypatch, capsys):
+    monkeypatch.setattr(embeddings, "get_encoder", lambda model=None: None)
+    monkeypatch.setattr(embeddings, "make_backend", lambda model, dims=None: FakeApi(dim=64))
+    monkeypatch.setattr(build_mod, "EMB_CACHE_PATH", str(tmp_path / "emb.sqlite"))
+    out = str(tmp_path / "idx")
+    for _ in range(2):
+        build_index([str(docs_dir)], out, model=MODEL, versioned=False)
+    usage = build_report(out)["embedding_usage"]
+    assert usage["api_requests"] == 0 and usage["embedding_cache"]["hit_rate"] == 1.0  # 두 번째 빌드는 전부 캐시
+    assert capsys.readouterr().out == ""
+    assert get_session(out, MODEL, _load_store).embedder.cache is None  # 질의 경로는 캐시를 쓰지 않음
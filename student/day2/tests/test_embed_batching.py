@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+"""user-017: 요청 1회에 여러 입력 (토큰 기준 묶음) + 실패 배치 분할 재시도"""
+import numpy as np
+import pytest
+
+from conftest import FakeApi, ApiError, api_embeddings
+
+
+TEXTS = [f"문서 {i} 의 본문 텍스트" for i in range(7)]
+
+
+def test_packs_inputs_per_request_and_keeps_order():
+    api = FakeApi()
+    emb = api_embeddings(api, batch_size=3, max_concurrency=1)
+    V = emb.encode(TEXTS)
+    assert [len(c) for c in api.calls] == [3, 3, 1]
+    assert emb.requests == 3
+    np.testing.assert_allclose(V, api.inner.embed(TEXTS), atol=1e-6)
+
+
+def test_request_token_budget_splits_batches():
+    api = FakeApi()
+    emb = api_embeddings(api, batch_size=100, max_concurrency=1)
+    per_text = emb.count_tokens(TEXTS[0])
+    emb.max_request_tokens = per_text * 2
+    emb.encode(TEXTS)
+    assert [len(c) for c in api.calls] == [2, 2, 2, 1]
+
+
+def test_concurrent_batches_are_assembled_in_input_order():
+    api = FakeApi()
+    emb = api_embeddings(api, batch_size=2, max_concurrency=4)
+    texts = [f"입력 {i}" for i in range(40)]
+    np.testing.assert_allclose(emb.encode(texts), api.inner.embed(texts), atol=1e-6)
+    assert len(api.calls) == 20
+
+
+def test_bad_request_splits_batch_until_it_succeeds():
+    bad = TEXTS[4]
+    api = FakeApi(fail=lambda texts: ApiError(400) if bad in texts and len(texts) > 1 else None)
+    emb = api_embeddings(api, batch_size=8, max_concurrency=1)
+    V = emb.encode(TEXTS)
+    np.testing.assert_allclose(V, api.inner.embed(TEXTS), atol=1e-6)
+    assert len(api.calls[0]) == 7 and [bad] in api.calls
+
+
+def test_single_input_failure_is_raised():
+    api = FakeApi(fail=lambda texts: ApiError(400))
+    emb = api_embeddings(api, max_concurrency=1)
+    with pytest.raises(ApiError):
+        emb.encode(["하나"])
+
+
+def test_overlong_input_is_truncated_to_token_limit():
+    emb = api_embeddings(FakeApi())
+    text, n = emb._prepare("가" * 50_000, max_tokens=100)
+    assert n <= 100 and emb.count_tokens(text) <= 100 and len(text) > 0
+    assert emb._prepare("")[0] == " "  # 빈 입력은 API 가 거부 → 공백 1칸
@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+"""user-014: 컬렉션별 하위 인덱스 + 중심 기반 질의 라우팅"""
+import json
+import os
+
+import numpy as np
+import pytest
+
+from student.common.schemas import Day2Plan
+from student.day2.impl.build_index import build_federated, build_report
+from student.day2.impl.embeddings import Embeddings
+import student.day2.impl.federation as federation
+from student.day2.impl.federation import (
+    group_by_collection, read_collections, get_router, spherical_kmeans, is_federated, collection_dir,
+    write_collections,
+)
+from student.day2.impl.manifest import manifest_path
+from student.day2.impl.versions import resolve_index_dir
+from student.day2.impl.rag import Day2Agent
+
+from conftest import MODEL, DOCS, write_docs, unit_rows
+
+
+def _raw(tmp_path):
+    raw = tmp_path / "raw"
+    write_docs(raw / "law", {"privacy.txt": DOCS["privacy.txt"], "finance.md": DOCS["finance.md"]})
+    write_docs(raw / "medical", {"medical.txt": DOCS["medical.txt"]})
+    write_docs(raw, {"readme.txt": "컬렉션 폴더 밖의 파일은 default 컬렉션으로 묶인다. " * 5})
+    return raw
+
+
+def test_group_by_first_level_directory(tmp_path):
+    groups = group_by_collection([str(_raw(tmp_path))])
+    assert sorted(groups) == ["default", "law", "medical"]
+    assert len(groups["law"]) == 2
+
+
+def test_spherical_kmeans_centroids_are_unit_norm():
+    c = spherical_kmeans(unit_rows(300, 16), 4)
+    assert c.shape == (4, 16)
+    np.testing.assert_allclose(np.linalg.norm(c, axis=1), 1.0, rtol=1e-5)
+
+
+def test_routed_query_searches_matching_collection(tmp_path, capsys):
+    out_dir = str(tmp_path / "fed")
+    build_federated([str(_raw(tmp_path))], out_dir, centroids=2, model=MODEL)
+    assert is_federated(out_dir)
+    assert read_collections(out_dir) == ["default", "law", "medical"]
+    assert capsys.readouterr().out == ""  # 진행 상황은 로그로만, 요약은 CLI 가 build_report 로 출력
+    assert build_report(collection_dir(out_dir, "law"))["count"] >= 2
+
+    q = "Software as a medical device must document its risk class"
+    qv = Embeddings(model=MODEL).encode([q])[0]
+    assert get_router(out_dir).route(qv, 1) == ["medical"]
+
+    plan = Day2Plan(index_dir=out_dir, embedding_model=MODEL, route_top=1, top_k=3,
+                    min_score=0.0, min_mean_topk=0.0)
+    ctx = Day2Agent(plan).handle(q)["contexts"]
+    assert ctx and {c["meta"]["collection"] for c in ctx} == {"medical"}
+    all_ctx = Day2Agent(plan).handle(q, Day2Plan(**{**plan.__dict__, "route_top": 0}))["contexts"]
+    assert all_ctx[0]["doc_id"] == ctx[0]["doc_id"]
+    assert [c["score"] for c in all_ctx] == sorted((c["score"] for c in all_ctx), reverse=True)
+
+
+def test_router_cache_is_per_root_and_rejects_mixed_models(tmp_path):
+    out_dir = str(tmp_path / "fed")
+    build_federated([str(_raw(tmp_path))], out_dir, centroids=2, model=MODEL)
+    first = get_router(out_dir)
+    assert get_router(out_dir) is first and first.embedding == (MODEL, None)
+    cached = len(federation._ROUTERS)
+
+    path = manifest_path(resolve_index_dir(collection_dir(out_dir, "medical")))
+    with open(path, encoding="utf-8") as f:
+        man = json.load(f)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(dict(man, embedding_model="local-hash-32"), f)
+    write_collections(out_dir, read_collections(out_dir), 2)
+    os.utime(os.path.join(out_dir, federation.COLLECTIONS_NAME), ns=(1, 1))  # mtime 변경 보장 → 라우터 재생성
+    with pytest.raises(ValueError):
+        get_router(out_dir)
+    assert len(federation._ROUTERS) == cached  # 루트당 1개 → 재빌드마다 쌓이지 않음
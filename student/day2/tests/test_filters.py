@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+"""user-010: 메타데이터 필터를 FAISS 검색 내부(IDSelector)로 적용"""
+import numpy as np
+import pytest
+
+from student.day2.impl.metaindex import MetaIndex, MetaIndexWriter
+from student.day2.impl.store import FaissStore
+
+from conftest import unit_rows
+
+METAS = [
+    {"path": "data/raw/a.pdf", "chunk": 0, "doc_type": "law"},
+    {"path": "data/raw/a.pdf", "chunk": 1, "doc_type": "law"},
+    {"path": "data/raw/b.pdf", "chunk": 0, "doc_type": "guide"},
+    {"path": "other/c.txt", "chunk": 0, "tags": ["x", "y"]},
+    {"path": "other/c.txt", "chunk": 1},
+]
+
+
+def _ids(mask):
+    return np.flatnonzero(mask).tolist()
+
+
+def test_meta_index_operators(tmp_path):
+    w = MetaIndexWriter(str(tmp_path))
+    for m in METAS:
+        w.add(m)
+    w.finish()
+    mi = MetaIndex.load(str(tmp_path))
+    assert _ids(mi.mask({"path": "data/raw/a.pdf"})) == [0, 1]
+    assert _ids(mi.mask({"path": {"$prefix": "data/raw/"}, "chunk": {"$gte": 1}})) == [1]
+    assert _ids(mi.mask({"path": {"$in": ["data/raw/b.pdf", "other/c.txt"]}, "chunk": {"$lt": 1}})) == [2, 3]
+    assert _ids(mi.mask({"$or": [{"doc_type": "law"}, {"doc_type": "guide"}]})) == [0, 1, 2]
+    assert _ids(mi.mask({"$not": {"doc_type": {"$in": ["law", "guide"]}}})) == [3, 4]
+    assert _ids(mi.mask({"tags": "y"})) == [3]
+    with pytest.raises(ValueError):
+        mi.mask({"chunk": {"$regex": "x"}})
+
+
+@pytest.mark.parametrize("index_type", ["flat", "hnsw"])
+def test_filtered_search_returns_only_matching_rows(tmp_path, index_type):
+    X = unit_rows(400, 16)
+    items = [{"id": str(i), "text": f"t{i}", "meta": {"path": f"p{i % 4}.txt", "chunk": i // 4}} for i in range(400)]
+    store = FaissStore(16, str(tmp_path / "faiss.index"), str(tmp_path / "docs.jsonl"), index_type=index_type)
+    store.add(X, items)
+    store.save()
+    store = FaissStore.load(str(tmp_path / "faiss.index"), str(tmp_path / "docs.jsonl"))
+    store.delete([6])
+    flt = {"path": "p2.txt", "chunk": {"$lt": 50}}
+    scores, ids = store.search_ids(X[6], 10, ef_search=400, filter=flt)
+    assert ids.size == 10
+    assert all(i % 4 == 2 and i // 4 < 50 for i in ids.tolist())
+    assert 6 not in ids.tolist()                          # tombstone 은 필터와 함께 제외
+    allowed = [i for i in range(400) if i % 4 == 2 and i // 4 < 50 and i != 6]
+    assert ids.tolist() == [allowed[j] for j in np.argsort(-(X[allowed] @ X[6]))[:10]]
+    assert store.search_ids(X[0], 5, filter={"path": "none.txt"})[1].size == 0
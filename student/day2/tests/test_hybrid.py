@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+"""user-009: BM25 역색인 + RRF 하이브리드 검색"""
+import numpy as np
+
+from student.common.schemas import Day2Plan
+from student.day2.impl.bm25 import BM25Index, BM25Writer, tokenize, rrf_fuse
+from student.day2.impl.rag import Day2Agent
+
+from conftest import MODEL
+
+
+def test_tokenize_keeps_law_references_and_strips_josa():
+    toks = tokenize("개인정보 보호법 제17조의2 에서는 제공을 규정한다")
+    assert "제17조의2" in toks
+    assert "개인정보" in toks
+    assert "제공" in toks  # 조사 '을' 제거
+
+
+def test_bm25_ranks_exact_term_and_honours_exclude_and_allow(tmp_path):
+    texts = ["사과 배 포도", "제3조의2 보고 의무", "보고서 작성 방법", "제3조의2 위반 시 과태료"]
+    w = BM25Writer(str(tmp_path))
+    for t in texts:
+        w.add(t)
+    w.finish()
+    idx = BM25Index.load(str(tmp_path))
+    _, ids = idx.search("제3조의2", 10)
+    assert set(ids.tolist()) == {1, 3}
+    _, ids = idx.search("제3조의2", 10, exclude=np.array([1]))
+    assert ids.tolist() == [3]
+    allow = np.array([True, True, False, False])
+    _, ids = idx.search("제3조의2", 10, allow=allow)
+    assert ids.tolist() == [1]
+    assert idx.search("없는단어", 10)[1].size == 0
+
+
+def test_rrf_prefers_ids_ranked_by_both():
+    fused = rrf_fuse([np.array([1, 2, 3]), np.array([3, 1, 4])], k=60)
+    assert [i for i, _ in fused][:2] == [1, 3]
+    assert fused[0][1] == 1 / 61 + 1 / 62
+
+
+def test_hybrid_plan_returns_fused_scores(flat_index):
+    plan = Day2Plan(index_dir=flat_index, embedding_model=MODEL, hybrid=True, top_k=3,
+                    min_score=0.0, min_mean_topk=0.0)
+    out = Day2Agent(plan).handle("제17조의2 제3자 제공 특례")
+    ctx = out["contexts"]
+    assert ctx and all("fused_score" in c for c in ctx)
+    assert ctx[0]["meta"]["path"].endswith("privacy.txt")
+    assert [c["fused_score"] for c in ctx] == sorted((c["fused_score"] for c in ctx), reverse=True)
@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+"""user-007: 콘텐츠 해시 기준 증분 갱신 (add / update / delete) + tombstone + compact"""
+import os
+import shutil
+
+import numpy as np
+
+from student.day2.impl.build_index import build_index
+from student.day2.impl.incremental import update_index, compact_index, read_sources
+from student.day2.impl.store import FaissStore
+from student.day2.impl.embeddings import Embeddings
+from student.day2.impl.manifest import read_manifest
+
+from conftest import MODEL, DOCS, write_docs
+
+
+def _load(d):
+    return FaissStore.load(f"{d}/faiss.index", f"{d}/docs.jsonl")
+
+
+def _live_paths(store):
+    tomb = set(store.tombstones.tolist())
+    return {store.docs[r]["meta"]["path"] for r in range(store.index.ntotal) if r not in tomb}
+
+
+def test_unchanged_files_are_skipped(docs_dir, flat_index):
+    stats = update_index([str(docs_dir)], flat_index, auto_compact=False)
+    assert stats["files_unchanged"] == 3
+    assert stats["chunks_embedded"] == 0 and stats["chunks_deleted"] == 0
+
+
+def test_add_change_delete(docs_dir, flat_index):
+    p = docs_dir / "long.txt"  # fixed 청크 여러 개 → 끝에 덧붙이면 마지막 청크만 바뀜
+    p.write_text("".join(f"{i}번째 조항은 보고 의무와 기한을 정한다. " for i in range(200)), encoding="utf-8")
+    update_index([str(docs_dir)], flat_index, auto_compact=False)
+    before = _load(flat_index).index.ntotal
+    old_rows = read_sources(flat_index)[str(p)]["rows"]
+    write_docs(docs_dir, {"new.txt": "새 문서의 내용입니다. " * 10})
+    p.write_text(p.read_text(encoding="utf-8") + " 마지막 문장을 덧붙였다.", encoding="utf-8")
+    os.remove(docs_dir / "medical.txt")
+
+    stats = update_index([str(docs_dir)], flat_index, auto_compact=False)
+    assert (stats["files_added"], stats["files_changed"], stats["files_deleted"]) == (1, 1, 1)
+    assert stats["chunks_reused"] >= 1                    # 앞쪽 청크는 벡터 재사용
+    store = _load(flat_index)
+    assert read_manifest(flat_index)["count"] == store.index.ntotal > before
+    assert store.tombstones.size == stats["chunks_deleted"]
+    assert read_sources(flat_index)[str(p)]["rows"][:3] == old_rows[:3]
+    assert str(docs_dir / "medical.txt") not in _live_paths(store)
+
+    # tombstone 행은 검색에 나오지 않음
+    q = Embeddings(model=MODEL).encode(["Medical AI devices require clinical validation"])[0]
+    _, ids = store.search_ids(q, store.index.ntotal)
+    assert not set(ids.tolist()) & set(store.tombstones.tolist())
+
+
+def test_compact_drops_tombstones_and_remaps_sources(docs_dir, flat_index):
+    os.remove(docs_dir / "finance.md")
+    update_index([str(docs_dir)], flat_index, auto_compact=False)
+    live = _live_paths(_load(flat_index))
+    res = compact_index(flat_index)
+    store = _load(flat_index)
+    assert res["removed"] > 0 and store.tombstones.size == 0
+    assert store.index.ntotal == res["count"]
+    assert {d["meta"]["path"] for d in store.docs} == live
+    rows = sorted(r for ent in read_sources(flat_index).values() for r in ent["rows"])
+    assert rows == list(range(store.index.ntotal))
+    # 재구성된 인덱스의 벡터 = 원래 청크의 임베딩
+    emb = Embeddings(model=MODEL)
+    np.testing.assert_allclose(store.all_vectors()[:3], emb.encode([d["text"] for d in list(store.docs)[:3]]),
+                               atol=1e-5)
+
+
+def test_update_appends_rows_and_merges_indexes(tmp_path, docs_dir, flat_index):
+    data = (tmp_path / "idx" / "chunks.dat").read_bytes()
+    write_docs(docs_dir, {"new.txt": "새 문서의 가명정보 내용입니다. " * 10})
+    os.remove(docs_dir / "medical.txt")
+    update_index([str(docs_dir)], flat_index, auto_compact=False)
+    assert (tmp_path / "idx" / "chunks.dat").read_bytes().startswith(data)  # 기존 레코드는 그대로, 새 행만 뒤에
+    assert not (tmp_path / "idx" / "chunks.upd.jsonl").exists()            # 바뀐 레코드 없음
+
+    # 전체 재작성(save)과 같은 색인
+    ref_dir = tmp_path / "ref"
+    shutil.copytree(flat_index, ref_dir)
+    _load(ref_dir).save()
+    got, ref = _load(flat_index), _load(ref_dir)
+    np.testing.assert_array_equal(got.bm25.doclen, ref.bm25.doclen)
+    for term, t in ref.bm25.vocab.items():  # 삭제된 문서에만 있던 어휘는 포스팅 없이 남을 수 있음
+        g = got.bm25.vocab[term]
+        for name in ("docids", "tfs"):
+            np.testing.assert_array_equal(getattr(got.bm25, name)[got.bm25.offsets[g]:got.bm25.offsets[g + 1]],
+                                          getattr(ref.bm25, name)[ref.bm25.offsets[t]:ref.bm25.offsets[t + 1]])
+        assert got.bm25.idf[g] == ref.bm25.idf[t]
+    for expr in ({"path": str(docs_dir / "new.txt")}, {"chunk": {"$lt": 2}}, {"path": str(docs_dir / "medical.txt")}):
+        np.testing.assert_array_equal(got.filter_mask(expr), ref.filter_mask(expr))
+    assert [d["id"] for d in got.docs] == [d["id"] for d in ref.docs]
+
+
+def test_compact_with_every_row_deleted(tmp_path, docs_dir):
+    out = str(tmp_path / "hnsw")
+    build_index([str(docs_dir)], out, model=MODEL, index_type="hnsw", storage="sq8", versioned=False)
+    for name in DOCS:
+        os.remove(docs_dir / name)
+    update_index([str(docs_dir)], out, auto_compact=False)
+    assert compact_index(out)["count"] == 0
+    assert _load(out).index.ntotal == 0 and read_sources(out) == {}
+
+    write_docs(docs_dir, {"again.txt": "다시 추가한 문서. " * 10})
+    stats = update_index([str(docs_dir)], out, auto_compact=False)
+    assert stats["files_added"] == 1 and _load(out).live_count == stats["chunks_embedded"] > 0
@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+"""user-003: IVF/HNSW 인덱스 타입 + 벡터 수 기준 자동 선택"""
+import numpy as np
+import pytest
+
+from student.day2.impl.store import FaissStore, choose_index_type, AUTO_FLAT_MAX, AUTO_HNSW_MAX
+
+from conftest import unit_rows, items_for
+
+
+def test_auto_selection_by_size():
+    assert choose_index_type(AUTO_FLAT_MAX) == "flat"
+    assert choose_index_type(AUTO_FLAT_MAX + 1) == "hnsw"
+    assert choose_index_type(AUTO_HNSW_MAX + 1) == "ivf"
+
+
+@pytest.mark.parametrize("index_type", ["flat", "ivf", "hnsw"])
+def test_self_query_finds_itself_after_reload(tmp_path, index_type):
+    X = unit_rows(2000, 32)
+    d = tmp_path / index_type
+    store = FaissStore(32, str(d / "faiss.index"), str(d / "docs.jsonl"), index_type=index_type, nlist=16)
+    store.add(X, items_for(len(X)))
+    store.save()
+    loaded = FaissStore.load(str(d / "faiss.index"), str(d / "docs.jsonl"))
+    assert loaded.index_type == index_type
+    for q in (0, 777, 1999):
+        scores, ids = loaded.search_ids(X[q], 3, nprobe=16)
+        assert ids[0] == q
+        assert scores[0] == pytest.approx(1.0, abs=1e-4)
+
+
+def test_search_params_come_from_manifest_unless_overridden(tmp_path):
+    X = unit_rows(500, 16)
+    d = tmp_path / "ivf"
+    store = FaissStore(16, str(d / "faiss.index"), str(d / "docs.jsonl"), index_type="ivf", nlist=8, nprobe=3)
+    store.add(X, items_for(len(X)))
+    store.save()
+    loaded = FaissStore.load(str(d / "faiss.index"), str(d / "docs.jsonl"))
+    assert loaded.nprobe == 3
+    assert loaded.build_info["index_params"]["nlist"] == 8
+    assert loaded._search_params().nprobe == 3          # Day2Plan.nprobe=None → 매니페스트 값
+    assert loaded._search_params(nprobe=8).nprobe == 8  # 질의별 지정이 우선
+    # nprobe = nlist 이면 완전 탐색과 같은 결과
+    exact = np.argsort(-(X @ X[5]))[:5]
+    assert loaded.search_ids(X[5], 5, nprobe=8)[1].tolist() == exact.tolist()
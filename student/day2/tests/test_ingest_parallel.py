@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+"""user-022: PDF 페이지 병렬 추출 + 페이지 텍스트 디스크 캐시 + 스트리밍 문서 로딩"""
+import pytest
+
+pytest.importorskip("pypdf")
+
+import student.day2.impl.ingest as ingest
+from student.day2.impl.ingest import read_pdf_files, iter_documents, load_documents
+
+from conftest import write_docs
+
+
+def make_pdf(path, pages):
+    """페이지마다 한 줄 텍스트가 있는 최소 PDF (Helvetica, 외부 의존 없음)"""
+    n = len(pages)
+    objs = [b"<< /Type /Catalog /Pages 2 0 R >>",
+            ("<< /Type /Pages /Kids [%s] /Count %d >>"
+             % (" ".join(f"{4 + 2 * i} 0 R" for i in range(n)), n)).encode(),
+            b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    for i, text in enumerate(pages):
+        stream = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET".encode()
+        objs.append(("<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                     "/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % (5 + 2 * i)).encode())
+        objs.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+    out, offsets = bytearray(b"%PDF-1.4\n"), []
+    for i, body in enumerate(objs):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (i + 1, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objs) + 1)
+    out += b"".join(b"%010d 00000 n \n" % o for o in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objs) + 1, xref)
+    path.write_bytes(bytes(out))
+    return str(path)
+
+
+PAGES = [f"page {i} text" for i in range(20)]  # 작업 3개 (PAGES_PER_TASK=8)
+
+
+def test_pages_are_extracted_in_order(tmp_path):
+    pdf = make_pdf(tmp_path / "a.pdf", PAGES)
+    text = read_pdf_files([pdf], cache_dir=None)[pdf]
+    assert text.split("\n") == PAGES
+
+
+def test_page_cache_skips_reextraction(tmp_path, monkeypatch):
+    pdf = make_pdf(tmp_path / "a.pdf", PAGES)
+    cache = str(tmp_path / "cache")
+    first = read_pdf_files([pdf], cache_dir=cache)[pdf]
+    monkeypatch.setattr(ingest, "_extract_pages", lambda task: pytest.fail("캐시된 페이지 재추출"))
+    assert read_pdf_files([pdf], cache_dir=cache)[pdf] == first
+
+
+def test_changed_pdf_is_extracted_again(tmp_path):
+    pdf = make_pdf(tmp_path / "a.pdf", PAGES)
+    cache = str(tmp_path / "cache")
+    read_pdf_files([pdf], cache_dir=cache)
+    make_pdf(tmp_path / "a.pdf", ["changed"] + PAGES[1:])  # 파일 해시가 바뀜 → 새 캐시 키
+    assert read_pdf_files([pdf], cache_dir=cache)[pdf].split("\n")[0] == "changed"
+
+
+def test_parallel_loading_keeps_input_order(tmp_path):
+    d = write_docs(tmp_path / "docs", {f"{i:02d}.txt": f"문서 {i}" for i in range(5)})
+    make_pdf(d / "03.pdf", PAGES)
+    make_pdf(d / "01.pdf", ["first pdf"] * 10)
+    seq = load_documents([str(d)], workers=1)
+    par = list(iter_documents([str(d)], workers=2, window=3))
+    assert [x["path"] for x in par] == [x["path"] for x in seq] == sorted(x["path"] for x in seq)
+    assert [x["text"] for x in par] == [x["text"] for x in seq]
+    assert next(x for x in par if x["path"].endswith("03.pdf"))["text"].startswith("page 0 text")
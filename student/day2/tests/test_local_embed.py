@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+"""user-020: 오프라인 로컬 해시 임베딩 백엔드"""
+import numpy as np
+import pytest
+
+from student.day2.impl.embeddings import Embeddings
+from student.day2.impl.local_embed import HashEmbeddings, local_dim, LOCAL_DEFAULT_DIM
+
+
+def test_model_name_parsing():
+    assert local_dim("local-hash-128") == 128
+    assert local_dim("local-hash") == LOCAL_DEFAULT_DIM
+    assert local_dim("text-embedding-3-small") is None
+    assert local_dim(None) is None
+
+
+def test_deterministic_unit_vectors():
+    texts = ["개인정보 보호법 제15조", "Medical AI devices", "금융 규제"]
+    A = HashEmbeddings(dim=96).embed(texts)
+    B = HashEmbeddings(dim=96).embed(texts)
+    assert A.shape == (3, 96) and A.dtype == np.float32
+    np.testing.assert_array_equal(A, B)
+    np.testing.assert_allclose(np.linalg.norm(A, axis=1), 1.0, rtol=1e-5)
+    assert not np.allclose(A, HashEmbeddings(dim=96, seed=1).embed(texts))
+
+
+def test_similar_texts_are_closer():
+    V = HashEmbeddings(dim=256).embed([
+        "개인정보의 수집과 이용 요건", "개인정보의 수집 및 이용 요건을 정한다", "Software as a medical device",
+    ])
+    assert V[0] @ V[1] > V[0] @ V[2]
+
+
+def test_case_and_whitespace_insensitive():
+    V = HashEmbeddings(dim=64).embed(["Medical  AI", "medical ai"])
+    np.testing.assert_allclose(V[0], V[1])
+
+
+def test_blocks_match_single_pass(monkeypatch):
+    import student.day2.impl.local_embed as le
+    texts = [f"텍스트 {i}" for i in range(10)]
+    full = HashEmbeddings(dim=32).embed(texts)
+    monkeypatch.setattr(le, "_BLOCK", 3)
+    np.testing.assert_allclose(HashEmbeddings(dim=32).embed(texts), full, atol=1e-6)
+
+
+def test_embeddings_uses_local_backend_without_tokenizer_or_cache():
+    emb = Embeddings(model="local-hash-48", cache_path="unused.sqlite")
+    assert emb.backend.local and emb.dim == 48
+    assert emb._enc is None and emb.cache is None
+    V = emb.encode(["가", "나"])
+    assert V.shape == (2, 48) and emb.requests == 0
+    assert emb.encode([]).shape == (0, 48)
+
+
+@pytest.mark.parametrize("dim", [16, 384])
+def test_dimension_follows_model_name(dim):
+    assert Embeddings(model=f"local-hash-{dim}").encode(["x"]).shape == (1, dim)
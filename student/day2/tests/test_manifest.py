@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+"""user-002: 인덱스 매니페스트 (로딩 시 프로브 임베딩 없이 로컬 정보만으로 호환성 검증)"""
+import pytest
+
+from student.day2.impl.manifest import read_manifest, check_compat
+from student.day2.impl.embeddings import Embeddings
+from student.day2.impl.rag import _load_store
+
+from conftest import MODEL
+
+
+def test_build_writes_manifest(flat_index):
+    m = read_manifest(flat_index)
+    assert m["embedding_model"] == MODEL
+    assert m["dim"] == 64
+    assert m["normalized"] is True
+    assert m["count"] > 0
+    assert m["chunking"]["chunker"] == "fixed"
+
+
+def test_check_compat_rejects_mismatch():
+    m = {"dim": 64, "embedding_model": MODEL, "normalized": True}
+    check_compat(m, 64, MODEL)
+    with pytest.raises(ValueError):
+        check_compat(m, 32, MODEL)
+    with pytest.raises(ValueError):
+        check_compat(m, 64, "local-hash-32")
+    with pytest.raises(ValueError):
+        check_compat(dict(m, normalized=False), 64, MODEL)
+    with pytest.raises(ValueError):  # 매니페스트 없는 구버전: 모델 기본 차원표로 검사
+        check_compat(None, 64, "text-embedding-3-small")
+
+
+def test_load_fails_fast_without_embedding_call(flat_index, monkeypatch):
+    emb = Embeddings(model="local-hash-32")
+    monkeypatch.setattr(emb, "encode", lambda *a, **k: pytest.fail("프로브 임베딩 호출"))
+    with pytest.raises(ValueError):
+        _load_store(flat_index, emb)
+    store = _load_store(flat_index, Embeddings(model=MODEL))
+    assert store.dim == 64
@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+"""user-005: 메모리 매핑 인덱스 로딩 + warm-up"""
+import faiss
+import numpy as np
+import pytest
+
+from student.day2.impl.store import FaissStore
+
+from conftest import unit_rows, items_for
+
+
+def _save(tmp_path, X, **kw):
+    d = tmp_path / "idx"
+    store = FaissStore(X.shape[1], str(d / "faiss.index"), str(d / "docs.jsonl"), **kw)
+    store.add(X, items_for(len(X)))
+    store.save()
+    return str(d / "faiss.index"), str(d / "docs.jsonl")
+
+
+def test_mmap_ivf_matches_heap_load(tmp_path):
+    X = unit_rows(1000, 32)
+    paths = _save(tmp_path, X, index_type="ivf", nlist=8)
+    heap = FaissStore.load(*paths)
+    mapped = FaissStore.load(*paths, mmap=True, warmup=True)
+    assert mapped.mmapped and not heap.mmapped
+    Q = X[:20]
+    for (s1, i1), (s2, i2) in zip(heap.search_ids_batch(Q, 5), mapped.search_ids_batch(Q, 5)):
+        assert i1.tolist() == i2.tolist()
+        np.testing.assert_allclose(s1, s2)
+    assert mapped.warmup() == X.nbytes  # IVF-Flat: 모든 리스트 코드 = 벡터 바이트
+
+
+@pytest.mark.parametrize("index_type", ["flat", "hnsw"])
+def test_mmap_maps_flat_codes_when_supported(tmp_path, index_type):
+    X = unit_rows(200, 16)
+    paths = _save(tmp_path, X, index_type=index_type)
+    store = FaissStore.load(*paths, mmap=True, warmup=True)
+    # IFC 지원 faiss: flat 코드(HNSW 는 저장 벡터) 매핑. 미지원이면 힙 로딩이고 mmapped=False 로 보고
+    assert store.mmapped == hasattr(faiss, "IO_FLAG_MMAP_IFC")
+    assert not FaissStore.load(*paths).mmapped
+    assert store.search_ids(X[3], 1)[1][0] == 3
+    assert store.docs[3]["id"].endswith("chunk_0003")
@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+"""user-015: 점수 임계값 범위 검색 + 청크 조회 전 조기 게이트"""
+import numpy as np
+import pytest
+
+from student.common.schemas import Day2Plan
+from student.day2.impl.rag import Day2Agent, _gate_scores
+from student.day2.impl.store import FaissStore
+
+from conftest import MODEL, unit_rows, items_for
+
+
+@pytest.mark.parametrize("index_type, storage", [("flat", "flat"), ("ivf", "flat"), ("hnsw", "flat"), ("flat", "sq8")])
+def test_range_search_returns_only_hits_above_floor(tmp_path, index_type, storage):
+    X = unit_rows(500, 16)
+    store = FaissStore(16, str(tmp_path / "faiss.index"), str(tmp_path / "docs.jsonl"),
+                       index_type=index_type, nlist=4, storage=storage)
+    store.add(X, items_for(len(X)))
+    exact = X @ X[9]
+    floor = float(np.sort(exact)[-4])  # 정확히 4개가 floor 이상
+    scores, ids = store.range_search_ids(X[9], floor, max_k=10, nprobe=4, ef_search=500)
+    assert sorted(ids.tolist()) == sorted(np.flatnonzero(exact >= floor).tolist())
+    assert np.all(scores >= floor - 1e-6) and np.all(np.diff(scores) <= 0)
+    assert store.range_search_ids(X[9], floor, max_k=2, nprobe=4, ef_search=500)[1].tolist() == ids[:2].tolist()
+    assert store.range_search_ids(X[9], 1.5, max_k=10, nprobe=4)[1].size == 0
+
+
+def test_gate_pads_missing_range_slots_with_zero():
+    plan = Day2Plan(top_k=4, min_score=0.5, min_mean_topk=0.5, score_floor=0.6)
+    gate = _gate_scores([0.9], plan)  # 범위 검색이 1개만 돌려줌 → 평균은 (0.9 + 0) / 4
+    assert gate["mean_topk"] == pytest.approx(0.225)
+    assert gate["status"] == "insufficient"
+    assert _gate_scores([0.9], Day2Plan(top_k=4, min_score=0.5, min_mean_topk=0.5))["status"] == "enough"
+
+
+def test_early_gate_skips_chunk_reads(flat_index, monkeypatch):
+    plan = Day2Plan(index_dir=flat_index, embedding_model=MODEL, score_floor=0.99, early_gate=True)
+    monkeypatch.setattr(FaissStore, "materialize", lambda *a, **k: pytest.fail("청크 조회"))
+    out = Day2Agent(plan).handle("전혀 관계없는 질의 zzz qqq")
+    assert out["gating"]["status"] == "insufficient"
+    assert out["contexts"] == [] and out["answer"] == ""
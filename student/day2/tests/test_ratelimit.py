@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+"""user-019: RPM/TPM 속도 제한 + Retry-After 준수 + 적응형 동시성"""
+import time
+
+import pytest
+
+from student.day2.impl.ratelimit import TokenBucket, RateLimiter, AdaptiveConcurrency, retry_after_seconds
+
+from conftest import FakeApi, ApiError, api_embeddings
+
+
+def test_token_bucket_waits_for_refill():
+    b = TokenBucket(per_minute=600, burst=2)  # 초당 10
+    t0 = time.monotonic()
+    b.acquire()
+    b.acquire()
+    assert time.monotonic() - t0 < 0.05  # 버스트 안
+    b.acquire()
+    assert time.monotonic() - t0 >= 0.08
+
+
+def test_oversized_request_consumes_whole_bucket():
+    b = TokenBucket(per_minute=6000, burst=10)
+    b.acquire(1000)  # 버킷보다 큰 요청도 영원히 막히지 않음
+    assert b.level == pytest.approx(0.0, abs=0.5)
+
+
+def test_pause_delays_next_acquire():
+    lim = RateLimiter(rpm=60_000, tpm=10_000_000)
+    lim.pause(0.1)
+    t0 = time.monotonic()
+    lim.acquire(10)
+    assert time.monotonic() - t0 >= 0.09 and lim.throttled == 1
+
+
+def test_adaptive_concurrency_halves_and_recovers():
+    c = AdaptiveConcurrency(8, increase_every=2)
+    c.throttle()
+    assert c.limit == 4
+    c.throttle(); c.throttle(); c.throttle()
+    assert c.limit == 1
+    for _ in range(4):
+        c.success()
+    assert c.limit == 3
+
+
+def test_retry_after_headers():
+    assert retry_after_seconds(ApiError(429, {"retry-after-ms": "250"})) == 0.25
+    assert retry_after_seconds(ApiError(429, {"retry-after": "2"})) == 2.0
+    assert retry_after_seconds(ApiError(429, {"retry-after": "Wed, 21 Oct 2015"})) is None
+    assert retry_after_seconds(ValueError()) is None
+
+
+def test_throttled_request_waits_and_retries_without_splitting():
+    state = {"n": 0}
+
+    def fail(texts):
+        state["n"] += 1
+        return ApiError(429, {"retry-after-ms": "100"}) if state["n"] == 1 else None
+
+    api = FakeApi(fail=fail)
+    emb = api_embeddings(api, max_concurrency=4)
+    t0 = time.monotonic()
+    V = emb.encode(["가", "나", "다"])
+    assert time.monotonic() - t0 >= 0.09
+    assert [len(c) for c in api.calls] == [3, 3]  # 429 는 배치를 나누지 않음
+    assert emb.limiter.throttled == 1 and emb.concurrency.limit == 2
+    assert V.shape == (3, api.dim)
+
+
+def test_sdk_retries_are_disabled(monkeypatch):
+    pytest.importorskip("openai")
+    from student.day2.impl.embeddings import OpenAIBackend
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+    assert OpenAIBackend("text-embedding-3-small").client.max_retries == 0
@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+"""user-001: 상주 세션 (질의마다 인덱스/임베더를 다시 만들지 않음, 파일 변경 시에만 재로딩)"""
+from student.common.schemas import Day2Plan
+from student.day2.impl.build_index import build_index
+from student.day2.impl.rag import Day2Agent, _load_store
+from student.day2.impl.session import get_session
+
+from conftest import MODEL, write_docs
+
+
+def test_store_and_embedder_stay_resident(flat_index):
+    sess = get_session(flat_index, MODEL, _load_store)
+    store, emb = sess.current()
+    assert sess.store() is store
+    assert sess.embedder is emb
+    assert sess.reloads == 1
+    assert get_session(flat_index, MODEL, _load_store) is sess
+
+
+def test_reloads_only_when_index_changes(tmp_path, docs_dir, flat_index):
+    sess = get_session(flat_index, MODEL, _load_store)
+    first = sess.store()
+    write_docs(docs_dir, {"extra.txt": "새로 추가된 문서입니다. " * 20})
+    build_index([str(docs_dir)], flat_index, model=MODEL, versioned=False)
+    second = sess.store()
+    assert second is not first
+    assert sess.reloads == 2
+    assert second.index.ntotal > first.index.ntotal
+
+
+def test_agent_answers_from_resident_session(flat_index):
+    plan = Day2Plan(index_dir=flat_index, embedding_model=MODEL, min_score=0.0, min_mean_topk=0.0)
+    agent = Day2Agent(plan)
+    out = agent.handle("개인정보 제3자 제공 특례")
+    assert out["gating"]["status"] == "enough"
+    assert out["contexts"] and out["contexts"][0]["meta"]["path"].endswith(".txt")
+    agent.handle("금융 이상거래 탐지")
+    sess = get_session(flat_index, MODEL, _load_store, mmap=plan.index_mmap, warmup=plan.index_warmup)
+    assert sess.reloads == 1
@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+"""user-013: 공유 메모리 세그먼트로 발행한 인덱스를 워커가 mmap 으로 공유 (임대 기반 회수)"""
+import os, uuid
+
+import pytest
+
+from student.common.schemas import Day2Plan
+from student.day2.impl.build_index import build_index
+from student.day2.impl.rag import Day2Agent
+from student.day2.impl.session import clear_sessions
+from student.day2.impl.shared import SharedIndexPublisher, live_leases
+from student.day2.impl.versions import current_version
+
+from conftest import MODEL, write_docs
+
+
+@pytest.fixture
+def publisher():
+    pub = SharedIndexPublisher(f"test_{uuid.uuid4().hex[:8]}")
+    yield pub
+    clear_sessions()
+    pub.close()
+
+
+def test_worker_leases_published_version_until_released(tmp_path, docs_dir, publisher):
+    root = str(tmp_path / "root")
+    build_index([str(docs_dir)], root, model=MODEL)
+    v1 = publisher.publish(root)
+    plan = Day2Plan(embedding_model=MODEL, shared_index=publisher.name, min_score=0.0, min_mean_topk=0.0)
+    out = Day2Agent(plan).handle("개인정보 수집 동의")
+    assert out["contexts"]
+    assert len(live_leases(publisher.root, v1)) == 1
+
+    write_docs(docs_dir, {"extra.txt": "두 번째 버전 문서 " * 30})
+    build_index([str(docs_dir)], root, model=MODEL)
+    v2 = publisher.publish(root)
+    assert current_version(publisher.root) == v2
+    assert os.path.isdir(os.path.join(publisher.root, "versions", v1))  # 워커가 아직 v1 사용 중
+
+    Day2Agent(plan).handle("개인정보 수집 동의")                  # 다음 질의에서 v2 로 임대 이동
+    assert live_leases(publisher.root, v1) == [] and len(live_leases(publisher.root, v2)) == 1
+    assert v1 in publisher.collect()
+    assert not os.path.exists(os.path.join(publisher.root, "versions", v1))
+
+    with pytest.raises(RuntimeError):
+        publisher.close()                                          # 살아있는 임대가 있으면 거부
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+"""user-004: SQ8/PQ/fp16 압축 저장 + 원본 벡터 재채점"""
+import numpy as np
+import pytest
+
+from student.day2.impl.store import FaissStore, pq_nbits_for, PQ_NBITS
+
+from conftest import MODEL, unit_rows, items_for
+
+
+def _build(tmp_path, X, **kw):
+    d = tmp_path / "idx"
+    store = FaissStore(X.shape[1], str(d / "faiss.index"), str(d / "docs.jsonl"), **kw)
+    store.add(X, items_for(len(X)))
+    store.save()
+    return FaissStore.load(str(d / "faiss.index"), str(d / "docs.jsonl"))
+
+
+@pytest.mark.parametrize("storage, n", [("fp16", 1000), ("sq8", 1000), ("pq", 100)])  # PQ 학습은 느려서 작게
+def test_compressed_storage_reranks_with_exact_scores(tmp_path, storage, n):
+    X = unit_rows(n, 32)
+    store = _build(tmp_path, X, storage=storage, pq_m=8)
+    assert store.storage == storage and store.reranks
+    q = X[42]
+    scores, ids = store.search_ids(q, 5)
+    assert ids[0] == 42
+    np.testing.assert_allclose(scores, X[ids] @ q, rtol=1e-5)  # 코드 근사값이 아닌 원본 내적
+    assert np.all(np.diff(scores) <= 0)
+
+
+def test_compression_report_shows_savings(tmp_path):
+    X = unit_rows(1000, 32)
+    d = tmp_path / "idx"
+    store = FaissStore(32, str(d / "faiss.index"), str(d / "docs.jsonl"), storage="sq8")
+    store.add(X, items_for(len(X)))
+    rep = store.compression_report(n_queries=50, k=5)
+    assert rep["index_bytes"] < rep["flat_bytes"]
+    assert rep["recall_rerank"] >= rep["recall_raw"]
+    assert rep["recall_rerank"] > 0.9
+
+
+def test_pq_trains_on_small_corpus(tmp_path):
+    X = unit_rows(100, 32)
+    store = _build(tmp_path, X, storage="pq", index_type="ivf", nlist=256)
+    assert store.pq_nbits == pq_nbits_for(100) < PQ_NBITS  # 벡터 수에 맞춰 코드북 축소, 로딩 시 복원
+    assert store.build_info["storage_params"]["pq_nbits"] == store.pq_nbits
+    assert store.search_ids(X[7], 3, nprobe=100)[1][0] == 7
+
+
+def test_pq_rejects_tiny_corpus(tmp_path):
+    X = unit_rows(10, 32)
+    store = FaissStore(32, str(tmp_path / "faiss.index"), str(tmp_path / "docs.jsonl"), storage="pq")
+    with pytest.raises(ValueError, match="sq8"):
+        store.add(X, items_for(len(X)))
+
+
+def test_build_keeps_compression_report_in_manifest(tmp_path, docs_dir, capsys):
+    from student.day2.impl.build_index import build_index, build_report
+    out = build_index([str(docs_dir)], str(tmp_path / "built"), model=MODEL, storage="fp16", versioned=False)
+    assert capsys.readouterr().out == ""  # 라이브러리 호출은 출력하지 않음 (CLI 만 출력)
+    rep = build_report(out)
+    assert rep["count"] > 0 and rep["compression"]["index_bytes"] < rep["compression"]["flat_bytes"]
@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+"""user-023: 메모리 상한 고정 스트리밍 빌드 + 디스크 스필 색인 + 체크포인트/재개"""
+import logging
+import os
+
+import numpy as np
+import pytest
+
+from student.day2.impl.bm25 import BM25Index, BM25Writer
+from student.day2.impl.build_index import build_index
+from student.day2.impl.embeddings import Embeddings
+from student.day2.impl.metaindex import MetaIndex, MetaIndexWriter
+from student.day2.impl.pipeline import build_streaming, has_checkpoint
+from student.day2.impl.store import FaissStore
+
+from conftest import MODEL, write_docs
+
+TEXTS = ["개인정보 보호법 제15조 수집 이용", "금융 규제 전자금융거래법", "", "Medical AI devices require validation",
+         "개인정보 제3자 제공 특례 개인정보", "금융회사 이상거래 탐지"] * 3
+METAS = [{"path": f"d{i % 4}.txt", "chunk": i, "year": 2020 + i % 3 if i % 2 else None,
+          "tags": ["a", "b"] if i % 3 == 0 else "c"} for i in range(len(TEXTS))]
+
+
+def _load(d):
+    return FaissStore.load(os.path.join(d, "faiss.index"), os.path.join(d, "docs.jsonl"))
+
+
+def test_bm25_spill_matches_in_memory_build(tmp_path):
+    ref = BM25Index.build(TEXTS, skip=[4])
+    w = BM25Writer(str(tmp_path), max_postings=3)  # 런 여러 개로 흘려 씀
+    for i, t in enumerate(TEXTS):
+        w.add(t, skip=(i == 4))
+    assert len(w.spill._runs) > 1
+    got = w.finish()
+    assert got.vocab == ref.vocab
+    for name in ("offsets", "docids", "tfs", "idf", "doclen"):
+        np.testing.assert_array_equal(np.asarray(getattr(got, name)), getattr(ref, name))
+    np.testing.assert_array_equal(got.search("개인정보 금융")[1], ref.search("개인정보 금융")[1])
+
+
+def test_meta_spill_matches_in_memory_build(tmp_path):
+    ref = MetaIndex.build(METAS)
+    w = MetaIndexWriter(str(tmp_path), max_postings=2)
+    for m in METAS:
+        w.add(m)
+    got = w.finish()
+    assert got.n == ref.n and got.cat.keys() == ref.cat.keys() and got.num.keys() == ref.num.keys()
+    for f in ref.cat:
+        assert got.cat[f].keys() == ref.cat[f].keys()
+        for v in ref.cat[f]:
+            np.testing.assert_array_equal(got.cat[f][v], ref.cat[f][v])
+    for f in ref.num:
+        np.testing.assert_array_equal(got.num[f], ref.num[f])
+    for expr in ({"tags": "a"}, {"path": ["d1.txt", "d3.txt"]}, {"year": {"$gte": 2021}}):
+        np.testing.assert_array_equal(got.mask(expr), ref.mask(expr))
+
+
+def test_streaming_build_matches_regular_build(tmp_path, docs_dir):
+    a, b = str(tmp_path / "regular"), str(tmp_path / "stream")
+    build_index([str(docs_dir)], a, model=MODEL, versioned=False)
+    build_index([str(docs_dir)], b, model=MODEL, versioned=False, streaming=True)
+    sa, sb = _load(a), _load(b)
+    assert sb.build_info["streaming"] is True
+    assert [d["id"] for d in sb.docs] == [d["id"] for d in sa.docs]
+    assert sb.index.ntotal == sa.index.ntotal
+    q = Embeddings(model=MODEL).encode(["가명정보 통계 연구"])[0]
+    np.testing.assert_array_equal(sb.search_ids(q, 3)[1], sa.search_ids(q, 3)[1])
+    np.testing.assert_array_equal(sb.bm25.search("가명정보")[1], sa.bm25.search("가명정보")[1])
+    np.testing.assert_array_equal(sb.filter_mask({"path": str(docs_dir / "medical.txt")}),
+                                  sa.filter_mask({"path": str(docs_dir / "medical.txt")}))
+
+
+def _interrupt_at(monkeypatch, call: int):
+    """call 번째 임베딩 배치에서 예외 → 빌드 중단. 반환한 dict 의 n 을 음수로 두면 더는 실패하지 않음"""
+    real, calls = Embeddings.encode, {"n": 0}
+
+    def flaky(self, texts):
+        calls["n"] += 1
+        if calls["n"] == call:
+            raise RuntimeError("중단")
+        return real(self, texts)
+
+    monkeypatch.setattr(Embeddings, "encode", flaky)
+    return calls
+
+
+def _long_docs(tmp_path, n):
+    return str(write_docs(tmp_path / "docs", {f"{i}.txt": f"문서 {i} 의 내용. " * 200 for i in range(n)}))
+
+
+def test_interrupted_build_resumes_from_checkpoint(tmp_path, monkeypatch, caplog):
+    docs = _long_docs(tmp_path, 4)
+    opts = dict(model=MODEL, stream_batch=2, checkpoint_every=1, workers=1)
+    ref = str(tmp_path / "ref")
+    build_streaming([docs], ref, **opts)
+    n = _load(ref).index.ntotal
+    assert n >= 8
+
+    out = str(tmp_path / "out")
+    calls = _interrupt_at(monkeypatch, 3)
+    with pytest.raises(RuntimeError):
+        build_streaming([docs], out, **opts)
+    assert has_checkpoint(out)
+    ck = os.path.join(out, "checkpoint")
+    assert sorted(os.listdir(ck)) == ["sources.jsonl", "state.json"]  # 인덱스 스냅샷 없음, 상태는 길이만
+    assert os.path.getsize(os.path.join(ck, "state.json")) < 2048
+
+    calls["n"] = -100  # 재개 중에는 실패하지 않음
+    with caplog.at_level(logging.INFO, logger="student.day2.impl.pipeline"):
+        build_streaming([docs], out, resume=True, **opts)
+    assert any(r.getMessage().startswith("resume from chunk") and r.args[0] > 0 for r in caplog.records)
+    assert not has_checkpoint(out)
+    got, want = _load(out), _load(ref)
+    assert got.index.ntotal == n
+    assert [d["id"] for d in got.docs] == [d["id"] for d in want.docs]
+    np.testing.assert_allclose(got.index.reconstruct_n(0, n), want.index.reconstruct_n(0, n), atol=1e-6)
+
+
+def test_resume_with_different_settings_is_rejected(tmp_path, monkeypatch):
+    docs = _long_docs(tmp_path, 2)
+    out = str(tmp_path / "out")
+    _interrupt_at(monkeypatch, 2)
+    with pytest.raises(RuntimeError):
+        build_streaming([docs], out, model=MODEL, stream_batch=2, checkpoint_every=1, workers=1)
+    assert has_checkpoint(out)
+    with pytest.raises(ValueError):
+        build_streaming([docs], out, model="local-hash-32", stream_batch=2, checkpoint_every=1,
+                        workers=1, resume=True)
@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+"""user-021: 축소 차원 임베딩 + 2단계(coarse → 전체 차원 재채점) 검색"""
+import numpy as np
+
+from student.common.schemas import Day2Plan
+from student.day2.impl.build_index import build_index
+from student.day2.impl.embeddings import Embeddings
+from student.day2.impl.manifest import read_manifest
+from student.day2.impl.rag import Day2Agent, _load_store
+from student.day2.impl.session import get_session
+from student.day2.impl.store import FaissStore
+
+from conftest import MODEL, unit_rows, items_for
+
+
+def test_dimensions_truncate_and_renormalize():
+    full = Embeddings(model="local-hash-64").encode(["개인정보", "금융"])
+    emb = Embeddings(model="local-hash-64", dimensions=32)
+    V = emb.encode(["개인정보", "금융"])
+    assert emb.dim == 32 and V.shape == (2, 32)
+    np.testing.assert_allclose(np.linalg.norm(V, axis=1), 1.0, rtol=1e-5)
+    ref = full[:, :32] / np.linalg.norm(full[:, :32], axis=1, keepdims=True)
+    np.testing.assert_allclose(V, ref, atol=1e-6)
+
+
+def test_coarse_index_rescored_with_full_vectors(tmp_path):
+    X = unit_rows(400, 64)
+    store = FaissStore(64, str(tmp_path / "faiss.index"), str(tmp_path / "docs.jsonl"), coarse_dim=16)
+    store.add(X, items_for(len(X)))
+    store.save()
+    loaded = FaissStore.load(str(tmp_path / "faiss.index"), str(tmp_path / "docs.jsonl"))
+    assert loaded.index.d == 16 and loaded.coarse_dim == 16 and loaded.dim == 64
+    q = X[7]
+    scores, ids = loaded.search_ids(q, top_k=5, rerank_factor=20)
+    assert ids[0] == 7
+    np.testing.assert_allclose(scores, X[ids] @ q, atol=1e-5)  # 점수는 전체 차원 내적
+    assert np.all(np.diff(scores) <= 0)
+
+
+def test_coarse_dim_not_below_full_dim_is_plain(tmp_path):
+    store = FaissStore(16, str(tmp_path / "faiss.index"), str(tmp_path / "docs.jsonl"), coarse_dim=16)
+    assert store.coarse_dim is None and not store.reranks
+
+
+def test_reduced_dimension_build_sets_query_embedder(tmp_path, docs_dir):
+    out = str(tmp_path / "idx")
+    build_index([str(docs_dir)], out, model=MODEL, dimensions=32, coarse_dim=16, versioned=False)
+    man = read_manifest(out)
+    assert man["embedding_dimensions"] == 32 and man["dim"] == 32
+    store, emb = get_session(out, MODEL, _load_store).current()
+    assert emb.dim == 32 and store.dim == 32 and store.index.d == 16
+
+    q = "가명정보는 통계 작성과 과학적 연구 목적으로 처리할 수 있다"
+    plan = Day2Plan(index_dir=out, embedding_model=MODEL, top_k=2, min_score=0.0, min_mean_topk=0.0)
+    ctx = Day2Agent(plan).handle(q)["contexts"]
+    assert ctx and ctx[0]["meta"]["path"].endswith("privacy.txt")
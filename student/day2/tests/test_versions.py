@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+"""user-008: 원자적 버전 발행 + 무중단 교체 + 롤백"""
+import os
+
+import pytest
+
+from student.day2.impl.build_index import build_index, _in_new_version
+from student.day2.impl.incremental import update_index
+from student.day2.impl.versions import (
+    current_version, list_versions, resolve_index_dir, rollback, new_version_dir, publish,
+)
+from student.day2.impl.bm25 import BM25Index
+from student.day2.impl.metaindex import MetaIndex
+from student.day2.impl.rag import _load_store
+from student.day2.impl.session import get_session
+
+from conftest import MODEL, write_docs
+
+
+def test_builds_publish_new_versions_and_prune(tmp_path, docs_dir):
+    root = str(tmp_path / "root")
+    for _ in range(4):
+        build_index([str(docs_dir)], root, model=MODEL, keep_versions=2)
+    versions = list_versions(root)
+    assert len(versions) == 2
+    assert current_version(root) == versions[-1]
+    assert os.path.exists(os.path.join(resolve_index_dir(root), "faiss.index"))
+
+
+def test_failed_build_leaves_current_untouched(tmp_path, docs_dir):
+    root = str(tmp_path / "root")
+    build_index([str(docs_dir)], root, model=MODEL)
+    cur = current_version(root)
+    with pytest.raises(ValueError):
+        build_index([str(tmp_path / "empty")], root, model=MODEL)
+    assert current_version(root) == cur
+    assert list_versions(root) == [cur]
+    assert not [d for d in os.listdir(os.path.join(root, "versions")) if d.endswith(".tmp")]
+
+
+def test_publish_requires_complete_version(tmp_path):
+    root = str(tmp_path / "root")
+    name, _ = new_version_dir(root)
+    with pytest.raises(FileNotFoundError):
+        publish(root, name)
+
+
+def test_session_hot_swaps_and_rolls_back(tmp_path, docs_dir):
+    root = str(tmp_path / "root")
+    build_index([str(docs_dir)], root, model=MODEL)
+    sess = get_session(root, MODEL, _load_store)
+    old = sess.store()
+    write_docs(docs_dir, {"extra.txt": "새 버전에만 있는 문서입니다. " * 20})
+    build_index([str(docs_dir)], root, model=MODEL)
+    new = sess.store()
+    assert new is not old and new.index.ntotal > old.index.ntotal
+    assert old.search_ids(old.vectors([0])[0], 1)[1][0] == 0  # 교체 전 store 는 계속 사용 가능
+    prev = rollback(root)
+    assert current_version(root) == prev
+    assert sess.store().index.ntotal == old.index.ntotal
+
+
+def test_incremental_update_clones_whole_version(tmp_path, docs_dir):
+    root = str(tmp_path / "root")
+    build_index([str(docs_dir)], root, model=MODEL)
+    before = current_version(root)
+    _in_new_version(root, lambda d: update_index([str(docs_dir)], d, auto_compact=False))
+    after = resolve_index_dir(root)
+    assert current_version(root) != before
+    # 변경이 없어 save() 를 건너뛰어도 복사본에 BM25/메타 색인 디렉토리가 있어야 함
+    assert BM25Index.exists(after) and MetaIndex.exists(after)